@@ -7,6 +7,8 @@ import json
 import os
 import traceback
 
+from tick_scheduler import get_scheduler
+
 
 class ProductionManager:
     """
@@ -201,7 +203,8 @@ class BroyageView:
                                      command=self.controller.save_productions,
                                      bg=self.colors['button_bg'], fg=self.colors['button_fg'])
         self.save_button.pack(side='left', padx=5)
-        self.blink_button()  # Lancer le clignotement du bouton
+        # Clignotement (boucle commune, suspendue quand l'écran est masqué)
+        get_scheduler(self.parent).every(500, self.blink_button, widget=self.save_button)
 
         table_frame = tk.Frame(self.parent, bg=self.colors['bg'])
         table_frame.pack(fill='both', expand=True, padx=10, pady=10)
@@ -260,7 +263,6 @@ class BroyageView:
         """Fait clignoter le bouton Sauvegarder."""
         self.save_button.config(bg=self.blink_colors[self.blink_index])
         self.blink_index = (self.blink_index + 1) % len(self.blink_colors)
-        self.parent.after(500, self.blink_button)
 
     def open_create_window(self):
         ProductionWindow(self.parent, self.controller, self.colors, mode="create")
@@ -8,12 +8,9 @@ import os
 import pickle
 import importlib
 
-try:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.pdfgen import canvas
-except ImportError:
-    # Si reportlab n'est pas installé, le code d'export PDF signalera une erreur lors de l'export.
-    pass
+from tick_scheduler import get_scheduler
+
+# reportlab est importé à l'export PDF (une erreur est signalée s'il n'est pas installé).
 
 
 def get_frame(parent_frame, controller):
@@ -267,7 +264,8 @@ class QualiteModule:
         self.valider_button = tk.Button(button_frame, text="Valider", bg=self.colors['button_bg'],
                                         fg=self.colors['button_fg'], command=self.save_enregistrement)
         self.valider_button.pack(side='left', padx=5)
-        self.blink_button()  # Lancer le clignotement du bouton
+        # Clignotement (boucle commune, suspendue quand l'écran est masqué)
+        get_scheduler(self.parent).every(500, self.blink_button, widget=self.valider_button)
 
         # Bouton liste enregistrements
         liste_button = tk.Button(button_frame, text="Liste enregistrements qualité", bg=self.colors['button_bg'],
@@ -283,7 +281,6 @@ class QualiteModule:
         # Changer la couleur du bouton Valider périodiquement
         self.valider_button.config(bg=self.blink_colors[self.blink_index])
         self.blink_index = (self.blink_index + 1) % len(self.blink_colors)
-        self.parent.after(500, self.blink_button)  # Change toutes les 500 ms
 
     def _bind_mousewheel(self, event):
         # Sur Windows
@@ -7,10 +7,8 @@ import re
 import json
 import os
 from datetime import datetime
-import matplotlib
-matplotlib.use('TkAgg')
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+from sechoir_store import SechoirStore
 
 def get_frame(parent_frame, controller):
     # Cadre principal
@@ -66,6 +64,10 @@ def get_frame(parent_frame, controller):
         except ValueError:
             return False
 
+    # Stockage journalisé des données du séchoir (sechoir_data.json + segments de journal)
+    main_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    store = SechoirStore.for_directory(main_dir)
+
     vcmd_time = (frame.register(validate_time), '%P')
     vcmd_numeric = (frame.register(validate_numeric), '%P')
 
@@ -149,58 +151,35 @@ def get_frame(parent_frame, controller):
             'temperatures_reelles': reelles_data
         }
 
-        # Chemin du fichier de données
-        main_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        data_file = os.path.join(main_dir, 'sechoir_data.json')
-
-        # Charger les données existantes
-        if os.path.exists(data_file):
-            try:
-                with open(data_file, 'r', encoding='utf-8') as f:
-                    existing_data = json.load(f)
-            except json.JSONDecodeError:
-                existing_data = []
-        else:
-            existing_data = []
-
         # Nouvelle entrée
         save_entry = {
             'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             'four_data': four_data
         }
 
-        existing_data.append(save_entry)
-
-        # Sauvegarde dans le fichier
+        # Ajout au journal (pas de relecture / réécriture de tout l'historique)
         try:
-            with open(data_file, 'w', encoding='utf-8') as f:
-                json.dump(existing_data, f, ensure_ascii=False, indent=4)
-            messagebox.showinfo("Sauvegarde réussie", f"Données sauvegardées dans '{data_file}'.")
+            store.append(save_entry)
+            messagebox.showinfo("Sauvegarde réussie", f"Données sauvegardées dans '{store.data_file}'.")
         except Exception as e:
             messagebox.showerror("Erreur de sauvegarde", f"Erreur lors de la sauvegarde.\n\n{e}")
 
     def open_graph_window():
         """Ouvre une nouvelle fenêtre affichant le graphique des températures."""
-        main_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        data_file = os.path.join(main_dir, 'sechoir_data.json')
-
-        if not os.path.exists(data_file):
+        if not store.exists():
             messagebox.showwarning("Aucune donnée", "Pas de données disponibles pour le graphique.")
             return
 
         try:
-            with open(data_file, 'r', encoding='utf-8') as f:
-                existing_data = json.load(f)
-        except json.JSONDecodeError:
+            last_entry = store.last_entry()
+        except (json.JSONDecodeError, ValueError):
             messagebox.showerror("Erreur", "Erreur lors de la lecture des données.")
             return
 
-        if not existing_data:
+        if last_entry is None:
             messagebox.showwarning("Aucune donnée", "Aucune donnée disponible pour le graphique.")
             return
 
-        last_entry = existing_data[-1]
-
         # Créer la fenêtre du graphique
         graph_window = tk.Toplevel()
         graph_window.title("Graphique des Températures")
@@ -261,7 +240,11 @@ def get_frame(parent_frame, controller):
             temp_con.append(val_con)
             temp_re.append(val_re)
 
-        # Création de la figure matplotlib
+        # Création de la figure matplotlib (importé au premier graphe)
+        import matplotlib
+        matplotlib.use('TkAgg')
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
         fig, ax = plt.subplots(figsize=(10, 6), facecolor='#2B2B2B')
         fig.patch.set_facecolor('#2B2B2B')
         ax.set_facecolor('#2B2B2B')
@@ -0,0 +1,157 @@
+# batch_inference.py
+# ===========================================================================================
+# 👉 Prédiction par lots sur l'historique du séchoir (backtest d'un modèle) :
+#    - Sélection des entrées (toutes, par période et / ou par type de produit) via l'index SQLite.
+#    - Extraction vectorisée des features (consignes + tapis) et des valeurs réelles.
+#    - Prédiction par grands lots ; les images choisies dans l'interface sont partagées par toutes
+#      les entrées (np.broadcast_to : aucune copie par entrée).
+#    - Résultats enregistrés au format colonnes (.npz : une colonne par grandeur, prédit / réel)
+#      et statistiques d'erreur par cellule (MAE, RMSE, biais, erreur max).
+#    Ce module ne dépend que de NumPy : la fonction de prédiction est fournie par l'appelant.
+# ===========================================================================================
+
+import logging
+import numpy as np
+
+# Grandeurs prédites, dans l'ordre des sorties du modèle
+OUTPUT_LABELS = ["CEL1", "CEL2", "CEL3", "CEL4", "CEL5/6", "CEL7/8", "AirNeuf",
+                 "Vit. Stockeur", "Tapis1", "Tapis2", "Tapis3"]
+OUTPUT_COLUMNS = ["cel1", "cel2", "cel3", "cel4", "cel5_6", "cel7_8", "air_neuf",
+                  "vit_stockeur", "tapis1", "tapis2", "tapis3"]
+
+BATCH_SIZE = 512
+
+logger = logging.getLogger("batch_inference")
+
+
+def _safe_float(x):
+    try:
+        return float(x)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _last_valid_temp_entry(temp_list):
+    for t in reversed(temp_list):
+        if len(t.get('cels', [])) == 6 and 'air_neuf' in t:
+            return t
+    return None
+
+
+def entry_features(four_data):
+    """
+    Features (consignes + tapis) et valeurs réelles d'un enregistrement four_data.
+    Retourne (x, y) : deux np.ndarray float32 de 11 valeurs, ou (None, None) si incomplet.
+    """
+    last_con = _last_valid_temp_entry(four_data.get('temperatures_consignes', []))
+    last_re = _last_valid_temp_entry(four_data.get('temperatures_reelles', []))
+    tapis = four_data.get('tapis', [])
+    if last_con is None or last_re is None or not tapis:
+        return None, None
+    last_tapis = tapis[-1]
+    speeds = [_safe_float(last_tapis.get(k, 0.0)) for k in ('vit_stockeur', 'tapis1', 'tapis2', 'tapis3')]
+    x = [_safe_float(v) for v in last_con['cels']] + [_safe_float(last_con.get('air_neuf', 0.0))] + speeds
+    y = [_safe_float(v) for v in last_re['cels']] + [_safe_float(last_re.get('air_neuf', 0.0))] + speeds
+    return np.array(x, dtype=np.float32), np.array(y, dtype=np.float32)
+
+
+def select_entries(history, since=None, until=None, product=None):
+    """
+    Entrées de l'historique bornées par horodatage (chaînes comparables, bornes incluses)
+    et / ou filtrées par type de produit. Utilise les requêtes indexées si history est une
+    vue SQLite (SechoirHistory), sinon filtre la liste.
+    """
+    index = getattr(history, 'index', None)
+    if index is not None:
+        if product:
+            return index.entries_for_product(product, since, until)
+        if since or until:
+            return index.entries_between(since, until)
+        return list(history)
+
+    def keep(entry):
+        timestamp = entry.get('timestamp', '')
+        type_produit = entry.get('four_data', {}).get('produit', {}).get('type_produit')
+        return ((not since or timestamp >= since) and (not until or timestamp <= until)
+                and (not product or type_produit == product))
+
+    return [e for e in history if keep(e)]
+
+
+def run_batch_prediction(predict_fn, entries, image, batch_size=BATCH_SIZE):
+    """
+    Prédit toutes les entrées exploitables par lots de batch_size.
+
+    - predict_fn(X_image, X_numeric) -> np.ndarray (n, 11)
+    - image : np.ndarray (H, W, 3) des images sélectionnées, commun à toutes les entrées
+
+    Retourne un dict de colonnes : timestamp, type_produit, numeric, actual, predicted,
+    et 'skipped' (nombre d'entrées incomplètes ignorées).
+    """
+    n = len(entries)
+    X_numeric = np.empty((n, len(OUTPUT_LABELS)), dtype=np.float32)
+    Y = np.empty((n, len(OUTPUT_LABELS)), dtype=np.float32)
+    timestamps = []
+    products = []
+    for entry in entries:
+        four_data = entry.get('four_data', {})
+        x, y = entry_features(four_data)
+        if x is None:
+            continue
+        X_numeric[len(timestamps)] = x
+        Y[len(timestamps)] = y
+        timestamps.append(entry.get('timestamp', ''))
+        products.append(four_data.get('produit', {}).get('type_produit', ''))
+
+    n_valid = len(timestamps)
+    X_numeric, Y = X_numeric[:n_valid], Y[:n_valid]
+    predicted = np.empty((n_valid, len(OUTPUT_LABELS)), dtype=np.float32)
+    for start in range(0, n_valid, batch_size):
+        stop = min(start + batch_size, n_valid)
+        X_image = np.broadcast_to(image, (stop - start,) + image.shape)
+        predicted[start:stop] = np.asarray(predict_fn(X_image, X_numeric[start:stop]))[:, :len(OUTPUT_LABELS)]
+
+    logger.info(f"Prédiction par lots : {n_valid} entrées prédites, {n - n_valid} ignorées.")
+    return {
+        'timestamp': np.array(timestamps, dtype=str),
+        'type_produit': np.array(products, dtype=str),
+        'numeric': X_numeric,
+        'actual': Y,
+        'predicted': predicted,
+        'skipped': n - n_valid,
+    }
+
+
+def error_statistics(actual, predicted):
+    """
+    Statistiques d'erreur par grandeur : {label: {'mae', 'rmse', 'bias', 'max_abs'}}.
+    """
+    if len(actual) == 0:
+        return {}
+    error = predicted - actual
+    mae = np.mean(np.abs(error), axis=0)
+    rmse = np.sqrt(np.mean(error ** 2, axis=0))
+    bias = np.mean(error, axis=0)
+    max_abs = np.max(np.abs(error), axis=0)
+    return {label: {'mae': float(mae[i]), 'rmse': float(rmse[i]), 'bias': float(bias[i]), 'max_abs': float(max_abs[i])}
+            for i, label in enumerate(OUTPUT_LABELS)}
+
+
+def format_statistics(stats):
+    lines = [f"{'Grandeur':<14}{'MAE':>8}{'RMSE':>8}{'Biais':>8}{'Max':>8}"]
+    for label, s in stats.items():
+        lines.append(f"{label:<14}{s['mae']:>8.2f}{s['rmse']:>8.2f}{s['bias']:>8.2f}{s['max_abs']:>8.2f}")
+    return "\n".join(lines)
+
+
+def save_results(path, result):
+    """
+    Enregistre les résultats au format colonnes (.npz compressé) :
+    timestamp, type_produit, puis <grandeur>_pred et <grandeur>_reel pour chaque sortie.
+    """
+    columns = {'timestamp': result['timestamp'], 'type_produit': result['type_produit']}
+    for i, name in enumerate(OUTPUT_COLUMNS):
+        columns[f"{name}_pred"] = result['predicted'][:, i]
+        columns[f"{name}_reel"] = result['actual'][:, i]
+    np.savez_compressed(path, **columns)
+    logger.info(f"Résultats de prédiction enregistrés : {path}")
@@ -0,0 +1,375 @@
+# benchmark_ia.py
+# ===========================================================================================
+# 👉 Banc de mesure des performances du pipeline IA (sans interface Tk) :
+#    - Génère un historique séchoir et des images synthétiques dans un répertoire de travail
+#      temporaire (aucune donnée réelle n'est lue ni modifiée).
+#    - Chronomètre séparément chaque étape : load_sechoir_data, load_and_concat_images (cache
+#      des vignettes froid puis chaud), construction du dataset, build_model_from_params,
+#      fit (par époque), predict (par échantillon et par lot, Keras et runtime NumPy).
+#    - Résultats au format JSON (DATA/benchmarks/<date>.json) et comparaison avec une
+#      référence enregistrée (DATA/benchmarks/baseline.json) : écart relatif par étape, seulement
+#      si la charge (sets, époques, taille de lot...) et les réglages d'exécution sont identiques.
+#
+#    - Réglages d'exécution CPU (threads, oneDNN, bfloat16, XLA : voir runtime_settings.py)
+#      appliqués avant le chargement de TensorFlow et enregistrés avec les résultats.
+#
+#    python benchmark_ia.py [--sets 200] [--epochs 3] [--save-baseline] [--fail-on-regression]
+#                           [--intra-op 4] [--inter-op 1] [--no-onednn] [--bf16] [--xla]
+# ===========================================================================================
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+from datetime import datetime, timedelta
+import numpy as np
+
+BENCHMARK_DIR = os.path.join("DATA", "benchmarks")
+BASELINE_FILENAME = "baseline.json"
+# Écart relatif au-delà duquel une étape est signalée comme plus lente
+DEFAULT_TOLERANCE = 0.15
+
+PRODUCTS = ("Ail", "Oignon", "Échalote")
+
+logger = logging.getLogger("benchmark_ia")
+
+
+# ===========================================================================================
+# 👉 Données synthétiques
+# ===========================================================================================
+
+def synthetic_entry(i, rng, start):
+    """
+    Entrée séchoir plausible (consignes, réelles, tapis) au format de sechoir_data.json.
+    """
+    timestamp = (start + timedelta(hours=i)).strftime("%Y-%m-%d %H:%M:%S")
+    heure = timestamp[11:16]
+    consignes = [round(float(v), 1) for v in rng.uniform(40.0, 90.0, 6)]
+    reelles = [round(c + float(rng.normal(0.0, 2.0)), 1) for c in consignes]
+    return {
+        'timestamp': timestamp,
+        'four_data': {
+            'produit': {'type_produit': PRODUCTS[i % len(PRODUCTS)], 'humide': "Non", 'observations': ""},
+            'tapis': [{'heure': heure, 'vit_stockeur': f"{rng.uniform(10, 50):.1f}",
+                       'tapis1': f"{rng.uniform(10, 50):.1f}", 'tapis2': f"{rng.uniform(10, 50):.1f}",
+                       'tapis3': f"{rng.uniform(10, 50):.1f}"}],
+            'temperatures_consignes': [{'heure': heure, 'cels': [str(c) for c in consignes],
+                                        'air_neuf': f"{rng.uniform(15, 30):.1f}"}],
+            'temperatures_reelles': [{'heure': heure, 'cels': [str(r) for r in reelles],
+                                      'air_neuf': f"{rng.uniform(15, 30):.1f}"}],
+        }
+    }
+
+
+def write_synthetic_history(path, n_entries, rng):
+    start = datetime(2024, 1, 1)
+    entries = [synthetic_entry(i, rng, start) for i in range(n_entries)]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(entries, f, ensure_ascii=False, indent=4)
+    return entries
+
+
+def write_synthetic_images(directory, n_images, rng, size=(96, 96)):
+    """
+    Images JPEG aléatoires (bruit + dégradé), plus grandes que les vignettes comme les photos réelles.
+    """
+    from PIL import Image
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    gradient = np.linspace(0, 255, size[0], dtype=np.float32)[None, :, None]
+    for i in range(n_images):
+        pixels = np.clip(rng.normal(128, 40, (size[1], size[0], 3)) * 0.5 + gradient * 0.5, 0, 255)
+        path = os.path.join(directory, f"img_{i:04d}.jpg")
+        Image.fromarray(pixels.astype(np.uint8)).save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+def synthetic_sets(entries, image_paths, n_sets, rng, n_images_per_set=3):
+    """
+    Sets au format de l'interface : [nom, produit, images conformes, images non conformes, horodatage].
+    """
+    sets_info = []
+    for i in range(n_sets):
+        entry = entries[int(rng.integers(len(entries)))]
+        images = [image_paths[int(j)] for j in rng.integers(len(image_paths), size=2 * n_images_per_set)]
+        sets_info.append([f"set_{i:04d}", entry['four_data']['produit']['type_produit'],
+                          images[:n_images_per_set], images[n_images_per_set:], entry['timestamp']])
+    return sets_info
+
+
+# ===========================================================================================
+# 👉 Mesures
+# ===========================================================================================
+
+def _stage(seconds, items=None):
+    result = {'seconds': seconds}
+    if items:
+        result['items'] = items
+        result['per_item_ms'] = seconds * 1000.0 / items
+    return result
+
+
+def _timed(fn, repeat=1):
+    """
+    Meilleur temps (secondes) de repeat exécutions de fn, et le résultat de la dernière.
+    """
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_benchmark(n_sets=200, n_entries=500, n_images=60, n_epochs=3, batch_size=32,
+                  predict_batch=256, predict_repeats=20, seed=0, workdir=None, runtime_params=None):
+    """
+    Exécute toutes les mesures dans workdir (répertoire temporaire supprimé ensuite si None).
+    runtime_params : réglages d'exécution (clés de runtime_settings.RUNTIME_PARAM_KEYS).
+    Renvoie {'meta': {...}, 'results': {étape: {'seconds', 'items', 'per_item_ms'}}}.
+    """
+    from runtime_settings import apply_runtime_settings
+    runtime_params = dict(runtime_params or {})
+    runtime = apply_runtime_settings(runtime_params)
+    rng = np.random.default_rng(seed)
+    own_workdir = workdir is None
+    workdir = os.path.abspath(workdir or tempfile.mkdtemp(prefix="benchmark_ia_"))
+    previous_cwd = os.getcwd()
+    from data_utils import SECHOIR_DATA_FILE_ENV
+    from thumbnail_cache import reset_thumbnail_caches
+    previous_env = os.environ.get(SECHOIR_DATA_FILE_ENV)
+    results = {}
+    try:
+        # Chemins relatifs (DATA/thumbnails, MODELS, ...) résolus dans le répertoire de travail
+        reset_thumbnail_caches()
+        os.chdir(workdir)
+        data_file = os.path.join(workdir, "sechoir_data.json")
+        os.environ[SECHOIR_DATA_FILE_ENV] = data_file
+        entries = write_synthetic_history(data_file, n_entries, rng)
+        image_paths = write_synthetic_images(os.path.join(workdir, "images"), n_images, rng)
+        sets_info = synthetic_sets(entries, image_paths, n_sets, rng)
+
+        from data_utils import load_sechoir_data, load_and_concat_images
+        from dataset_builder import DatasetBuilder, to_model_input
+        from input_pipeline import make_training_dataset
+        from model_utils import MODEL_PARAMS, build_model_from_params
+
+        seconds, data = _timed(load_sechoir_data, repeat=3)
+        results['load_sechoir_data'] = _stage(seconds, len(data))
+
+        # Vignettes : premier passage = décodage JPEG (cache froid), second = cache disque/mémoire
+        for name in ('load_and_concat_images_cold', 'load_and_concat_images_warm'):
+            seconds, _ = _timed(lambda: [load_and_concat_images(s[2], s[3]) for s in sets_info])
+            results[name] = _stage(seconds, len(sets_info))
+
+        builder = DatasetBuilder(image_dtype=np.uint8)
+        seconds, (X_image, X_numeric, Y) = _timed(lambda: builder.build(sets_info))
+        results['dataset_build'] = _stage(seconds, len(sets_info))
+
+        params = dict(MODEL_PARAMS, architecture="CNN+Dense", n_epochs=n_epochs, batch_size=batch_size,
+                      **runtime_params)
+        seconds, model = _timed(lambda: build_model_from_params(X_image.shape[1:], X_numeric.shape[1],
+                                                                Y.shape[1], params))
+        results['build_model_from_params'] = _stage(seconds)
+
+        from tensorflow import keras
+
+        class EpochTimer(keras.callbacks.Callback):
+            def on_train_begin(self, logs=None):
+                self.times = []
+
+            def on_epoch_begin(self, epoch, logs=None):
+                self.start = time.perf_counter()
+
+            def on_epoch_end(self, epoch, logs=None):
+                self.times.append(time.perf_counter() - self.start)
+
+        timer = EpochTimer()
+        dataset = make_training_dataset(X_image, X_numeric, Y, batch_size, seed=seed)
+        model.fit(dataset, epochs=n_epochs, verbose=0, callbacks=[timer])
+        # La première époque inclut le traçage du graphe : mesurée à part
+        results['fit_first_epoch'] = _stage(timer.times[0], len(Y))
+        if len(timer.times) > 1:
+            results['fit_epoch'] = _stage(float(np.mean(timer.times[1:])), len(Y))
+
+        X_batch_image = to_model_input(X_image[:predict_batch])
+        X_batch_numeric = X_numeric[:predict_batch]
+        model.predict([X_batch_image[:1], X_batch_numeric[:1]], verbose=0)  # préchauffage
+        seconds, _ = _timed(lambda: [model.predict([X_batch_image[:1], X_batch_numeric[:1]], verbose=0)
+                                     for _ in range(predict_repeats)])
+        results['predict_sample'] = _stage(seconds, predict_repeats)
+        seconds, _ = _timed(lambda: model.predict([X_batch_image, X_batch_numeric], verbose=0), repeat=3)
+        results['predict_batch'] = _stage(seconds, len(X_batch_numeric))
+
+        try:
+            from numpy_runtime import NumpyModel, export_numpy_model
+            numpy_model = NumpyModel.load(export_numpy_model(model, os.path.join(workdir, "benchmark.npz")))
+            seconds, _ = _timed(lambda: [numpy_model.predict(X_batch_image[:1], X_batch_numeric[:1])
+                                         for _ in range(predict_repeats)])
+            results['predict_sample_numpy'] = _stage(seconds, predict_repeats)
+            seconds, _ = _timed(lambda: numpy_model.predict(X_batch_image, X_batch_numeric), repeat=3)
+            results['predict_batch_numpy'] = _stage(seconds, len(X_batch_numeric))
+        except Exception as e:
+            logger.warning(f"Runtime NumPy non mesuré : {e}")
+        builder.close()
+    finally:
+        reset_thumbnail_caches()
+        os.chdir(previous_cwd)
+        if previous_env is None:
+            os.environ.pop(SECHOIR_DATA_FILE_ENV, None)
+        else:
+            os.environ[SECHOIR_DATA_FILE_ENV] = previous_env
+        if own_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    meta = _environment(n_sets=n_sets, n_entries=n_entries, n_images=n_images, n_epochs=n_epochs,
+                        batch_size=batch_size, predict_batch=predict_batch, seed=seed)
+    meta['runtime'] = runtime
+    return {'meta': meta, 'results': results}
+
+
+def _environment(**config):
+    meta = {'date': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+            'platform': platform.platform(), 'cpu_count': os.cpu_count(), 'numpy': np.__version__,
+            'config': config}
+    try:
+        import tensorflow as tf
+        meta['tensorflow'] = tf.__version__
+    except ImportError:
+        pass
+    return meta
+
+
+# ===========================================================================================
+# 👉 Comparaison avec la référence
+# ===========================================================================================
+
+def _metric(stage):
+    return stage.get('per_item_ms', stage['seconds'] * 1000.0)
+
+
+def baseline_mismatch(results, baseline):
+    """
+    Différences de charge (meta['config']) et de réglages d'exécution (meta['runtime']) avec
+    la référence : liste de dict key, current, baseline (vide si les mesures sont comparables).
+    """
+    current_meta = json.loads(json.dumps(results.get('meta', {})))
+    baseline_meta = baseline.get('meta', {})
+    mismatch = []
+    for section in ('config', 'runtime'):
+        current, reference = current_meta.get(section) or {}, baseline_meta.get(section) or {}
+        for key in sorted(set(current) | set(reference)):
+            if current.get(key) != reference.get(key):
+                mismatch.append({'key': f"{section}.{key}", 'current': current.get(key),
+                                 'baseline': reference.get(key)})
+    return mismatch
+
+
+def compare_with_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare chaque étape à la référence. Renvoie une liste de dict :
+    stage, current, baseline (ms, ou ms / élément), ratio, status ('plus lent', 'plus rapide', 'stable').
+    """
+    comparison = []
+    for stage, current in results['results'].items():
+        reference = baseline.get('results', {}).get(stage)
+        if reference is None:
+            continue
+        ratio = _metric(current) / max(_metric(reference), 1e-12)
+        if ratio > 1.0 + tolerance:
+            status = 'plus lent'
+        elif ratio < 1.0 - tolerance:
+            status = 'plus rapide'
+        else:
+            status = 'stable'
+        comparison.append({'stage': stage, 'current': _metric(current), 'baseline': _metric(reference),
+                           'ratio': ratio, 'status': status})
+    return comparison
+
+
+def format_results(results, comparison=None):
+    by_stage = {c['stage']: c for c in comparison or []}
+    lines = [f"{'Étape':<30}{'Total (s)':>10}{'ms/élém.':>10}{'Réf.':>10}{'Ratio':>8}"]
+    for stage, r in results['results'].items():
+        line = f"{stage:<30}{r['seconds']:>10.3f}{r.get('per_item_ms', float('nan')):>10.3f}"
+        if stage in by_stage:
+            c = by_stage[stage]
+            line += f"{c['baseline']:>10.3f}{c['ratio']:>8.2f}  {c['status']}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banc de mesure du pipeline IA (données synthétiques).")
+    parser.add_argument("--sets", type=int, default=200, help="nombre de sets synthétiques")
+    parser.add_argument("--entries", type=int, default=500, help="nombre d'entrées séchoir synthétiques")
+    parser.add_argument("--images", type=int, default=60, help="nombre d'images synthétiques distinctes")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="fichier JSON des résultats (défaut : DATA/benchmarks/<date>.json)")
+    parser.add_argument("--baseline", default=os.path.join(BENCHMARK_DIR, BASELINE_FILENAME),
+                        help="référence à comparer")
+    parser.add_argument("--save-baseline", action="store_true", help="enregistre les résultats comme référence")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="code de sortie 1 si une étape est plus lente que la référence, "
+                             "2 si la référence a été mesurée avec une autre charge ou d'autres réglages")
+    parser.add_argument("--intra-op", type=int, default=0, help="threads intra-op TensorFlow (0 = auto)")
+    parser.add_argument("--inter-op", type=int, default=0, help="threads inter-op TensorFlow (0 = auto)")
+    parser.add_argument("--no-onednn", action="store_true", help="désactive les optimisations oneDNN")
+    parser.add_argument("--bf16", action="store_true", help="précision mixte bfloat16 (si gérée par le CPU)")
+    parser.add_argument("--xla", action="store_true", help="compilation XLA")
+    args = parser.parse_args(argv)
+    runtime_params = {'intra_op_threads': args.intra_op, 'inter_op_threads': args.inter_op,
+                      'onednn': not args.no_onednn, 'mixed_precision': args.bf16, 'xla_jit': args.xla}
+
+    output = os.path.abspath(args.output or os.path.join(
+        BENCHMARK_DIR, datetime.now().strftime("benchmark_%Y%m%d_%H%M%S.json")))
+    baseline_path = os.path.abspath(args.baseline)
+
+    results = run_benchmark(n_sets=args.sets, n_entries=args.entries, n_images=args.images,
+                            n_epochs=args.epochs, batch_size=args.batch_size, seed=args.seed,
+                            runtime_params=runtime_params)
+
+    comparison = None
+    mismatch = []
+    if os.path.exists(baseline_path) and not args.save_baseline:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        mismatch = baseline_mismatch(results, baseline)
+        if not mismatch:
+            comparison = compare_with_baseline(results, baseline, args.tolerance)
+        results['comparison'] = {'baseline': baseline_path, 'tolerance': args.tolerance,
+                                 'mismatch': mismatch, 'stages': comparison}
+
+    for path in [output] + ([baseline_path] if args.save_baseline else []):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    from runtime_settings import format_runtime
+    print(f"Exécution : {format_runtime(results['meta']['runtime'])}")
+    print(format_results(results, comparison))
+    if mismatch:
+        print("Comparaison avec la référence impossible : charge ou réglages différents")
+        for m in mismatch:
+            print(f"  {m['key']} : {m['current']} (référence : {m['baseline']})")
+    print(f"Résultats : {output}" + (f" (référence : {baseline_path})" if args.save_baseline else ""))
+
+    if args.fail_on_regression and mismatch:
+        return 2
+    if args.fail_on_regression and comparison and any(c['status'] == 'plus lent' for c in comparison):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s %(levelname)s %(message)s')
+    sys.exit(main())
@@ -6,6 +6,8 @@
 #    - Des fonctions utilitaires pour charger les données du séchoir, extraire les sets,
 #      charger/concaténer les images, trouver la dernière consigne valide, etc.
 #    - Des fonctions pour charger/sauvegarder les modèles TensorFlow.
+#    TensorFlow n'est importé qu'à la première utilisation (voir lazy_imports.py), et aucun
+#    répertoire n'est créé à l'import : MODELS_DIR est créé à la première sauvegarde.
 #
 # Améliorations :
 # - Ajout de commentaires plus détaillés.
@@ -15,11 +17,12 @@
 # ===========================================================================================
 
 import os
-import json
 import logging
 import numpy as np
-from PIL import Image
-from tensorflow import keras
+
+from sechoir_store import SechoirStore, SECHOIR_FILENAME
+from thumbnail_cache import load_thumbnail
+from model_registry import ModelRegistry, registry_path
 
 # ===========================================================================================
 # 👉 THEME : défini les couleurs et styles utilisés dans l'interface.
@@ -48,14 +51,15 @@ THEME = {
 # ===========================================================================================
 DATA_DIR = "DATA"
 MODELS_DIR = "MODELS"
-if not os.path.exists(MODELS_DIR):
-    os.makedirs(MODELS_DIR)
 
 IMAGE_SIZE = (32, 32)
 NB_IMAGES_PER_SET = 3
 
 logger = logging.getLogger("train_ia_data")
 
+# Variable d'environnement : chemin imposé du fichier sechoir_data.json
+SECHOIR_DATA_FILE_ENV = "SECHOIR_DATA_FILE"
+
 class DataLoadingError(Exception):
     """
     Exception levée lors d'erreurs dans le chargement des données du séchoir ou des images.
@@ -75,21 +79,26 @@ def safe_float(x):
 
 def get_sechoir_data_file():
     """
-    Tente de localiser le fichier sechoir_data.json.
+    Tente de localiser le fichier sechoir_data.json (ou son journal).
     Cherche dans le répertoire parent du script, puis dans le répertoire courant.
+    La variable d'environnement SECHOIR_DATA_FILE impose un autre fichier (benchmark, essais).
 
     Retourne :
     - str ou None : chemin absolu du fichier ou None si introuvable.
     """
+    override = os.environ.get(SECHOIR_DATA_FILE_ENV)
+    if override:
+        return override if SechoirStore(override).exists() else None
+
     try:
         main_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
     except:
         main_dir = os.getcwd()
 
-    data_file = os.path.join(main_dir, 'sechoir_data.json')
-    if not os.path.exists(data_file):
-        alt_file = os.path.join(os.getcwd(), 'sechoir_data.json')
-        if os.path.exists(alt_file):
+    data_file = os.path.join(main_dir, SECHOIR_FILENAME)
+    if not SechoirStore(data_file).exists():
+        alt_file = os.path.join(os.getcwd(), SECHOIR_FILENAME)
+        if SechoirStore(alt_file).exists():
             data_file = alt_file
         else:
             data_file = None
@@ -97,24 +106,71 @@ def get_sechoir_data_file():
 
 def load_sechoir_data():
     """
-    Charge les données du séchoir depuis sechoir_data.json si disponible.
+    Charge les données du séchoir (instantané sechoir_data.json + journal) si disponibles.
     Retourne une liste de dict ou une liste vide en cas d'erreur ou d'absence du fichier.
     """
     data_file = get_sechoir_data_file()
-    if data_file is None or not os.path.exists(data_file):
+    if data_file is None:
         logger.warning("Fichier sechoir_data.json non trouvé.")
         return []
     try:
-        with open(data_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            if not isinstance(data, list):
-                logger.error("Format invalide de sechoir_data.json. Un tableau JSON est attendu.")
-                return []
-            return data
+        return SechoirStore(data_file).load()
     except Exception as e:
         logger.error(f"Erreur chargement sechoir_data.json: {e}", exc_info=True)
         return []
 
+# Cache de l'historique parsé, valable tant que la signature du stockage ne change pas.
+_SECHOIR_CACHE = {'key': None, 'data': None}
+
+def load_sechoir_data_cached():
+    """
+    Comme load_sechoir_data(), mais ne relit le disque que si le stockage a changé
+    (signature = noms et tailles des fichiers du journal).
+
+    Retourne (data, reused) : la liste des entrées et True si elle provient du cache.
+    La liste renvoyée est partagée : elle ne doit pas être modifiée.
+    """
+    data_file = get_sechoir_data_file()
+    if data_file is None:
+        logger.warning("Fichier sechoir_data.json non trouvé.")
+        return [], False
+    store = SechoirStore(data_file)
+    try:
+        key = (store.data_file, store.signature())
+    except OSError:
+        key = None
+    if key is not None and _SECHOIR_CACHE['key'] == key:
+        return _SECHOIR_CACHE['data'], True
+    data = load_sechoir_data()
+    _SECHOIR_CACHE['key'] = key
+    _SECHOIR_CACHE['data'] = data
+    return data, False
+
+def get_sechoir_data_size():
+    """
+    Taille totale (octets) des fichiers du stockage séchoir (instantané + journal), 0 si absent.
+    """
+    data_file = get_sechoir_data_file()
+    if data_file is None:
+        return 0
+    store = SechoirStore(data_file)
+    return sum(os.path.getsize(p) for p in [store.data_file] + store.segment_files() if os.path.exists(p))
+
+def load_last_sechoir_entry():
+    """
+    Renvoie la dernière entrée du séchoir via l'index SQLite (sans parser tout l'historique),
+    ou None si aucune donnée n'est disponible.
+    """
+    data_file = get_sechoir_data_file()
+    if data_file is None:
+        logger.warning("Fichier sechoir_data.json non trouvé.")
+        return None
+    try:
+        return SechoirStore(data_file).last_entry()
+    except Exception as e:
+        logger.error(f"Erreur lecture de la dernière entrée du séchoir: {e}", exc_info=True)
+        return None
+
 def get_last_valid_temp_entry(temp_list):
     """
     Parcourt la liste des consignes ou relevés de températures à l'envers
@@ -128,31 +184,52 @@ def get_last_valid_temp_entry(temp_list):
             return t
     return None
 
+_AUGMENTATION_GENERATOR = None
+
 def apply_data_augmentation(image_array):
     """
-    Exemple de fonction qui applique de la data augmentation manuelle ou via ImageDataGenerator.
+    Applique une data augmentation aléatoire (rotation, zoom, retournement) à une image (height, width, 3).
 
-    Ici, on utilise ImageDataGenerator juste en exemple. Vous pouvez ajuster rotation_range, zoom_range, etc.
-    Pour réellement augmenter les données, il faudrait le faire batch par batch pendant l'entraînement.
+    Le générateur ImageDataGenerator est créé une seule fois puis réutilisé.
+    Pour l'entraînement, l'augmentation est faite lot par lot à chaque époque par input_pipeline.py ;
+    cette fonction ne sert plus que pour les données ajoutées unitairement (production).
     """
-    # Exemple d'utilisation d'un ImageDataGenerator
-    datagen = keras.preprocessing.image.ImageDataGenerator(
-        rotation_range=20,
-        zoom_range=0.2,
-        horizontal_flip=True,
-        fill_mode='nearest'
-    )
-
-    # On suppose que image_array est (height, width, 3)
-    # Pour utiliser datagen.flow, on doit rajouter une dimension batch : (1, height, width, 3)
-    batch = np.expand_dims(image_array, axis=0)
-    it = datagen.flow(batch, batch_size=1)
-    augmented_batch = it.next()  # On génère une image augmentée
-    return augmented_batch[0]  # Retourne l'image (height, width, 3) augmentée
+    global _AUGMENTATION_GENERATOR
+    if _AUGMENTATION_GENERATOR is None:
+        from tensorflow import keras
+        _AUGMENTATION_GENERATOR = keras.preprocessing.image.ImageDataGenerator(
+            rotation_range=20,
+            zoom_range=0.2,
+            horizontal_flip=True,
+            fill_mode='nearest'
+        )
+    return _AUGMENTATION_GENERATOR.random_transform(image_array).astype(np.float32)
+
+def load_image_tile(p, size=IMAGE_SIZE, use_augmentation=False):
+    """
+    Charge une image (via le cache de miniatures), normalisée en float32 [0, 1].
+    Si use_augmentation=True, applique la data augmentation.
+    Lève DataLoadingError si l'image est introuvable ou illisible.
+    """
+    if not p or not os.path.exists(p):
+        msg = f"Image invalide ou non trouvée : {p}"
+        logger.error(msg)
+        raise DataLoadingError(msg)
+    try:
+        img_array = load_thumbnail(p, size)
+        if use_augmentation:
+            # On applique la data augmentation
+            img_array = apply_data_augmentation(img_array)
+        return img_array
+    except Exception as e:
+        msg = f"Erreur lors du chargement de l'image {p}: {e}"
+        logger.error(msg, exc_info=True)
+        raise DataLoadingError(msg)
 
 def load_and_concat_images(img_list_conformes, img_list_non_conformes, size=IMAGE_SIZE, use_augmentation=False):
     """
     Charge, redimensionne et concatène horizontalement les images conformes et non conformes.
+    Les miniatures décodées sont lues dans le cache disque (thumbnail_cache.py) quand elles y sont.
     Si use_augmentation=True, applique de la data augmentation sur chaque image chargée.
 
     Paramètres :
@@ -166,27 +243,7 @@ def load_and_concat_images(img_list_conformes, img_list_non_conformes, size=IMAG
     Lève DataLoadingError si une image est introuvable ou illisible.
     """
     all_paths = img_list_conformes + img_list_non_conformes
-    imgs = []
-    for p in all_paths:
-        if not p or not os.path.exists(p):
-            msg = f"Image invalide ou non trouvée : {p}"
-            logger.error(msg)
-            raise DataLoadingError(msg)
-        try:
-            img = Image.open(p).convert("RGB")
-            img = img.resize(size)
-            img_array = np.array(img, dtype=np.float32) / 255.0
-
-            if use_augmentation:
-                # On applique la data augmentation
-                img_array = apply_data_augmentation(img_array)
-
-            imgs.append(img_array)
-        except Exception as e:
-            msg = f"Erreur lors du chargement de l'image {p}: {e}"
-            logger.error(msg, exc_info=True)
-            raise DataLoadingError(msg)
-
+    imgs = [load_image_tile(p, size, use_augmentation) for p in all_paths]
     final_img = np.concatenate(imgs, axis=1)
     return final_img
 
@@ -204,14 +261,35 @@ def extract_set_data(img_list_conformes, img_list_non_conformes, four_data=None,
     Retourne (X_image, X_numeric), Y ou (None, None) si données insuffisantes.
     Lève DataLoadingError en cas de problème de chargement d'images.
     """
-    data = load_sechoir_data()
-    if not data:
-        return None, None
-
     if four_data is None:
-        last_entry = data[-1]
+        last_entry = load_last_sechoir_entry()
+        if last_entry is None:
+            return None, None
         four_data = last_entry.get('four_data', {})
 
+    X_numeric, Y = extract_four_features(four_data)
+    if X_numeric is None:
+        return None, None
+
+    try:
+        img_arr = load_and_concat_images(img_list_conformes, img_list_non_conformes, size=IMAGE_SIZE, use_augmentation=use_augmentation)
+    except DataLoadingError:
+        return None, None
+
+    if img_arr is None:
+        return None, None
+
+    X_image = img_arr[np.newaxis, ...]  # (1, height, width, 3)
+
+    return (X_image, X_numeric), Y
+
+def extract_four_features(four_data):
+    """
+    Construit les features numériques (consignes + vitesses) et la cible (réelles + vitesses)
+    à partir d'un enregistrement four_data.
+
+    Retourne (X_numeric, Y) de forme (1, 11) chacun, ou (None, None) si données insuffisantes.
+    """
     consignes = four_data.get('temperatures_consignes', [])
     reelles = four_data.get('temperatures_reelles', [])
     tapis = four_data.get('tapis', [])
@@ -228,16 +306,6 @@ def extract_set_data(img_list_conformes, img_list_non_conformes, four_data=None,
     if len(cels_con) != 6 or len(cels_re) != 6:
         return None, None
 
-    try:
-        img_arr = load_and_concat_images(img_list_conformes, img_list_non_conformes, size=IMAGE_SIZE, use_augmentation=use_augmentation)
-    except DataLoadingError:
-        return None, None
-
-    if img_arr is None:
-        return None, None
-
-    X_image = img_arr[np.newaxis, ...]  # (1, height, width, 3)
-
     # Construction X_numeric
     X_numeric_values = [safe_float(val) for val in cels_con]
     X_numeric_values.append(safe_float(last_con.get('air_neuf', 0.0)))
@@ -256,7 +324,7 @@ def extract_set_data(img_list_conformes, img_list_non_conformes, four_data=None,
     Y_values.append(safe_float(last_tapis.get('tapis3', 0.0)))
     Y = np.array(Y_values).reshape(1, -1)
 
-    return (X_image, X_numeric), Y
+    return X_numeric, Y
 
 def load_model_from_file(path):
     """
@@ -267,23 +335,35 @@ def load_model_from_file(path):
         logger.warning(f"Fichier modèle non trouvé : {path}")
         return None
     try:
+        from tensorflow import keras
         model = keras.models.load_model(path)
         return model
     except Exception as e:
         logger.error(f"Erreur chargement modèle {path}: {e}", exc_info=True)
         return None
 
+_MODEL_REGISTRY = None
+
+
+def get_model_registry():
+    """
+    Registre des modèles (model_registry.py), partagé par le processus.
+    """
+    global _MODEL_REGISTRY
+    if _MODEL_REGISTRY is None:
+        _MODEL_REGISTRY = ModelRegistry(registry_path(MODELS_DIR))
+    return _MODEL_REGISTRY
+
+
 def get_latest_model(model_type):
     """
-    Récupère le dernier modèle sauvegardé (le plus récent) pour un type de produit donné.
-    Cherche dans MODELS_DIR des fichiers 'model_{model_type}_*.h5'.
+    Récupère le dernier modèle sauvegardé (le plus récent) pour un type de produit donné,
+    via le registre des modèles (les modèles antérieurs au registre sont importés au besoin).
 
     Retourne le chemin ou None si aucun modèle trouvé.
     """
-    if not os.path.exists(MODELS_DIR):
-        return None
-    files = [f for f in os.listdir(MODELS_DIR) if f.startswith(f"model_{model_type}_") and f.endswith('.h5')]
-    if not files:
-        return None
-    files.sort(key=lambda x: os.path.getmtime(os.path.join(MODELS_DIR, x)), reverse=True)
-    return os.path.join(MODELS_DIR, files[0])
+    registry = get_model_registry()
+    path = registry.latest(model_type)
+    if path is None and registry.sync(MODELS_DIR):
+        path = registry.latest(model_type)
+    return path
@@ -0,0 +1,295 @@
+# dataset_builder.py
+# ===========================================================================================
+# 👉 Ce module construit les datasets d'entraînement (images + features numériques + cibles)
+#    à partir des sets ajoutés dans l'interface.
+#    - L'historique du séchoir est lu UNE seule fois par construction (et mis en cache tant
+#      que le fichier ne change pas), au lieu d'un parse complet de sechoir_data.json par set.
+#    - Chaque set est associé à l'enregistrement four_data correspondant : celui dont
+#      l'horodatage a été mémorisé à l'ajout du set (5e élément), sinon la dernière entrée.
+#    - Les images de tous les sets sont décodées en parallèle dans des tableaux préalloués
+#      (float32, float16 ou uint8), éventuellement adossés à un np.memmap pour les gros datasets.
+#    - Des statistiques indiquent combien de lectures / d'octets ont été évités.
+# ===========================================================================================
+
+import os
+import logging
+import tempfile
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from data_utils import (DATA_DIR, IMAGE_SIZE, DataLoadingError, load_image_tile, extract_four_features,
+                        load_sechoir_data_cached, load_last_sechoir_entry, get_sechoir_data_size)
+from thumbnail_cache import flush_thumbnail_caches
+
+# Nombre de threads de décodage des images
+DECODE_WORKERS = min(8, os.cpu_count() or 1)
+
+# Dimensions des features numériques (consignes + tapis) et des cibles (réelles + tapis)
+NUMERIC_DIM = 11
+TARGET_DIM = 11
+
+# Types de stockage possibles pour les images du dataset
+IMAGE_DTYPES = (np.dtype(np.float32), np.dtype(np.float16), np.dtype(np.uint8))
+# Au-delà de cette taille, les images sont stockées dans un np.memmap sur disque
+MEMMAP_THRESHOLD_BYTES = 2 * 1024 ** 3
+DATASET_MEMMAP_DIR = os.path.join(DATA_DIR, "datasets")
+
+logger = logging.getLogger("train_ia_dataset")
+
+
+def from_unit_range(images, dtype):
+    """
+    Convertit des images normalisées [0, 1] vers le type de stockage (uint8 : 0-255).
+    """
+    if np.dtype(dtype) == np.uint8:
+        return np.rint(np.clip(images, 0.0, 1.0) * 255.0).astype(np.uint8)
+    return images.astype(dtype, copy=False)
+
+
+def to_model_input(images):
+    """
+    Normalisation à la volée : renvoie un lot d'images float32 [0, 1] quel que soit le stockage.
+    """
+    if images.dtype == np.uint8:
+        return images.astype(np.float32) / 255.0
+    return images.astype(np.float32, copy=False)
+
+
+def _compact_rows(valid, *arrays):
+    """
+    Ramène en tête des tableaux les lignes valides, en place. Renvoie leur nombre.
+    """
+    n_valid = 0
+    for i, ok in enumerate(valid):
+        if ok:
+            if i != n_valid:
+                for array in arrays:
+                    array[n_valid] = array[i]
+            n_valid += 1
+    return n_valid
+
+
+def assemble_samples(samples):
+    """
+    Regroupe des échantillons ((X_image, X_numeric), Y) de une ligne chacun dans des tableaux
+    préalloués (une seule copie, sans listes intermédiaires).
+    """
+    (first_image, first_numeric), first_y = samples[0]
+    n = len(samples)
+    X_image = np.empty((n,) + first_image.shape[1:], dtype=np.float32)
+    X_numeric = np.empty((n, first_numeric.shape[1]), dtype=np.float32)
+    Y = np.empty((n, first_y.shape[1]), dtype=np.float32)
+    for i, ((x_img, x_num), y) in enumerate(samples):
+        X_image[i] = x_img[0]
+        X_numeric[i] = x_num[0]
+        Y[i] = y[0]
+    return X_image, X_numeric, Y
+
+
+def set_sechoir_timestamp(set_info):
+    """
+    Horodatage de l'entrée séchoir associée au set (5e élément optionnel), ou None.
+    """
+    return set_info[4] if len(set_info) > 4 else None
+
+
+class DatasetBuilder:
+    """
+    Construit le dataset d'un ensemble de sets en ne lisant l'historique du séchoir qu'une fois.
+
+    Utilisation :
+        builder = DatasetBuilder(use_augmentation=False)
+        X_image, X_numeric, Y = builder.build(sets_info, product_type)
+        logger.info(builder.report())
+
+    - image_dtype      : float32 (défaut), float16 ou uint8 (pixels 0-255, normalisés à la volée)
+    - memmap_threshold : au-delà de cette taille (octets), X_image est un np.memmap sur disque
+                         (None pour toujours rester en mémoire) ; close() supprime le fichier
+    """
+
+    def __init__(self, use_augmentation=False, image_dtype=np.float32,
+                 memmap_threshold=MEMMAP_THRESHOLD_BYTES, memmap_dir=DATASET_MEMMAP_DIR):
+        if np.dtype(image_dtype) not in IMAGE_DTYPES:
+            raise ValueError(f"Type de stockage des images non supporté : {image_dtype}")
+        self.use_augmentation = use_augmentation
+        self.image_dtype = np.dtype(image_dtype)
+        self.memmap_threshold = memmap_threshold
+        self.memmap_dir = memmap_dir
+        self.memmap_path = None
+        self._four_by_timestamp = None
+        self._last_four_data = None
+        self._last_resolved = False
+        self.valid_sets = []
+        self.valid_set_infos = []
+        self.stats = {
+            'sets': 0,
+            'valid_sets': 0,
+            'history_reads': 0,
+            'history_reads_saved': 0,
+            'bytes_saved': 0,
+        }
+
+    # ---------------------------------------------------------------------------------------
+    # Résolution des données séchoir
+    # ---------------------------------------------------------------------------------------
+    def _load_history(self):
+        if self._four_by_timestamp is not None:
+            return
+        data, reused = load_sechoir_data_cached()
+        if not reused:
+            self.stats['history_reads'] += 1
+        # En cas d'horodatage dupliqué, la dernière entrée l'emporte (comme la "dernière entrée")
+        self._four_by_timestamp = {e.get('timestamp'): e.get('four_data', {}) for e in data}
+        if data:
+            self._last_four_data = data[-1].get('four_data', {})
+        self._last_resolved = True
+
+    def _last_entry_four_data(self):
+        if not self._last_resolved:
+            # Requête indexée : pas besoin de parser l'historique complet
+            last_entry = load_last_sechoir_entry()
+            self.stats['history_reads'] += 1
+            self._last_four_data = last_entry.get('four_data', {}) if last_entry else None
+            self._last_resolved = True
+        return self._last_four_data
+
+    def resolve_four_data(self, set_info):
+        """
+        Renvoie le four_data associé au set, ou None si aucune donnée séchoir n'est disponible.
+        """
+        timestamp = set_sechoir_timestamp(set_info)
+        if timestamp:
+            self._load_history()
+            four_data = self._four_by_timestamp.get(timestamp)
+            if four_data is not None:
+                return four_data
+            logger.warning(f"Entrée séchoir {timestamp} introuvable pour le set '{set_info[0]}', "
+                           f"utilisation de la dernière entrée.")
+        return self._last_entry_four_data()
+
+    # ---------------------------------------------------------------------------------------
+    # Construction
+    # ---------------------------------------------------------------------------------------
+    def build(self, sets_info, product_type=None):
+        """
+        Construit (X_image, X_numeric, Y) pour les sets du type de produit donné
+        (tous les sets si product_type est None).
+        Les sets sans données exploitables ou avec une image illisible sont ignorés.
+
+        Le nombre de sets étant connu d'avance, les trois tableaux sont préalloués et remplis
+        directement (pas de listes + np.vstack). Les images de tous les sets sont décodées en
+        parallèle (pool de threads : PIL libère le GIL pendant le décodage).
+        X_image est stocké dans image_dtype (voir to_model_input pour la normalisation).
+
+        Retourne (None, None, None) si aucun set n'est exploitable.
+        """
+        selected = [s for s in sets_info if product_type is None or s[1] == product_type]
+        self.stats['sets'] += len(selected)
+        X_numeric = np.empty((len(selected), NUMERIC_DIM), dtype=np.float32)
+        Y = np.empty((len(selected), TARGET_DIM), dtype=np.float32)
+        candidates = []
+        self.valid_sets = []
+        self.valid_set_infos = []
+
+        for s in selected:
+            set_name, _, img_list_conformes, img_list_non_conformes = s[:4]
+            four_data = self.resolve_four_data(s)
+            if four_data is None:
+                continue
+            x_num, y = extract_four_features(four_data)
+            if x_num is None:
+                continue
+            paths = list(img_list_conformes) + list(img_list_non_conformes)
+            if candidates and len(paths) != len(candidates[0][1]):
+                logger.warning(f"Set '{set_name}' ignoré : {len(paths)} images au lieu de {len(candidates[0][1])}.")
+                continue
+            X_numeric[len(candidates)] = x_num[0]
+            Y[len(candidates)] = y[0]
+            candidates.append((s, paths))
+
+        X_image, valid = self._decode_images([paths for _, paths in candidates])
+        # Les miniatures décodées pendant la construction sont persistées pour les prochains runs
+        flush_thumbnail_caches()
+
+        self.valid_set_infos = [s for (s, _), ok in zip(candidates, valid) if ok]
+        self.valid_sets = [s[0] for s in self.valid_set_infos]
+        self.stats['valid_sets'] = len(self.valid_sets)
+        self._update_savings()
+        logger.info(self.report())
+
+        if not self.valid_sets:
+            self.close()
+            return None, None, None
+        n_valid = _compact_rows(valid, X_image, X_numeric, Y)
+        return X_image[:n_valid], X_numeric[:n_valid], Y[:n_valid]
+
+    def _allocate_images(self, shape):
+        """
+        Tableau d'images de la forme donnée, en mémoire ou adossé à un np.memmap
+        si sa taille dépasse memmap_threshold.
+        """
+        nbytes = int(np.prod(shape)) * np.dtype(self.image_dtype).itemsize
+        if self.memmap_threshold is None or nbytes <= self.memmap_threshold:
+            return np.empty(shape, dtype=self.image_dtype)
+        os.makedirs(self.memmap_dir, exist_ok=True)
+        fd, self.memmap_path = tempfile.mkstemp(prefix="dataset_", suffix=".dat", dir=self.memmap_dir)
+        os.close(fd)
+        logger.info(f"Dataset de {nbytes / 1e6:.1f} Mo stocké sur disque ({self.memmap_path}).")
+        return np.memmap(self.memmap_path, dtype=self.image_dtype, mode='w+', shape=shape)
+
+    def _decode_images(self, paths_per_set):
+        """
+        Décode toutes les images (N sets x nb images) en parallèle dans un tableau
+        (N, H, W * nb images, 3) préalloué.
+        Un set dont une image est illisible est invalidé (même règle que load_and_concat_images).
+
+        Retourne (X_image, valid) où valid[i] indique si le set i a été chargé.
+        """
+        n_sets = len(paths_per_set)
+        if n_sets == 0:
+            return None, []
+        width, height = IMAGE_SIZE
+        n_images = len(paths_per_set[0])
+        X_image = self._allocate_images((n_sets, height, width * n_images, 3))
+        valid = [True] * n_sets
+
+        def decode(i, j, path):
+            tile = load_image_tile(path, IMAGE_SIZE, self.use_augmentation)
+            X_image[i, :, j * width:(j + 1) * width, :] = from_unit_range(tile, self.image_dtype)
+
+        with ThreadPoolExecutor(max_workers=DECODE_WORKERS) as pool:
+            futures = {pool.submit(decode, i, j, path): i
+                       for i, paths in enumerate(paths_per_set)
+                       for j, path in enumerate(paths)}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except DataLoadingError:
+                    valid[futures[future]] = False
+        return X_image, valid
+
+    def close(self):
+        """
+        Supprime le fichier np.memmap éventuellement créé (à appeler une fois le dataset utilisé).
+        """
+        if self.memmap_path and os.path.exists(self.memmap_path):
+            try:
+                os.remove(self.memmap_path)
+            except OSError as e:
+                # Sous Windows, le fichier reste verrouillé tant qu'un tableau le référence
+                logger.warning(f"Impossible de supprimer {self.memmap_path} : {e}")
+        self.memmap_path = None
+
+    def _update_savings(self):
+        """
+        L'ancien chemin relisait tout l'historique une fois par set.
+        """
+        saved = max(self.stats['sets'] - self.stats['history_reads'], 0)
+        self.stats['history_reads_saved'] = saved
+        self.stats['bytes_saved'] = saved * get_sechoir_data_size()
+
+    def report(self):
+        return (f"Dataset : {self.stats['valid_sets']}/{self.stats['sets']} sets exploitables, "
+                f"{self.stats['history_reads']} lecture(s) de l'historique séchoir, "
+                f"{self.stats['history_reads_saved']} lecture(s) évitée(s) "
+                f"({self.stats['bytes_saved'] / 1e6:.2f} Mo non relus).")
@@ -0,0 +1,201 @@
+# feature_store.py
+# ===========================================================================================
+# 👉 Format binaire d'export des sets d'entraînement (fichier .rfs, un seul fichier) :
+#      [magic 'RFS1'][taille de l'en-tête : uint32][en-tête JSON][blocs alignés sur 64 octets]
+#    - En-tête : nombre de sets, formes / types / positions des blocs, métadonnées des sets
+#      (nom, produit, chemins d'origine des images, horodatage de l'entrée séchoir).
+#    - Blocs : images uint8 (N, H, W, 3), features numériques float32 (N, 11), cibles float32 (N, 11).
+#    Les blocs sont ouverts en np.memmap : un rechargement ne redécode aucune image et
+#    fonctionne même si les photos d'origine ont été déplacées.
+#    Conversion aller-retour avec la liste de sets JSON historique (json_sets_to_store /
+#    FeatureStore.sets_info).
+# ===========================================================================================
+
+import os
+import json
+import struct
+import logging
+import numpy as np
+
+from dataset_builder import DatasetBuilder, set_sechoir_timestamp
+
+FEATURE_STORE_EXTENSION = ".rfs"
+FEATURE_STORE_MAGIC = b"RFS1"
+FEATURE_STORE_VERSION = 1
+_ALIGNMENT = 64
+
+logger = logging.getLogger("feature_store")
+
+
+def _align(offset):
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def is_feature_store(path):
+    """
+    Indique si path est un fichier au format feature store (d'après son magic).
+    """
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(FEATURE_STORE_MAGIC)) == FEATURE_STORE_MAGIC
+    except OSError:
+        return False
+
+
+def write_feature_store(path, X_image, X_numeric, Y, sets_meta):
+    """
+    Écrit un feature store (fichier temporaire puis renommage atomique).
+    X_image doit être en uint8 ; sets_meta contient une entrée (dict) par ligne.
+    """
+    if X_image.dtype != np.uint8:
+        raise ValueError("Les images du feature store doivent être en uint8.")
+    if not (len(X_image) == len(X_numeric) == len(Y) == len(sets_meta)):
+        raise ValueError("Nombre de lignes incohérent entre images, features, cibles et sets.")
+
+    arrays = [('images', np.ascontiguousarray(X_image)),
+              ('numeric', np.ascontiguousarray(X_numeric, dtype=np.float32)),
+              ('targets', np.ascontiguousarray(Y, dtype=np.float32))]
+    header = {'version': FEATURE_STORE_VERSION, 'count': len(Y), 'sets': sets_meta, 'blocks': {}}
+
+    # La taille de l'en-tête dépend des positions des blocs : on l'agrandit jusqu'à ce qu'il
+    # tienne dans la place réservée (complétée par des espaces, ignorés par le parseur JSON)
+    header_size = 0
+    while True:
+        offset = _align(len(FEATURE_STORE_MAGIC) + 4 + header_size)
+        for name, array in arrays:
+            header['blocks'][name] = {'offset': offset, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+            offset = _align(offset + array.nbytes)
+        header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        if len(header_bytes) <= header_size:
+            header_bytes = header_bytes.ljust(header_size, b' ')
+            break
+        header_size = len(header_bytes)
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(FEATURE_STORE_MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays:
+            f.write(b'\0' * (header['blocks'][name]['offset'] - f.tell()))
+            f.write(array.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    logger.info(f"Feature store écrit : {path} ({len(Y)} sets).")
+
+
+class FeatureStore:
+    """
+    Lecture d'un feature store .rfs (blocs ouverts en np.memmap, lecture seule).
+
+    - images / numeric / targets : tableaux complets
+    - sets                       : métadonnées des sets (une entrée par ligne)
+    - arrays(product_type)       : (X_image, X_numeric, Y) pour un produit (tous si None)
+    - sets_info()                : liste de sets au format JSON historique
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(FEATURE_STORE_MAGIC)) != FEATURE_STORE_MAGIC:
+                raise ValueError(f"{path} n'est pas un feature store.")
+            (header_size,) = struct.unpack('<I', f.read(4))
+            header = json.loads(f.read(header_size).decode('utf-8'))
+        if header.get('version') != FEATURE_STORE_VERSION:
+            raise ValueError(f"Version de feature store non supportée : {header.get('version')}")
+        self.sets = header['sets']
+        blocks = header['blocks']
+        self.images = self._open_block(blocks['images'])
+        self.numeric = self._open_block(blocks['numeric'])
+        self.targets = self._open_block(blocks['targets'])
+
+    def _open_block(self, block):
+        shape = tuple(block['shape'])
+        if 0 in shape:
+            return np.empty(shape, dtype=np.dtype(block['dtype']))
+        return np.memmap(self.path, dtype=np.dtype(block['dtype']), mode='r', offset=block['offset'], shape=shape)
+
+    def __len__(self):
+        return len(self.sets)
+
+    def arrays(self, product_type=None):
+        """
+        Renvoie (X_image, X_numeric, Y) pour le produit donné, ou (None, None, None) si aucun set.
+        Sans filtre effectif, les tableaux memmap sont renvoyés tels quels (aucune copie).
+        """
+        if product_type is None:
+            rows = np.arange(len(self.sets))
+        else:
+            rows = np.array([i for i, meta in enumerate(self.sets) if meta.get('product') == product_type], dtype=np.intp)
+        if len(rows) == 0:
+            return None, None, None
+        if len(rows) == len(self.sets):
+            return self.images, self.numeric, self.targets
+        return self.images[rows], self.numeric[rows], self.targets[rows]
+
+    def sets_info(self):
+        """
+        Liste des sets au format JSON historique :
+        [nom, produit, images conformes, images non conformes, horodatage séchoir].
+        """
+        return [[meta['name'], meta['product'], list(meta['img_conformes']),
+                 list(meta['img_non_conformes']), meta.get('sechoir_timestamp')]
+                for meta in self.sets]
+
+
+def sets_to_feature_store(sets_info, path):
+    """
+    Construit le dataset des sets (tous produits) et l'écrit au format feature store.
+    Les sets non exploitables (données séchoir ou images manquantes) ne sont pas exportés.
+    Renvoie le nombre de sets écrits.
+    """
+    builder = DatasetBuilder(use_augmentation=False, image_dtype=np.uint8)
+    X_image, X_numeric, Y = builder.build(sets_info)
+    try:
+        if Y is None:
+            raise ValueError("Aucun set exploitable à exporter.")
+        sets_meta = [{'name': s[0], 'product': s[1], 'img_conformes': list(s[2]),
+                      'img_non_conformes': list(s[3]), 'sechoir_timestamp': set_sechoir_timestamp(s)}
+                     for s in builder.valid_set_infos]
+        write_feature_store(path, X_image, X_numeric, Y, sets_meta)
+        return len(sets_meta)
+    finally:
+        del X_image
+        builder.close()
+
+
+def json_sets_to_store(json_path, store_path):
+    """
+    Convertit un fichier de sets JSON (export historique) en feature store.
+    """
+    with open(json_path, 'r', encoding='utf-8') as f:
+        sets_info = json.load(f)
+    if not isinstance(sets_info, list):
+        raise ValueError("JSON invalide (liste attendue).")
+    return sets_to_feature_store([s for s in sets_info if len(s) >= 4], store_path)
+
+
+def store_to_json_sets(store_path, json_path):
+    """
+    Convertit un feature store en fichier de sets JSON (export historique).
+    """
+    sets_info = FeatureStore(store_path).sets_info()
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(sets_info, f, ensure_ascii=False, indent=4)
+    return len(sets_info)
+
+
+if __name__ == "__main__":
+    # Conversion : python feature_store.py sets.json sets.rfs   (ou sets.rfs sets.json)
+    import sys
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    if len(sys.argv) != 3:
+        print("Usage : python feature_store.py <source.json|source.rfs> <destination.rfs|destination.json>")
+        sys.exit(1)
+    source, destination = sys.argv[1], sys.argv[2]
+    if is_feature_store(source):
+        nb = store_to_json_sets(source, destination)
+    else:
+        nb = json_sets_to_store(source, destination)
+    print(f"{nb} sets convertis vers {destination}")
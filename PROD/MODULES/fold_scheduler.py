@@ -0,0 +1,202 @@
+# fold_scheduler.py
+# ===========================================================================================
+# 👉 Validation croisée parallèle : chaque fold est entraîné dans un processus séparé.
+#    - Le dataset est partagé via un feature store (.rfs, voir feature_store.py) ouvert en
+#      np.memmap par chaque processus. Les lots d'entraînement sont lus directement dans le
+#      memmap à partir des indices du fold (pas de copie des images d'entraînement) ; seules
+#      les lignes de validation (1/k du dataset) sont copiées pour la prédiction.
+#    - Chaque processus limite le nombre de threads TensorFlow (CPU répartis entre les workers).
+#    - K-fold répété configurable (n_splits, n_repeats).
+#    - Les métriques de chaque fold sont remontées au fur et à mesure (callback on_fold).
+#    - cancel() arrête immédiatement les processus en cours.
+#    run_parallel() est réutilisé par la recherche d'hyperparamètres (hyperparam_search.py).
+#    Ce module n'importe pas TensorFlow : seuls les processus workers le chargent.
+# ===========================================================================================
+
+import os
+import queue
+import logging
+import tempfile
+import multiprocessing
+import numpy as np
+from sklearn.model_selection import KFold, RepeatedKFold
+
+logger = logging.getLogger("fold_scheduler")
+
+
+class JobCancelled(Exception):
+    """
+    Levée par run_parallel() (validation croisée, recherche d'hyperparamètres) en cas d'annulation.
+    """
+    pass
+
+
+def _init_worker(n_threads, onednn=True):
+    """
+    Initialisation d'un processus worker : limite les threads et règle oneDNN avant le
+    chargement de TensorFlow (variable lue à l'import, voir runtime_settings.py).
+    """
+    os.environ["TF_ENABLE_ONEDNN_OPTS"] = "1" if onednn else "0"
+    os.environ["OMP_NUM_THREADS"] = str(n_threads)
+    os.environ["TF_NUM_INTRAOP_THREADS"] = str(n_threads)
+    os.environ["TF_NUM_INTEROP_THREADS"] = "1"
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(n_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def _run_fold(store_path, params, fold, train_rows, val_rows):
+    """
+    Entraîne un modèle sur train_rows et l'évalue sur val_rows (exécuté dans un worker).
+    """
+    from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+    from feature_store import FeatureStore
+    from dataset_builder import to_model_input
+    from input_pipeline import make_training_dataset
+    from model_utils import build_model_from_params
+    from runtime_settings import apply_runtime_settings
+
+    # Threads répartis par _init_worker ; précision et XLA identiques à l'entraînement
+    apply_runtime_settings(params, manage_threads=False)
+    store = FeatureStore(store_path)
+    X_image, X_numeric, Y = store.images, store.numeric, store.targets
+
+    model = build_model_from_params(X_image.shape[1:], X_numeric.shape[1], Y.shape[1], params)
+    dataset = make_training_dataset(X_image, X_numeric, Y, params['batch_size'],
+                                    use_augmentation=params.get('use_augmentation', False),
+                                    seed=fold, rows=train_rows)
+    model.fit(dataset, epochs=params['n_epochs'], verbose=0)
+
+    Y_val = Y[val_rows]
+    pred = model.predict([to_model_input(X_image[val_rows]), X_numeric[val_rows]], verbose=0)
+    return {
+        'fold': fold,
+        'mse': float(mean_squared_error(Y_val, pred)),
+        'mae': float(mean_absolute_error(Y_val, pred)),
+        'r2': float(r2_score(Y_val, pred)),
+    }
+
+
+class CrossValidationJob:
+    """
+    Planifie les folds d'une validation croisée sur un pool de processus.
+
+    Utilisation (depuis un thread, run() étant bloquant) :
+        job = CrossValidationJob(store_path, rows, params, n_splits=5, n_repeats=1)
+        mse, mae, r2 = job.run(on_fold=callback)   # callback(result, nb_terminés, nb_total)
+        job.cancel()                                # depuis un autre thread
+    """
+
+    def __init__(self, store_path, rows, params, n_splits=5, n_repeats=1, max_workers=0, random_state=42):
+        self.store_path = store_path
+        self.rows = np.asarray(rows)
+        self.params = dict(params)
+        self.n_splits = n_splits
+        self.n_repeats = n_repeats
+        self.max_workers = max_workers
+        self.random_state = random_state
+        self.results = []
+        self._cancelled = False
+
+    def splits(self):
+        """
+        Liste des (lignes d'entraînement, lignes de validation) du feature store, par fold.
+        """
+        if len(self.rows) < self.n_splits:
+            raise ValueError(f"Pas assez de sets ({len(self.rows)}) pour {self.n_splits} folds.")
+        if self.n_repeats > 1:
+            kf = RepeatedKFold(n_splits=self.n_splits, n_repeats=self.n_repeats, random_state=self.random_state)
+        else:
+            kf = KFold(n_splits=self.n_splits, shuffle=True, random_state=self.random_state)
+        return [(self.rows[train_index], self.rows[val_index]) for train_index, val_index in kf.split(self.rows)]
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self, on_fold=None):
+        """
+        Exécute tous les folds et renvoie (MSE moyen, MAE moyen, R² moyen).
+        Lève JobCancelled si cancel() a été appelé, ou l'erreur d'un fold.
+        """
+        splits = self.splits()
+
+        def on_result(result, done, total):
+            self.results.append(result)
+            logger.info(f"Fold {result['fold'] + 1}/{total} : MSE={result['mse']:.4f} "
+                        f"MAE={result['mae']:.4f} R²={result['r2']:.4f}")
+            if on_fold is not None:
+                on_fold(result, done, total)
+
+        run_parallel(_run_fold,
+                     [(self.store_path, self.params, fold, train_rows, val_rows)
+                      for fold, (train_rows, val_rows) in enumerate(splits)],
+                     max_workers=self.max_workers, on_result=on_result,
+                     is_cancelled=lambda: self._cancelled, onednn=self.params.get('onednn', True))
+
+        return (float(np.mean([r['mse'] for r in self.results])),
+                float(np.mean([r['mae'] for r in self.results])),
+                float(np.mean([r['r2'] for r in self.results])))
+
+
+def _pool_size(n_tasks, max_workers=0):
+    """
+    Nombre de processus et de threads TensorFlow par processus pour n_tasks tâches.
+    """
+    cpu_count = os.cpu_count() or 1
+    workers = max_workers if max_workers and max_workers > 0 else cpu_count
+    workers = max(1, min(workers, n_tasks, cpu_count))
+    return workers, max(1, cpu_count // workers)
+
+
+def run_parallel(func, args_list, max_workers=0, on_result=None, is_cancelled=None, onednn=True):
+    """
+    Exécute func(*args) pour chaque args de args_list dans un pool de processus (spawn).
+    onednn : réglage oneDNN des workers (appliqué avant leur import de TensorFlow).
+    on_result(résultat, nb_terminés, nb_total) est appelé dans le thread appelant à chaque tâche
+    terminée. Lève JobCancelled si is_cancelled() devient vrai, ou l'erreur d'une tâche.
+    Renvoie les résultats dans l'ordre de fin d'exécution.
+    """
+    total = len(args_list)
+    if total == 0:
+        return []
+    workers, threads = _pool_size(total, max_workers)
+    logger.info(f"{total} tâche(s) sur {workers} processus ({threads} threads chacun).")
+
+    events = queue.Queue()
+    results = []
+    # spawn : TensorFlow ne supporte pas d'être hérité par fork
+    pool = multiprocessing.get_context("spawn").Pool(processes=workers, initializer=_init_worker,
+                                                     initargs=(threads, onednn))
+    try:
+        for args in args_list:
+            pool.apply_async(func, args,
+                             callback=lambda result: events.put(('result', result)),
+                             error_callback=lambda error: events.put(('error', error)))
+        while len(results) < total:
+            if is_cancelled is not None and is_cancelled():
+                raise JobCancelled("Calcul annulé.")
+            try:
+                kind, payload = events.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            if kind == 'error':
+                raise payload
+            results.append(payload)
+            if on_result is not None:
+                on_result(payload, len(results), total)
+    finally:
+        # terminate() arrête aussi les tâches encore en cours (annulation ou erreur)
+        pool.terminate()
+        pool.join()
+    return results
+
+
+def temporary_store_path():
+    """
+    Chemin d'un fichier temporaire pour le feature store partagé avec les workers.
+    """
+    from dataset_builder import DATASET_MEMMAP_DIR
+    os.makedirs(DATASET_MEMMAP_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="cv_", suffix=".rfs", dir=DATASET_MEMMAP_DIR)
+    os.close(fd)
+    return path
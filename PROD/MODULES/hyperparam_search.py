@@ -0,0 +1,258 @@
+# hyperparam_search.py
+# ===========================================================================================
+# 👉 Recherche d'hyperparamètres sur les clés de MODEL_PARAMS :
+#    - Tirage aléatoire de configurations dans SEARCH_SPACE (hidden_layers, cnn_filters,
+#      learning_rate, dropout_rate, l2_reg, batch_size, ...), à partir des MODEL_PARAMS courants.
+#    - Successive halving (principe de Hyperband) : toutes les configurations sont entraînées
+#      avec un petit nombre d'époques, seul le meilleur 1/eta passe au palier suivant
+#      (eta fois plus d'époques), jusqu'à n_epochs.
+#    - Les essais d'un palier sont exécutés en parallèle dans un pool de processus
+#      (fold_scheduler.run_parallel) sur le même feature store : le dataset est construit une fois.
+#    - Les résultats sont enregistrés dans une étude SQLite (DATA/studies/<nom>.db) au fil de l'eau :
+#      une recherche interrompue reprend là où elle s'était arrêtée, si ses réglages, les
+#      paramètres non recherchés et le dataset (empreinte) sont inchangés.
+# ===========================================================================================
+
+import os
+import json
+import math
+import sqlite3
+import logging
+from datetime import datetime
+import numpy as np
+
+from fold_scheduler import run_parallel, _run_fold
+from model_registry import dataset_fingerprint
+
+STUDIES_DIR = os.path.join("DATA", "studies")
+
+# Espace de recherche : ('choice', valeurs) | ('loguniform', min, max) | ('uniform', min, max)
+SEARCH_SPACE = {
+    "hidden_layers": ("choice", ["32", "64", "64,64", "128,64", "128,128", "256,128,64"]),
+    "cnn_filters": ("choice", ["16,32", "32,64", "32,64,128"]),
+    "learning_rate": ("loguniform", 1e-4, 1e-2),
+    "dropout_rate": ("uniform", 0.0, 0.5),
+    "l2_reg": ("choice", [0.0, 1e-5, 1e-4, 1e-3]),
+    "batch_size": ("choice", [8, 16, 32, 64]),
+    "activation": ("choice", ["relu", "tanh"]),
+    "optimizer": ("choice", ["adam", "rmsprop"]),
+}
+
+STUDY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS trials (
+    trial INTEGER PRIMARY KEY,
+    params TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    trial INTEGER NOT NULL,
+    rung INTEGER NOT NULL,
+    epochs INTEGER NOT NULL,
+    mse REAL,
+    mae REAL,
+    r2 REAL,
+    finished TEXT,
+    PRIMARY KEY (trial, rung)
+);
+"""
+
+logger = logging.getLogger("hyperparam_search")
+
+
+def sample_params(base_params, rng, space=SEARCH_SPACE):
+    """
+    Tire une configuration : copie de base_params dont les clés de space sont tirées au hasard.
+    """
+    params = dict(base_params)
+    for key, spec in space.items():
+        kind = spec[0]
+        if kind == "choice":
+            value = spec[1][rng.integers(len(spec[1]))]
+        elif kind == "loguniform":
+            value = float(math.exp(rng.uniform(math.log(spec[1]), math.log(spec[2]))))
+        elif kind == "uniform":
+            value = float(rng.uniform(spec[1], spec[2]))
+        else:
+            raise ValueError(f"Type d'espace de recherche inconnu : {kind}")
+        # Types natifs (JSON) plutôt que types numpy
+        params[key] = value.item() if isinstance(value, np.generic) else value
+    if "dropout_rate" in space:
+        params["use_dropout"] = params["dropout_rate"] > 0.0
+    return params
+
+
+def rung_epochs(max_epochs, eta, min_epochs=1):
+    """
+    Nombre d'époques de chaque palier : ..., max_epochs / eta², max_epochs / eta, max_epochs.
+    """
+    epochs = [max_epochs]
+    while epochs[0] // eta >= min_epochs and epochs[0] // eta < epochs[0]:
+        epochs.insert(0, epochs[0] // eta)
+    return epochs
+
+
+class SearchStudy:
+    """
+    Étude SQLite : configurations tirées (trials) et résultats par palier (results).
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(STUDY_SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def get_meta(self, key):
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_meta(self, key, value):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def reset(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM meta")
+            conn.execute("DELETE FROM trials")
+            conn.execute("DELETE FROM results")
+
+    def trials(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT trial, params FROM trials ORDER BY trial").fetchall()
+        return {trial: json.loads(params) for trial, params in rows}
+
+    def add_trial(self, trial, params):
+        with self._connect() as conn:
+            conn.execute("INSERT INTO trials (trial, params) VALUES (?, ?)", (trial, json.dumps(params)))
+
+    def results(self, rung):
+        """
+        Résultats d'un palier : {trial: {'mse', 'mae', 'r2'}}.
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT trial, mse, mae, r2 FROM results WHERE rung = ?", (rung,)).fetchall()
+        return {trial: {'mse': mse, 'mae': mae, 'r2': r2} for trial, mse, mae, r2 in rows}
+
+    def add_result(self, trial, rung, epochs, result):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO results (trial, rung, epochs, mse, mae, r2, finished) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (trial, rung, epochs, result['mse'], result['mae'], result['r2'],
+                          datetime.now().isoformat(timespec='seconds')))
+
+
+class HyperparameterSearch:
+    """
+    Recherche aléatoire + successive halving, reprise possible via l'étude SQLite.
+
+    Utilisation (depuis un thread, run() étant bloquant) :
+        search = HyperparameterSearch(store_path, rows, MODEL_PARAMS, study_name="Ail")
+        best_params, best_result = search.run(on_trial=callback)  # callback(info, nb_terminés, nb_total)
+        search.cancel()                                           # depuis un autre thread
+    """
+
+    def __init__(self, store_path, rows, base_params, study_name, n_trials=27, eta=3,
+                 validation_split=0.2, max_workers=0, seed=42, space=SEARCH_SPACE):
+        self.store_path = store_path
+        self.rows = np.asarray(rows)
+        self.base_params = dict(base_params)
+        self.n_trials = n_trials
+        self.eta = eta
+        self.validation_split = validation_split
+        self.max_workers = max_workers
+        self.seed = seed
+        self.space = space
+        self.study = SearchStudy(os.path.join(STUDIES_DIR, f"{study_name}.db"))
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def _dataset_fingerprint(self):
+        from feature_store import FeatureStore
+        store = FeatureStore(self.store_path)
+        # Images représentées par leur forme et leur type seulement : vue sans copie
+        images = np.broadcast_to(store.images[:1], (len(self.rows),) + store.images.shape[1:])
+        return dataset_fingerprint(images, store.numeric[self.rows], store.targets[self.rows])
+
+    def _settings(self):
+        fixed_params = {k: v for k, v in self.base_params.items() if k not in self.space}
+        return {'n_trials': self.n_trials, 'eta': self.eta, 'seed': self.seed,
+                'validation_split': self.validation_split, 'n_rows': len(self.rows),
+                'max_epochs': self.base_params['n_epochs'], 'space': self.space,
+                'params': fixed_params, 'dataset': self._dataset_fingerprint()}
+
+    def _prepare_study(self):
+        """
+        Reprend l'étude si ses réglages sont identiques, sinon la réinitialise.
+        Les configurations sont tirées une fois puis relues de l'étude.
+        """
+        settings = json.loads(json.dumps(self._settings()))
+        if self.study.get_meta('settings') != settings:
+            if self.study.trials():
+                logger.info("Réglages de la recherche modifiés : nouvelle étude.")
+            self.study.reset()
+            self.study.set_meta('settings', settings)
+        trials = self.study.trials()
+        rng = np.random.default_rng(self.seed)
+        for trial in range(self.n_trials):
+            params = sample_params(self.base_params, rng, self.space)
+            if trial not in trials:
+                self.study.add_trial(trial, params)
+                trials[trial] = params
+        return trials
+
+    def _split(self):
+        if len(self.rows) < 2:
+            raise ValueError("Pas assez de sets pour une recherche d'hyperparamètres.")
+        rng = np.random.default_rng(self.seed)
+        order = rng.permutation(self.rows)
+        n_val = max(1, int(round(len(order) * self.validation_split)))
+        return np.sort(order[n_val:]), np.sort(order[:n_val])
+
+    def run(self, on_trial=None):
+        """
+        Exécute (ou reprend) la recherche et renvoie (meilleurs paramètres, résultat associé).
+        Lève fold_scheduler.JobCancelled si cancel() a été appelé.
+        """
+        trials = self._prepare_study()
+        train_rows, val_rows = self._split()
+        budgets = rung_epochs(self.base_params['n_epochs'], self.eta)
+        survivors = sorted(trials)
+        total = sum(max(1, self.n_trials // self.eta ** rung) for rung in range(len(budgets)))
+        done = sum(len(self.study.results(rung)) for rung in range(len(budgets)))
+
+        for rung, epochs in enumerate(budgets):
+            results = self.study.results(rung)
+            pending = [t for t in survivors if t not in results]
+            if pending:
+                logger.info(f"Palier {rung + 1}/{len(budgets)} : {len(pending)} essai(s) à {epochs} époque(s).")
+
+            def on_result(result, _done, _total, rung=rung, epochs=epochs):
+                nonlocal done
+                trial = result['fold']
+                self.study.add_result(trial, rung, epochs, result)
+                results[trial] = result
+                done += 1
+                if on_trial is not None:
+                    on_trial({'trial': trial, 'rung': rung, 'epochs': epochs, **result}, done, total)
+
+            run_parallel(_run_fold,
+                         [(self.store_path, dict(trials[t], n_epochs=epochs), t, train_rows, val_rows)
+                          for t in pending],
+                         max_workers=self.max_workers, on_result=on_result,
+                         is_cancelled=lambda: self._cancelled, onednn=self.base_params.get('onednn', True))
+
+            ranked = sorted(survivors, key=lambda t: results[t]['mse'])
+            if rung == len(budgets) - 1:
+                best = ranked[0]
+                logger.info(f"Meilleur essai : {best} (MSE={results[best]['mse']:.4f}).")
+                return dict(trials[best]), results[best]
+            survivors = ranked[:max(1, len(survivors) // self.eta)]
@@ -0,0 +1,99 @@
+# input_pipeline.py
+# ===========================================================================================
+# 👉 Pipeline d'entrée tf.data pour l'entraînement (ModelController.train_model) :
+#    - Les images du dataset restent stockées en uint8 (miniatures décodées du cache), en
+#      mémoire ou dans un np.memmap : seuls les lots en cours sont convertis en float32.
+#    - L'ordre des sets est remélangé à chaque époque, les lots sont lus par un générateur
+#      puis normalisés / augmentés en parallèle (map) et préchargés (prefetch).
+#    - La data augmentation est aléatoire à chaque lot et à chaque époque (rotation, zoom,
+#      retournement horizontal, comme l'ancien ImageDataGenerator), appliquée sur chacune
+#      des miniatures 32x32 du set séparément.
+#    TensorFlow est importé à l'appel (split_validation_rows n'en a pas besoin).
+# ===========================================================================================
+
+import numpy as np
+
+from data_utils import IMAGE_SIZE
+
+
+def build_augmenter(seed=None):
+    """
+    Couches d'augmentation aléatoire (équivalent de l'ImageDataGenerator de data_utils).
+    """
+    from tensorflow import keras
+    return keras.Sequential([
+        keras.layers.RandomFlip("horizontal", seed=seed),
+        keras.layers.RandomRotation(20 / 360, fill_mode='nearest', seed=seed),
+        keras.layers.RandomZoom(0.2, fill_mode='nearest', seed=seed),
+    ], name="augmentation")
+
+
+def _augment_tiles(images, augmenter):
+    """
+    Applique l'augmentation à chaque miniature d'un lot (B, H, W * nb images, 3).
+    """
+    import tensorflow as tf
+    width = IMAGE_SIZE[0]
+    shape = tf.shape(images)
+    batch, height, n_tiles = shape[0], shape[1], shape[2] // width
+    # (B, H, nb, W, 3) -> (B * nb, H, W, 3)
+    tiles = tf.reshape(images, (batch, height, n_tiles, width, 3))
+    tiles = tf.transpose(tiles, (0, 2, 1, 3, 4))
+    tiles = tf.reshape(tiles, (batch * n_tiles, height, width, 3))
+    tiles = augmenter(tiles, training=True)
+    tiles = tf.reshape(tiles, (batch, n_tiles, height, width, 3))
+    tiles = tf.transpose(tiles, (0, 2, 1, 3, 4))
+    return tf.reshape(tiles, shape)
+
+
+def split_validation_rows(n_samples, validation_split, seed=0):
+    """
+    Indices (entraînement, validation) tirés au hasard. Validation vide si validation_split
+    est nul ou si le dataset est trop petit pour garder au moins un échantillon de chaque côté.
+    """
+    order = np.random.default_rng(seed).permutation(n_samples)
+    n_val = int(round(n_samples * validation_split))
+    if n_val < 1 or n_samples - n_val < 1:
+        return np.sort(order), np.array([], dtype=np.int64)
+    return np.sort(order[n_val:]), np.sort(order[:n_val])
+
+
+def make_training_dataset(X_image, X_numeric, Y, batch_size, use_augmentation=False, shuffle=True, seed=None,
+                          rows=None):
+    """
+    Crée le tf.data.Dataset d'entraînement : ((images float32, features), cibles) par lots.
+
+    - X_image : tableau (N, H, W, 3) float32, float16 ou uint8 (np.memmap accepté)
+    - rows : indices des échantillons utilisés (ex : split entraînement / validation), sans copie
+    - Le générateur est relancé par Keras à chaque époque : nouvel ordre, nouvelles augmentations.
+    """
+    import tensorflow as tf
+    rows = np.arange(len(Y)) if rows is None else np.asarray(rows)
+    n = len(rows)
+    scale = 1.0 / 255.0 if X_image.dtype == np.uint8 else 1.0
+    rng = np.random.default_rng(seed)
+
+    def batches():
+        order = rng.permutation(n) if shuffle else np.arange(n)
+        for start in range(0, n, batch_size):
+            # Indices triés : lecture séquentielle plus efficace sur un np.memmap
+            idx = np.sort(rows[order[start:start + batch_size]])
+            yield X_image[idx], X_numeric[idx], Y[idx]
+
+    dataset = tf.data.Dataset.from_generator(
+        batches,
+        output_signature=(
+            tf.TensorSpec(shape=(None,) + X_image.shape[1:], dtype=tf.as_dtype(X_image.dtype)),
+            tf.TensorSpec(shape=(None,) + X_numeric.shape[1:], dtype=tf.as_dtype(X_numeric.dtype)),
+            tf.TensorSpec(shape=(None,) + Y.shape[1:], dtype=tf.as_dtype(Y.dtype)),
+        ))
+
+    augmenter = build_augmenter(seed) if use_augmentation else None
+
+    def prepare(images, numeric, targets):
+        images = tf.cast(images, tf.float32) * scale
+        if augmenter is not None:
+            images = _augment_tiles(images, augmenter)
+        return (images, tf.cast(numeric, tf.float32)), tf.cast(targets, tf.float32)
+
+    return dataset.map(prepare, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
@@ -0,0 +1,132 @@
+# lazy_imports.py
+# ===========================================================================================
+# 👉 Imports différés des bibliothèques lourdes (TensorFlow, matplotlib, reportlab, openai) :
+#    - Les modules de l'application ne les importent plus au chargement, seulement à la
+#      première utilisation réelle (construction d'un modèle, graphe, export PDF, chatbot).
+#    - import_module(name) : import chronométré (premier import seulement), temps conservés
+#      dans IMPORT_TIMES.
+#    - prewarm() : préchargement dans un thread daemon une fois la fenêtre principale affichée,
+#      pour que le premier clic ne paie pas le temps d'import. TensorFlow n'est pas préchargé :
+#      la prédiction passe par le runtime NumPy quand le modèle a un export .npz, et TensorFlow
+#      n'est alors jamais chargé dans le processus de l'interface.
+#    - format_import_report() : rapport des temps d'import mesurés.
+#
+#    python lazy_imports.py : temps d'import "à froid" (un processus neuf par module) des
+#    bibliothèques lourdes et des modules de l'application, avec les bibliothèques lourdes
+#    que chacun charge au démarrage.
+# ===========================================================================================
+
+import os
+import sys
+import time
+import logging
+import importlib
+import threading
+import subprocess
+
+# Dans l'ordre du préchargement : les plus légères d'abord, TensorFlow en dernier
+HEAVY_MODULES = ("openai", "reportlab.pdfgen.canvas", "matplotlib.backends.backend_tkagg", "tensorflow")
+# Préchargées après le démarrage (TensorFlow exclu, importé seulement à la première utilisation)
+PREWARM_MODULES = tuple(name for name in HEAVY_MODULES if name != "tensorflow")
+# Modules chargés par les boutons de l'application (mesure de démarrage)
+APP_MODULES = ("ia", "use_ia", "train_ia", "jeu", "Qualité")
+# Délai entre l'affichage de la fenêtre principale et le préchargement (ms)
+PREWARM_DELAY_MS = 1500
+
+IMPORT_TIMES = {}  # nom -> {'ms': durée, 'thread': nom du thread, 'error': message éventuel}
+_IMPORT_LOCK = threading.Lock()
+
+logger = logging.getLogger("lazy_imports")
+
+
+def import_module(name):
+    """
+    Importe name (s'il ne l'est pas déjà) en chronométrant le premier import.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    elapsed = (time.perf_counter() - start) * 1000.0
+    with _IMPORT_LOCK:
+        if name not in IMPORT_TIMES:
+            IMPORT_TIMES[name] = {'ms': elapsed, 'thread': threading.current_thread().name}
+    logger.info(f"Import {name} : {elapsed:.0f} ms")
+    return module
+
+
+def prewarm(names=PREWARM_MODULES, on_done=None):
+    """
+    Précharge names dans un thread daemon. on_done(IMPORT_TIMES) est appelé depuis ce thread
+    (pas de widget Tk dans le callback). Les bibliothèques absentes sont simplement signalées.
+    """
+    def run():
+        for name in names:
+            try:
+                import_module(name)
+            except Exception as e:
+                with _IMPORT_LOCK:
+                    IMPORT_TIMES.setdefault(name, {'ms': 0.0, 'thread': threading.current_thread().name,
+                                                   'error': str(e)})
+                logger.info(f"Préchargement de {name} impossible : {e}")
+        if on_done is not None:
+            on_done(dict(IMPORT_TIMES))
+
+    thread = threading.Thread(target=run, name="prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+def format_import_report(times=None):
+    times = IMPORT_TIMES if times is None else times
+    lines = [f"{'Module':<36}{'ms':>8}  Thread"]
+    for name, t in sorted(times.items(), key=lambda item: -item[1]['ms']):
+        line = f"{name:<36}{t['ms']:>8.0f}  {t['thread']}"
+        if t.get('error'):
+            line += f"  (échec : {t['error']})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+# ===========================================================================================
+# 👉 Mesure à froid (ligne de commande)
+# ===========================================================================================
+
+_PROBE = """
+import sys, time, json
+sys.path[:0] = {paths!r}
+start = time.perf_counter()
+import {name}
+elapsed = (time.perf_counter() - start) * 1000.0
+heavy = [m.split('.')[0] for m in {heavy!r} if m.split('.')[0] in sys.modules]
+print(json.dumps({{'ms': elapsed, 'heavy': heavy}}))
+"""
+
+
+def measure_cold_import(name, paths=()):
+    """
+    Temps d'import de name dans un interpréteur neuf. Renvoie {'ms', 'heavy'} ou {'error'}.
+    """
+    import json
+    code = _PROBE.format(paths=list(paths), name=name, heavy=list(HEAVY_MODULES))
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        return {'error': result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "échec"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    modules_dir = os.path.dirname(os.path.abspath(__file__))
+    paths = [modules_dir, os.path.dirname(modules_dir)]
+    print(f"{'Module':<36}{'ms':>8}  Bibliothèques lourdes chargées")
+    for name in HEAVY_MODULES + APP_MODULES:
+        r = measure_cold_import(name, paths)
+        if 'error' in r:
+            print(f"{name:<36}{'-':>8}  {r['error']}")
+        else:
+            print(f"{name:<36}{r['ms']:>8.0f}  {', '.join(r['heavy']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# model_cache.py
+# ===========================================================================================
+# 👉 Cache des modèles chargés pour l'utilisation de l'IA (use_ia) :
+#    - LRU des modèles en mémoire, clé = chemin + date de modification + taille du fichier :
+#      repasser d'un modèle produit à l'autre (Ail / Oignon / Échalote) ne relit pas le .h5,
+#      et un modèle réentraîné (fichier modifié) est bien rechargé.
+#    - Chaque modèle est accompagné d'une fonction de prédiction tf.function à signature fixe
+#      (lot variable, images (32, 192, 3) + 11 features), tracée dès le chargement (préchauffage) :
+#      la première prédiction ne paie plus le coût de traçage du graphe.
+#    - La latence de chaque prédiction est mesurée (last_latency_ms).
+#    - Les exports NumPy (.npz, voir numpy_runtime.py) sont chargés sans TensorFlow ;
+#      TensorFlow n'est importé qu'au premier chargement d'un .h5.
+# ===========================================================================================
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from numpy_runtime import NumpyModel, NUMPY_MODEL_EXTENSION
+
+MODEL_CACHE_CAPACITY = 3
+
+logger = logging.getLogger("model_cache")
+
+
+class CachedModel:
+    """
+    Modèle Keras chargé + fonction de prédiction compilée (tf.function).
+    """
+
+    def __init__(self, path, model):
+        import tensorflow as tf
+        self._tf = tf
+        self.path = path
+        self.model = model
+        self.input_specs = [tf.TensorSpec(shape=(None,) + tuple(t.shape[1:]), dtype=tf.float32)
+                            for t in model.inputs]
+        self._predict = tf.function(lambda *inputs: model(list(inputs) if len(inputs) > 1 else inputs[0],
+                                                          training=False),
+                                    input_signature=self.input_specs)
+        self.input_shapes = [tuple(spec.shape[1:]) for spec in self.input_specs]
+        self.last_latency_ms = None
+        self.warm_up_ms = self._warm_up()
+
+    def _warm_up(self):
+        """
+        Trace le graphe de prédiction sur un lot factice.
+        """
+        start = time.perf_counter()
+        self._predict(*[self._tf.zeros((1,) + shape, dtype=self._tf.float32) for shape in self.input_shapes])
+        return (time.perf_counter() - start) * 1000.0
+
+    def _inputs(self, X_image, X_numeric):
+        # Un modèle Dense n'a qu'une entrée (features numériques)
+        if len(self.input_specs) == 1:
+            return (X_numeric,)
+        return X_image, X_numeric
+
+    def predict(self, X_image, X_numeric):
+        """
+        Prédiction (np.ndarray) ; la durée est enregistrée dans last_latency_ms.
+        """
+        start = time.perf_counter()
+        inputs = [self._tf.convert_to_tensor(np.asarray(x, dtype=np.float32)) for x in self._inputs(X_image, X_numeric)]
+        pred = self._predict(*inputs).numpy()
+        self.last_latency_ms = (time.perf_counter() - start) * 1000.0
+        return pred
+
+
+def _load_model(path):
+    """
+    Charge un modèle : NumpyModel pour un export .npz, CachedModel (Keras) sinon.
+    """
+    if path.endswith(NUMPY_MODEL_EXTENSION):
+        return NumpyModel.load(path)
+    from tensorflow import keras
+    # compile=False : l'optimiseur n'est pas nécessaire pour prédire
+    return CachedModel(path, keras.models.load_model(path, compile=False))
+
+
+class ModelCache:
+    """
+    LRU de modèles chargés (CachedModel ou NumpyModel), clé = (chemin absolu, mtime, taille).
+    """
+
+    def __init__(self, capacity=MODEL_CACHE_CAPACITY):
+        self.capacity = capacity
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(path):
+        st = os.stat(path)
+        return os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+    def get(self, path):
+        """
+        Renvoie le modèle du fichier path (chargé et préchauffé si absent du cache),
+        ou None si le fichier est introuvable / illisible.
+        """
+        if not os.path.exists(path):
+            return None
+        key = self._key(path)
+        with self._lock:
+            cached = self._models.get(key)
+            if cached is not None:
+                self._models.move_to_end(key)
+                return cached
+        try:
+            start = time.perf_counter()
+            cached = _load_model(path)
+            logger.info(f"Modèle chargé en {(time.perf_counter() - start) * 1000.0:.0f} ms "
+                        f"(préchauffage {cached.warm_up_ms:.0f} ms) : {path}")
+        except Exception as e:
+            logger.error(f"Erreur chargement modèle {path}: {e}")
+            return None
+        with self._lock:
+            # Une ancienne version du même fichier n'est plus utile
+            for old_key in [k for k in self._models if k[0] == key[0]]:
+                del self._models[old_key]
+            self._models[key] = cached
+            while len(self._models) > self.capacity:
+                self._models.popitem(last=False)
+        return cached
+
+    def preload(self, paths):
+        """
+        Charge et préchauffe des modèles en arrière-plan (thread), ex : les derniers modèles de chaque produit.
+        """
+        def run():
+            for path in paths:
+                self.get(path)
+        t = threading.Thread(target=run, daemon=True)
+        t.start()
+        return t
+
+
+MODEL_CACHE = ModelCache()
@@ -0,0 +1,174 @@
+# model_quantization.py
+# ===========================================================================================
+# 👉 Quantification après entraînement des modèles exportés (voir numpy_runtime.py) :
+#    - float16 : tous les poids stockés en float16 (fichier ~2x plus petit).
+#    - int8 : noyaux Conv2D / Dense en int8 symétrique par canal de sortie (échelle float32),
+#      entrées de ces couches quantifiées en int8 avec une échelle calibrée sur un échantillon
+#      des sets d'entraînement (max. absolu observé par couche). Biais et BatchNormalization
+#      restent en float32.
+#    - compare_variants() : taille, latence et erreur (MSE / MAE) de chaque variante sur un
+#      jeu de validation, avec les écarts par rapport au modèle float32.
+#    Variantes enregistrées à côté du modèle : model_<nom>.float16.npz, model_<nom>.int8.npz.
+# ===========================================================================================
+
+import os
+import json
+import time
+import logging
+import numpy as np
+
+from numpy_runtime import NumpyModel, NUMPY_MODEL_EXTENSION, numpy_model_path
+
+QUANTIZATION_MODES = ("float16", "int8")
+CALIBRATION_SIZE = 128
+
+logger = logging.getLogger("model_quantization")
+
+
+def variant_path(model_path, mode):
+    """
+    Chemin de la variante mode ('float32', 'float16' ou 'int8') du modèle model_path (.h5 ou .npz).
+    """
+    path = numpy_model_path(model_path)
+    if mode == "float32":
+        return path
+    return os.path.splitext(path)[0] + f".{mode}" + NUMPY_MODEL_EXTENSION
+
+
+def calibration_sample(X_image, X_numeric, size=CALIBRATION_SIZE, seed=0):
+    """
+    Échantillon de calibration (indices triés, tirés sans remise) des tableaux d'entraînement.
+    """
+    n = len(X_numeric)
+    rows = np.sort(np.random.default_rng(seed).choice(n, size=min(size, n), replace=False))
+    return X_image[rows], X_numeric[rows]
+
+
+def _calibrate(model, inputs):
+    """
+    Max. absolu des entrées de chaque couche Conv2D / Dense sur les données de calibration.
+    """
+    ranges = {}
+
+    def observe(layer, args):
+        if layer['class_name'] in ("Conv2D", "Dense"):
+            peak = float(np.max(np.abs(args[0]))) if args[0].size else 0.0
+            ranges[layer['name']] = max(ranges.get(layer['name'], 0.0), peak)
+
+    model.predict_inputs(inputs, observe=observe)
+    return ranges
+
+
+def _quantize_kernel(kernel):
+    # Symétrique par canal de sortie (dernier axe)
+    peak = np.max(np.abs(kernel.reshape(-1, kernel.shape[-1])), axis=0)
+    scale = np.where(peak > 0, peak / 127.0, 1.0).astype(np.float32)
+    return np.clip(np.round(kernel / scale), -127, 127).astype(np.int8), scale
+
+
+def quantize_model(model_path, mode, calibration_inputs=None):
+    """
+    Crée la variante quantifiée mode ('float16' ou 'int8') de l'export NumPy de model_path.
+    calibration_inputs : liste des entrées du modèle (images float32 dans [0, 1], features),
+    obligatoire pour int8. Renvoie le chemin de la variante.
+    """
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Mode de quantification inconnu : {mode}")
+    source = numpy_model_path(model_path)
+    if not os.path.exists(source):
+        raise ValueError(f"Export NumPy introuvable : {source}")
+    model = NumpyModel.load(source)
+
+    if mode == "int8":
+        if calibration_inputs is None:
+            raise ValueError("Un échantillon de calibration est nécessaire pour la quantification int8.")
+        if len(model.input_names) == 1:
+            calibration_inputs = calibration_inputs[-1:]
+        ranges = _calibrate(model, calibration_inputs)
+
+    graph = model.graph
+    graph['quantization'] = mode
+    arrays = {}
+    for index, layer in enumerate(model.layers):
+        for j, weight in enumerate(layer['weights']):
+            if mode == "float16":
+                arrays[f"w{index}_{j}"] = weight.astype(np.float16)
+            elif j == 0 and layer['class_name'] in ("Conv2D", "Dense"):
+                arrays[f"w{index}_{j}"], arrays[f"s{index}_{j}"] = _quantize_kernel(weight)
+            else:
+                arrays[f"w{index}_{j}"] = weight
+        if mode == "int8" and ranges.get(layer['name'], 0.0) > 0:
+            graph['layers'][index]['settings']['input_scale'] = ranges[layer['name']] / 127.0
+
+    path = variant_path(model_path, mode)
+    arrays['graph'] = np.frombuffer(json.dumps(graph).encode('utf-8'), dtype=np.uint8)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+    logger.info(f"Variante {mode} enregistrée : {path}")
+    return path
+
+
+def quantize_all(model_path, calibration_inputs):
+    """
+    Crée les variantes float16 et int8 ; renvoie {mode: chemin} des variantes créées.
+    """
+    paths = {}
+    for mode in QUANTIZATION_MODES:
+        try:
+            paths[mode] = quantize_model(model_path, mode, calibration_inputs)
+        except Exception as e:
+            logger.warning(f"Quantification {mode} impossible pour {model_path} : {e}")
+    return paths
+
+
+def available_variants(model_path):
+    """
+    Variantes existantes du modèle : {mode: chemin}, float32 (export NumPy) compris.
+    """
+    return {mode: variant_path(model_path, mode) for mode in ("float32",) + QUANTIZATION_MODES
+            if os.path.exists(variant_path(model_path, mode))}
+
+
+def compare_variants(model_path, X_image, X_numeric, Y, repeats=3):
+    """
+    Mesure chaque variante sur un jeu de validation : taille du fichier, latence par échantillon
+    (meilleure de repeats passes), MSE et MAE. Renvoie {mode: métriques}, avec pour les variantes
+    quantifiées les écarts relatifs au float32 (size_ratio, latency_ratio, mse_delta, mae_delta).
+    """
+    report = {}
+    for mode, path in available_variants(model_path).items():
+        model = NumpyModel.load(path)
+        inputs = [X_numeric] if len(model.input_names) == 1 else [X_image, X_numeric]
+        latencies = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            pred = model.predict_inputs(inputs)
+            latencies.append(time.perf_counter() - start)
+        error = pred - Y
+        report[mode] = {'size': os.path.getsize(path),
+                        'latency_ms': min(latencies) * 1000.0 / max(len(Y), 1),
+                        'mse': float(np.mean(error ** 2)),
+                        'mae': float(np.mean(np.abs(error)))}
+
+    reference = report.get("float32")
+    if reference is not None:
+        for mode in QUANTIZATION_MODES:
+            if mode in report:
+                r = report[mode]
+                r['size_ratio'] = r['size'] / reference['size']
+                r['latency_ratio'] = r['latency_ms'] / max(reference['latency_ms'], 1e-9)
+                r['mse_delta'] = r['mse'] - reference['mse']
+                r['mae_delta'] = r['mae'] - reference['mae']
+    return report
+
+
+def format_report(report):
+    lines = [f"{'Variante':<9}{'Taille':>10}{'ms/éch.':>9}{'MSE':>9}{'MAE':>8}"]
+    for mode, r in report.items():
+        lines.append(f"{mode:<9}{r['size'] / 1024:>8.0f}Ko{r['latency_ms']:>9.2f}{r['mse']:>9.2f}{r['mae']:>8.2f}")
+        if 'size_ratio' in r:
+            lines.append(f"{'':<9}{'x' + format(r['size_ratio'], '.2f'):>10}{'x' + format(r['latency_ratio'], '.2f'):>9}"
+                         f"{r['mse_delta']:>+9.2f}{r['mae_delta']:>+8.2f}")
+    return "\n".join(lines)
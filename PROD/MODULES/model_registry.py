@@ -0,0 +1,182 @@
+# model_registry.py
+# ===========================================================================================
+# 👉 Registre des modèles entraînés (index SQLite models_registry.db, à côté de MODELS_DIR) :
+#    - Une ligne par modèle : type de produit, chemin, date, paramètres (JSON), empreinte du
+#      dataset, nombre d'échantillons, durée d'entraînement, taille du fichier, métriques de
+#      validation croisée et de validation.
+#    - "Dernier modèle d'un produit" : requête indexée (type_produit, date), sans parcourir
+#      MODELS_DIR ni appeler os.path.getmtime sur chaque fichier.
+#    - Réglages d'exécution de l'entraînement (threads, oneDNN, précision, XLA) et débit mesuré
+#      (échantillons/s), pour comparer les configurations CPU (voir runtime_settings.py).
+#    - Les modèles .h5 présents avant le registre sont importés par sync() (date = mtime).
+# ===========================================================================================
+
+import os
+import json
+import hashlib
+import sqlite3
+import logging
+from datetime import datetime
+from contextlib import closing
+
+REGISTRY_FILENAME = "models_registry.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    model_type TEXT NOT NULL,
+    path TEXT NOT NULL,
+    created TEXT NOT NULL,
+    params TEXT,
+    dataset_fingerprint TEXT,
+    n_samples INTEGER,
+    training_time REAL,
+    file_size INTEGER,
+    cv_mse REAL,
+    cv_mae REAL,
+    cv_r2 REAL,
+    val_mse REAL,
+    val_mae REAL,
+    val_r2 REAL,
+    runtime TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_models_type ON models(model_type, created);
+"""
+
+METRIC_KINDS = ('cv', 'val')
+
+# Colonnes ajoutées après la création du schéma : (nom, type), ajoutées aux registres existants
+ADDED_COLUMNS = (("runtime", "TEXT"),)
+
+logger = logging.getLogger("model_registry")
+
+
+def registry_path(models_dir):
+    """
+    Chemin du registre : à côté du répertoire des modèles.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(models_dir)), REGISTRY_FILENAME)
+
+
+def dataset_fingerprint(X_image, X_numeric, Y):
+    """
+    Empreinte SHA-1 d'un dataset : formes, features numériques et cibles (les images,
+    volumineuses, ne sont représentées que par leur forme et leur type).
+    """
+    digest = hashlib.sha1()
+    digest.update(repr((tuple(X_image.shape), str(X_image.dtype))).encode('utf-8'))
+    for array in (X_numeric, Y):
+        digest.update(repr(tuple(array.shape)).encode('utf-8'))
+        digest.update(memoryview(array.astype('<f4', copy=False).tobytes()))
+    return digest.hexdigest()
+
+
+def _model_name(path):
+    # MODELS/model_<nom>.h5 -> <nom>
+    name = os.path.splitext(os.path.basename(path))[0]
+    return name[len("model_"):] if name.startswith("model_") else name
+
+
+class ModelRegistry:
+    """
+    Registre SQLite des modèles. Chaque opération ouvre sa propre connexion :
+    utilisable depuis les threads et le processus d'entraînement.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = os.path.abspath(db_path)
+        self._synced = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        conn.executescript(SCHEMA)
+        columns = {row['name'] for row in conn.execute("PRAGMA table_info(models)")}
+        for name, column_type in ADDED_COLUMNS:
+            if name not in columns:
+                with conn:
+                    conn.execute(f"ALTER TABLE models ADD COLUMN {name} {column_type}")
+        return conn
+
+    def register(self, path, model_type, params=None, fingerprint=None, n_samples=None,
+                 training_time=None, created=None, runtime=None):
+        """
+        Enregistre (ou remplace) le modèle du fichier path.
+        runtime : réglages d'exécution et débit de l'entraînement (dict).
+        """
+        created = created or datetime.now().isoformat(sep=' ', timespec='seconds')
+        file_size = os.path.getsize(path) if os.path.exists(path) else None
+        with closing(self._connect()) as conn:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO models (name, model_type, path, created, params, dataset_fingerprint, "
+                    "n_samples, training_time, file_size, runtime) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (_model_name(path), model_type, os.path.abspath(path), created,
+                     json.dumps(params, ensure_ascii=False) if params is not None else None,
+                     fingerprint, n_samples, training_time, file_size,
+                     json.dumps(runtime) if runtime is not None else None))
+        logger.info(f"Modèle enregistré dans le registre : {path}")
+
+    def update_metrics(self, path, kind, mse, mae, r2):
+        """
+        Enregistre les métriques kind ('cv' : validation croisée, 'val' : validation) du modèle path.
+        """
+        if kind not in METRIC_KINDS:
+            raise ValueError(f"Type de métriques inconnu : {kind}")
+        with closing(self._connect()) as conn:
+            with conn:
+                conn.execute(f"UPDATE models SET {kind}_mse = ?, {kind}_mae = ?, {kind}_r2 = ? WHERE path = ?",
+                             (float(mse), float(mae), float(r2), os.path.abspath(path)))
+
+    def latest(self, model_type):
+        """
+        Chemin du modèle le plus récent du produit, ou None. Les entrées dont le fichier
+        a disparu sont retirées du registre.
+        """
+        with closing(self._connect()) as conn:
+            while True:
+                row = conn.execute("SELECT id, path FROM models WHERE model_type = ? "
+                                   "ORDER BY created DESC, id DESC LIMIT 1", (model_type,)).fetchone()
+                if row is None or os.path.exists(row['path']):
+                    return row['path'] if row else None
+                with conn:
+                    conn.execute("DELETE FROM models WHERE id = ?", (row['id'],))
+
+    def history(self, model_type):
+        """
+        Modèles du produit, du plus récent au plus ancien : liste de dict (params décodés).
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT * FROM models WHERE model_type = ? ORDER BY created DESC, id DESC",
+                                (model_type,)).fetchall()
+        history = []
+        for row in rows:
+            record = dict(row)
+            record['params'] = json.loads(record['params']) if record['params'] else None
+            record['runtime'] = json.loads(record['runtime']) if record['runtime'] else None
+            history.append(record)
+        return history
+
+    def sync(self, models_dir, model_types=("Ail", "Oignon", "Échalote")):
+        """
+        Importe les fichiers model_<type>_*.h5 de models_dir absents du registre
+        (modèles antérieurs au registre). Exécuté une fois par processus.
+        """
+        if self._synced or not os.path.exists(models_dir):
+            return 0
+        self._synced = True
+        with closing(self._connect()) as conn:
+            known = {row['path'] for row in conn.execute("SELECT path FROM models")}
+        added = 0
+        for filename in os.listdir(models_dir):
+            path = os.path.abspath(os.path.join(models_dir, filename))
+            model_type = next((t for t in model_types if filename.startswith(f"model_{t}_")), None)
+            if model_type is None or not filename.endswith('.h5') or path in known:
+                continue
+            created = datetime.fromtimestamp(os.path.getmtime(path)).isoformat(sep=' ', timespec='seconds')
+            self.register(path, model_type, created=created)
+            added += 1
+        if added:
+            logger.info(f"{added} modèle(s) existant(s) importé(s) dans le registre.")
+        return added
@@ -3,6 +3,8 @@
 # 👉 Ce module gère la construction, la configuration, la sauvegarde et l'historique des modèles IA.
 # 👉 Il offre aussi une interface (ParamWindow, HistoryWindow) permettant d'ajuster les
 #    paramètres du modèle (MODEL_PARAMS) et de visualiser l'historique des modèles entraînés.
+# 👉 TensorFlow est importé dans les fonctions qui l'utilisent : ouvrir l'écran d'entraînement
+#    ne le charge pas (voir lazy_imports.py).
 # ===========================================================================================
 
 import os
@@ -10,11 +12,10 @@ import json
 import logging
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import tensorflow as tf
-from tensorflow import keras
-from tensorflow.keras import layers, regularizers
 
 from data_utils import MODELS_DIR, THEME, NB_IMAGES_PER_SET
+from numpy_runtime import export_numpy_model, numpy_model_path
+from runtime_settings import format_runtime
 
 # ===========================================================================================
 # 👉 Paramètres du modèle :
@@ -45,6 +46,28 @@ MODEL_PARAMS = {
     # Paramètres avancés (ex : plus de couches CNN, BatchNormalization)
     "cnn_additional_layers": 0,  # Permet d'ajouter plus de couches CNN identiques
     "use_batch_norm": False,     # Si True, ajoute un BatchNormalization après certaines couches
+    "dataset_dtype": "uint8",    # Stockage des images du dataset : uint8 (sans perte), float16 ou float32
+    # Validation croisée
+    "cv_splits": 5,              # Nombre de folds
+    "cv_repeats": 1,             # Nombre de répétitions du k-fold (k-fold répété si > 1)
+    "cv_workers": 0,             # Nombre de processus (0 = automatique, selon les cœurs disponibles)
+    "quantize": False,           # Variantes float16 / int8 du modèle après l'entraînement
+    # Convergence : validation, arrêt anticipé, réduction du learning rate
+    "validation_split": 0.1,     # Part des sets réservée à la validation (0 = surveiller la loss d'entraînement)
+    "early_stopping": True,      # Arrêt quand la loss surveillée ne s'améliore plus
+    "es_patience": 5,            # Époques sans amélioration avant l'arrêt
+    "lr_patience": 2,            # Époques sans amélioration avant de réduire le learning rate (0 = jamais)
+    "lr_factor": 0.5,            # Facteur de réduction du learning rate
+    # Adaptation continue (données de production)
+    "online_steps": 50,          # Nombre de lots de mise à jour
+    "replay_ratio": 0.5,         # Part de chaque lot tirée du buffer de rejeu (sets d'entraînement passés)
+    "replay_capacity": 2000,     # Taille maximale du buffer de rejeu par produit
+    # Exécution CPU (voir runtime_settings.py)
+    "intra_op_threads": 0,       # Threads par opération TensorFlow (0 = automatique)
+    "inter_op_threads": 0,       # Opérations TensorFlow en parallèle (0 = automatique)
+    "onednn": True,              # Optimisations oneDNN
+    "mixed_precision": False,    # Précision mixte bfloat16 (si le CPU la gère nativement)
+    "xla_jit": False,            # Compilation XLA
 }
 
 logger = logging.getLogger("train_ia_model")
@@ -53,6 +76,7 @@ def create_optimizer(params):
     """
     Crée un optimiseur Keras en fonction des paramètres spécifiés.
     """
+    import tensorflow as tf
     opt_name = params.get('optimizer','adam').lower()
     lr = params.get('learning_rate',0.001)
     if opt_name == 'adam':
@@ -65,9 +89,73 @@ def create_optimizer(params):
         logger.warning(f"Optimiseur inconnu : {opt_name}, utilisation d'Adam par défaut.")
         return tf.keras.optimizers.Adam(learning_rate=lr)
 
+def _make_best_weights_callback(monitor):
+    """
+    Callback conservant en mémoire les poids de la meilleure époque (monitor minimal) et les
+    restaurant à la fin de l'entraînement : aucun checkpoint .h5 écrit puis relu à chaque amélioration.
+    """
+    from tensorflow import keras
+
+    class BestWeights(keras.callbacks.Callback):
+        def on_train_begin(self, logs=None):
+            self.best = float('inf')
+            self.best_epoch = None
+            self.best_weights = None
+            self.epochs_run = 0
+
+        def on_epoch_end(self, epoch, logs=None):
+            self.epochs_run = epoch + 1
+            value = (logs or {}).get(monitor)
+            if value is not None and value < self.best:
+                self.best = float(value)
+                self.best_epoch = epoch + 1
+                self.best_weights = self.model.get_weights()
+
+        def on_train_end(self, logs=None):
+            if self.best_weights is not None and self.best_epoch < self.epochs_run:
+                self.model.set_weights(self.best_weights)
+                logger.info(f"Poids de la meilleure époque ({self.best_epoch}) restaurés.")
+            self.best_weights = None
+
+        def report(self, n_epochs):
+            return {'monitor': monitor, 'n_epochs': n_epochs, 'epochs_run': self.epochs_run,
+                    'epochs_saved': n_epochs - self.epochs_run, 'best_epoch': self.best_epoch,
+                    'best_loss': self.best if self.best_epoch is not None else None}
+
+    return BestWeights()
+
+def create_training_callbacks(params, monitor):
+    """
+    Callbacks de convergence selon params : meilleurs poids en mémoire, arrêt anticipé,
+    réduction du learning rate sur plateau. Renvoie (liste de callbacks, callback des meilleurs
+    poids, dont report(n_epochs) résume l'entraînement).
+    """
+    from tensorflow import keras
+    best = _make_best_weights_callback(monitor)
+    callbacks = [best]
+    if params.get('early_stopping', True):
+        callbacks.append(keras.callbacks.EarlyStopping(monitor=monitor, patience=params.get('es_patience', 5)))
+    if params.get('lr_patience', 2) > 0:
+        callbacks.append(keras.callbacks.ReduceLROnPlateau(monitor=monitor, factor=params.get('lr_factor', 0.5),
+                                                           patience=params.get('lr_patience', 2), min_lr=1e-6))
+    return callbacks, best
+
+def format_training_report(report):
+    """
+    Résumé lisible du rapport d'entraînement (report() du callback des meilleurs poids).
+    """
+    text = f"{report['epochs_run']}/{report['n_epochs']} époques"
+    if report['best_epoch'] is not None:
+        text += f", meilleure : {report['best_epoch']} ({report['monitor']} {report['best_loss']:.4f})"
+    if report['epochs_saved'] > 0:
+        text += f", arrêt anticipé : {report['epochs_saved']} époque(s) économisée(s)"
+    return text
+
 def save_model(model, model_name):
     """
-    Sauvegarde le modèle au format H5 dans le répertoire MODELS_DIR.
+    Sauvegarde le modèle au format H5 dans le répertoire MODELS_DIR,
+    ainsi que son export NumPy (exécutable sans TensorFlow, voir numpy_runtime.py).
+    Retourne le chemin du .h5, ou None en cas d'échec.
     """
     if not os.path.exists(MODELS_DIR):
         os.makedirs(MODELS_DIR)
@@ -77,11 +165,20 @@ def save_model(model, model_name):
         logger.info(f"Modèle sauvegardé : {model_file}")
     except Exception as e:
         logger.error(f"Erreur sauvegarde modèle : {e}", exc_info=True)
+        return None
+    try:
+        export_numpy_model(model, numpy_model_path(model_file))
+    except Exception as e:
+        # Le .h5 reste utilisable (chargement Keras)
+        logger.warning(f"Export NumPy impossible pour {model_file} : {e}")
+    return model_file
 
 def build_dense_model(input_dim, output_dim, params):
     """
     Construit un modèle Dense (MLP) selon les paramètres.
     """
+    from tensorflow import keras
+    from tensorflow.keras import layers, regularizers
     activation = params.get('activation','relu')
     hidden_layers = params.get('hidden_layers','64,64')
     layers_units = [int(u) for u in hidden_layers.split(',') if u.strip().isdigit()]
@@ -104,7 +201,8 @@ def build_dense_model(input_dim, output_dim, params):
         if use_dropout and dropout_rate > 0:
             x = layers.Dropout(dropout_rate)(x)
 
-    outputs = layers.Dense(output_dim, kernel_initializer=weight_init)(x)
+    # Sortie en float32 même en précision mixte (stabilité de la loss)
+    outputs = layers.Dense(output_dim, kernel_initializer=weight_init, dtype='float32')(x)
 
     optimizer = create_optimizer(params)
     model = keras.Model(inputs=inputs, outputs=outputs)
@@ -119,6 +217,8 @@ def build_cnn_dense_model(image_shape, numeric_dim, output_dim, params):
     et des couches denses pour les features numériques.
     Permet d'ajouter plus de couches CNN (cnn_additional_layers) ou du batch normalization.
     """
+    from tensorflow import keras
+    from tensorflow.keras import layers, regularizers
     cnn_filters = params.get("cnn_filters", "32,64")
     cnn_filters = [int(x) for x in cnn_filters.split(',') if x.strip().isdigit()]
     if not cnn_filters:
@@ -198,7 +298,7 @@ def build_cnn_dense_model(image_shape, numeric_dim, output_dim, params):
             concat = layers.Dropout(dropout_rate)(concat)
 
     # Couche de sortie
-    output = layers.Dense(output_dim, kernel_initializer=weight_init)(concat)
+    output = layers.Dense(output_dim, kernel_initializer=weight_init, dtype='float32')(concat)
 
     # Compilation du modèle
     optimizer = create_optimizer(params)
@@ -318,10 +418,66 @@ class ParamWindow(tk.Toplevel):
         self.batchnorm_var = tk.BooleanVar(value=self.params.get('use_batch_norm', False))
         tk.Checkbutton(self, variable=self.batchnorm_var, bg=THEME['bg_main'], fg='white', selectcolor=THEME['highlight']).grid(row=17, column=1, sticky='w', padx=5, pady=5)
 
-        tk.Button(self, text="Exporter Config", bg=THEME['button_bg'], fg='white', command=self.export_config).grid(row=18, column=0, padx=5, pady=5)
-        tk.Button(self, text="Importer Config", bg=THEME['button_bg'], fg='white', command=self.import_config).grid(row=18, column=1, padx=5, pady=5)
+        # Validation croisée
+        self.cv_splits_entry = add_label_entry(18, "Validation croisée - folds :", "cv_splits", 5)
+        self.cv_repeats_entry = add_label_entry(19, "Validation croisée - répétitions :", "cv_repeats", 1)
+        self.cv_workers_entry = add_label_entry(20, "Validation croisée - processus (0 = auto) :", "cv_workers", 0)
+
+        tk.Label(self, text="Quantification après entraînement (float16 / int8) :", fg='white', bg=THEME['bg_main']).grid(row=21, column=0, sticky='e', padx=5, pady=5)
+        self.quantize_var = tk.BooleanVar(value=self.params.get('quantize', False))
+        tk.Checkbutton(self, variable=self.quantize_var, bg=THEME['bg_main'], fg='white', selectcolor=THEME['highlight']).grid(row=21, column=1, sticky='w', padx=5, pady=5)
+
+        # Adaptation continue
+        self.online_steps_entry = add_label_entry(22, "Adaptation continue - lots :", "online_steps", 50)
+        self.replay_ratio_entry = add_label_entry(23, "Adaptation continue - part rejeu (0-1) :", "replay_ratio", 0.5)
+        self.replay_capacity_entry = add_label_entry(24, "Adaptation continue - taille buffer :", "replay_capacity", 2000)
+
+        # Frame exécution CPU
+        runtime_frame = tk.LabelFrame(self, text="Exécution CPU (processus d'entraînement)", bg=THEME['bg_section'], fg='white', font=("Helvetica", 14, "bold"))
+        runtime_frame.grid(row=25, column=0, columnspan=2, padx=5, pady=5, sticky='ew')
+
+        tk.Label(runtime_frame, text="Threads intra-op (0 = auto):", bg=THEME['bg_section'], fg='white').grid(row=0, column=0, sticky='e', padx=5, pady=5)
+        self.intra_threads_entry = tk.Entry(runtime_frame, bg=THEME['text_bg'], fg='white')
+        self.intra_threads_entry.grid(row=0, column=1, padx=5, pady=5)
+        self.intra_threads_entry.insert(0, str(self.params.get('intra_op_threads', 0)))
+
+        tk.Label(runtime_frame, text="Threads inter-op (0 = auto):", bg=THEME['bg_section'], fg='white').grid(row=1, column=0, sticky='e', padx=5, pady=5)
+        self.inter_threads_entry = tk.Entry(runtime_frame, bg=THEME['text_bg'], fg='white')
+        self.inter_threads_entry.grid(row=1, column=1, padx=5, pady=5)
+        self.inter_threads_entry.insert(0, str(self.params.get('inter_op_threads', 0)))
+
+        self.onednn_var = tk.BooleanVar(value=self.params.get('onednn', True))
+        self.mixed_precision_var = tk.BooleanVar(value=self.params.get('mixed_precision', False))
+        self.xla_var = tk.BooleanVar(value=self.params.get('xla_jit', False))
+        for row, (text, var) in enumerate((("oneDNN :", self.onednn_var),
+                                            ("Précision mixte bfloat16 :", self.mixed_precision_var),
+                                            ("Compilation XLA :", self.xla_var)), start=2):
+            tk.Label(runtime_frame, text=text, bg=THEME['bg_section'], fg='white').grid(row=row, column=0, sticky='e', padx=5, pady=5)
+            tk.Checkbutton(runtime_frame, variable=var, bg=THEME['bg_section'], fg='white', selectcolor=THEME['highlight']).grid(row=row, column=1, sticky='w', padx=5, pady=5)
+
+        # Frame convergence
+        convergence_frame = tk.LabelFrame(self, text="Convergence (validation)", bg=THEME['bg_section'], fg='white', font=("Helvetica", 14, "bold"))
+        convergence_frame.grid(row=26, column=0, columnspan=2, padx=5, pady=5, sticky='ew')
+
+        def add_frame_entry(row, text, var_name, default):
+            tk.Label(convergence_frame, text=text, bg=THEME['bg_section'], fg='white').grid(row=row, column=0, sticky='e', padx=5, pady=5)
+            e = tk.Entry(convergence_frame, bg=THEME['text_bg'], fg='white')
+            e.grid(row=row, column=1, padx=5, pady=5)
+            e.insert(0, str(self.params.get(var_name, default)))
+            return e
+
+        self.validation_split_entry = add_frame_entry(0, "Part validation (0-1):", "validation_split", 0.1)
+        tk.Label(convergence_frame, text="Arrêt anticipé :", bg=THEME['bg_section'], fg='white').grid(row=1, column=0, sticky='e', padx=5, pady=5)
+        self.early_stopping_var = tk.BooleanVar(value=self.params.get('early_stopping', True))
+        tk.Checkbutton(convergence_frame, variable=self.early_stopping_var, bg=THEME['bg_section'], fg='white', selectcolor=THEME['highlight']).grid(row=1, column=1, sticky='w', padx=5, pady=5)
+        self.es_patience_entry = add_frame_entry(2, "Patience arrêt (époques):", "es_patience", 5)
+        self.lr_patience_entry = add_frame_entry(3, "Patience learning rate (0 = fixe):", "lr_patience", 2)
+        self.lr_factor_entry = add_frame_entry(4, "Facteur learning rate :", "lr_factor", 0.5)
+
+        tk.Button(self, text="Exporter Config", bg=THEME['button_bg'], fg='white', command=self.export_config).grid(row=27, column=0, padx=5, pady=5)
+        tk.Button(self, text="Importer Config", bg=THEME['button_bg'], fg='white', command=self.import_config).grid(row=27, column=1, padx=5, pady=5)
 
-        tk.Button(self, text="Appliquer", bg=THEME['button_bg'], fg='white', command=self.apply_all_params).grid(row=19, column=0, columnspan=2, pady=10)
+        tk.Button(self, text="Appliquer", bg=THEME['button_bg'], fg='white', command=self.apply_all_params).grid(row=28, column=0, columnspan=2, pady=10)
 
     def apply_all_params(self):
         """
@@ -354,6 +510,20 @@ class ParamWindow(tk.Toplevel):
             fine_tuning_layers = int(self.finetune_layers_entry.get().strip())
             use_batch_norm = self.batchnorm_var.get()
 
+            cv_splits = int(self.cv_splits_entry.get().strip())
+            cv_repeats = int(self.cv_repeats_entry.get().strip())
+            cv_workers = int(self.cv_workers_entry.get().strip())
+            quantize = self.quantize_var.get()
+            online_steps = int(self.online_steps_entry.get().strip())
+            replay_ratio = float(self.replay_ratio_entry.get().strip())
+            replay_capacity = int(self.replay_capacity_entry.get().strip())
+            intra_op_threads = int(self.intra_threads_entry.get().strip())
+            inter_op_threads = int(self.inter_threads_entry.get().strip())
+            validation_split = float(self.validation_split_entry.get().strip())
+            es_patience = int(self.es_patience_entry.get().strip())
+            lr_patience = int(self.lr_patience_entry.get().strip())
+            lr_factor = float(self.lr_factor_entry.get().strip())
+
             # Vérifications de base
             if n_epochs <= 0:
                 raise ValueError("n_epochs doit être > 0")
@@ -365,6 +535,28 @@ class ParamWindow(tk.Toplevel):
                 raise ValueError("l2_reg ne peut pas être négatif")
             if not metrics:
                 raise ValueError("Vous devez spécifier au moins une métrique")
+            if cv_splits < 2:
+                raise ValueError("Le nombre de folds doit être >= 2")
+            if cv_repeats < 1:
+                raise ValueError("Le nombre de répétitions doit être >= 1")
+            if cv_workers < 0:
+                raise ValueError("Le nombre de processus ne peut pas être négatif")
+            if online_steps <= 0:
+                raise ValueError("Le nombre de lots d'adaptation doit être > 0")
+            if replay_ratio < 0.0 or replay_ratio >= 1.0:
+                raise ValueError("La part de rejeu doit être entre 0.0 et 1.0 (exclu)")
+            if replay_capacity <= 0:
+                raise ValueError("La taille du buffer de rejeu doit être > 0")
+            if intra_op_threads < 0 or inter_op_threads < 0:
+                raise ValueError("Le nombre de threads ne peut pas être négatif")
+            if validation_split < 0.0 or validation_split >= 1.0:
+                raise ValueError("La part de validation doit être entre 0.0 et 1.0 (exclu)")
+            if es_patience < 1:
+                raise ValueError("La patience d'arrêt doit être >= 1")
+            if lr_patience < 0:
+                raise ValueError("La patience du learning rate ne peut pas être négative")
+            if lr_factor <= 0.0 or lr_factor >= 1.0:
+                raise ValueError("Le facteur de learning rate doit être entre 0.0 et 1.0 (exclus)")
 
             MODEL_PARAMS['n_epochs'] = n_epochs
             MODEL_PARAMS['batch_size'] = batch_size
@@ -386,6 +578,23 @@ class ParamWindow(tk.Toplevel):
             MODEL_PARAMS['fine_tuning_layers'] = fine_tuning_layers
             MODEL_PARAMS['cnn_additional_layers'] = cnn_additional_layers
             MODEL_PARAMS['use_batch_norm'] = use_batch_norm
+            MODEL_PARAMS['cv_splits'] = cv_splits
+            MODEL_PARAMS['cv_repeats'] = cv_repeats
+            MODEL_PARAMS['cv_workers'] = cv_workers
+            MODEL_PARAMS['quantize'] = quantize
+            MODEL_PARAMS['online_steps'] = online_steps
+            MODEL_PARAMS['replay_ratio'] = replay_ratio
+            MODEL_PARAMS['replay_capacity'] = replay_capacity
+            MODEL_PARAMS['intra_op_threads'] = intra_op_threads
+            MODEL_PARAMS['inter_op_threads'] = inter_op_threads
+            MODEL_PARAMS['onednn'] = self.onednn_var.get()
+            MODEL_PARAMS['mixed_precision'] = self.mixed_precision_var.get()
+            MODEL_PARAMS['xla_jit'] = self.xla_var.get()
+            MODEL_PARAMS['validation_split'] = validation_split
+            MODEL_PARAMS['early_stopping'] = self.early_stopping_var.get()
+            MODEL_PARAMS['es_patience'] = es_patience
+            MODEL_PARAMS['lr_patience'] = lr_patience
+            MODEL_PARAMS['lr_factor'] = lr_factor
 
             messagebox.showinfo("Paramètres", "Paramètres appliqués avec succès.")
             self.destroy()
@@ -451,6 +660,35 @@ class ParamWindow(tk.Toplevel):
             self.finetune_layers_entry.delete(0, tk.END)
             self.finetune_layers_entry.insert(0, str(MODEL_PARAMS.get('fine_tuning_layers',0)))
             self.batchnorm_var.set(MODEL_PARAMS.get('use_batch_norm',False))
+            self.cv_splits_entry.delete(0, tk.END)
+            self.cv_splits_entry.insert(0, str(MODEL_PARAMS.get('cv_splits',5)))
+            self.cv_repeats_entry.delete(0, tk.END)
+            self.cv_repeats_entry.insert(0, str(MODEL_PARAMS.get('cv_repeats',1)))
+            self.cv_workers_entry.delete(0, tk.END)
+            self.cv_workers_entry.insert(0, str(MODEL_PARAMS.get('cv_workers',0)))
+            self.quantize_var.set(MODEL_PARAMS.get('quantize',False))
+            self.online_steps_entry.delete(0, tk.END)
+            self.online_steps_entry.insert(0, str(MODEL_PARAMS.get('online_steps',50)))
+            self.replay_ratio_entry.delete(0, tk.END)
+            self.replay_ratio_entry.insert(0, str(MODEL_PARAMS.get('replay_ratio',0.5)))
+            self.replay_capacity_entry.delete(0, tk.END)
+            self.replay_capacity_entry.insert(0, str(MODEL_PARAMS.get('replay_capacity',2000)))
+            self.intra_threads_entry.delete(0, tk.END)
+            self.intra_threads_entry.insert(0, str(MODEL_PARAMS.get('intra_op_threads',0)))
+            self.inter_threads_entry.delete(0, tk.END)
+            self.inter_threads_entry.insert(0, str(MODEL_PARAMS.get('inter_op_threads',0)))
+            self.onednn_var.set(MODEL_PARAMS.get('onednn',True))
+            self.mixed_precision_var.set(MODEL_PARAMS.get('mixed_precision',False))
+            self.xla_var.set(MODEL_PARAMS.get('xla_jit',False))
+            self.validation_split_entry.delete(0, tk.END)
+            self.validation_split_entry.insert(0, str(MODEL_PARAMS.get('validation_split',0.1)))
+            self.early_stopping_var.set(MODEL_PARAMS.get('early_stopping',True))
+            self.es_patience_entry.delete(0, tk.END)
+            self.es_patience_entry.insert(0, str(MODEL_PARAMS.get('es_patience',5)))
+            self.lr_patience_entry.delete(0, tk.END)
+            self.lr_patience_entry.insert(0, str(MODEL_PARAMS.get('lr_patience',2)))
+            self.lr_factor_entry.delete(0, tk.END)
+            self.lr_factor_entry.insert(0, str(MODEL_PARAMS.get('lr_factor',0.5)))
             messagebox.showinfo("Importation", f"Configuration importée depuis {file_path}")
         except Exception as e:
             messagebox.showerror("Erreur", f"Impossible d'importer la configuration:\n{e}")
@@ -458,30 +696,53 @@ class ParamWindow(tk.Toplevel):
 class HistoryWindow(tk.Toplevel):
     """
     Fenêtre HistoryWindow :
-    Permet de voir l'historique des modèles entraînés pour un type de produit donné.
+    Permet de voir l'historique des modèles entraînés pour un type de produit donné
+    (registre des modèles : date, dataset, durée, métriques, taille).
     """
+    COLUMNS = (("name", "Modèle", 260), ("created", "Date", 140), ("n_samples", "Sets", 50),
+               ("training_time", "Durée (s)", 70), ("cv_mse", "MSE CV", 70), ("val_mse", "MSE valid.", 70),
+               ("samples_per_s", "Éch./s", 60), ("file_size", "Taille (Ko)", 80))
+
     def __init__(self, parent, model_type):
         super().__init__(parent)
         self.title("Historique du modèle")
         self.configure(bg=THEME['bg_main'])
 
-        from data_utils import MODELS_DIR
-        if not os.path.exists(MODELS_DIR):
-            tk.Label(self, text="Aucun modèle trouvé (répertoire manquant).", bg=THEME['bg_main'], fg='white').pack(padx=10, pady=10)
-            return
-        files = [f for f in os.listdir(MODELS_DIR) if f.startswith(f"model_{model_type}_") and f.endswith('.h5')]
-        if not files:
+        from data_utils import get_model_registry
+        registry = get_model_registry()
+        registry.sync(MODELS_DIR)
+        self.records = registry.history(model_type)
+        if not self.records:
             tk.Label(self, text="Aucun modèle trouvé pour ce type.", bg=THEME['bg_main'], fg='white').pack(padx=10, pady=10)
             return
-        files.sort(key=lambda x: os.path.getmtime(os.path.join(MODELS_DIR, x)), reverse=True)
-        self.combo = ttk.Combobox(self, values=files, state="readonly")
-        self.combo.pack(padx=10, pady=10)
-        if files:
-            self.combo.current(0)
+
+        self.tree = ttk.Treeview(self, columns=[c[0] for c in self.COLUMNS], show='headings', height=10)
+        for key, title, width in self.COLUMNS:
+            self.tree.heading(key, text=title)
+            self.tree.column(key, width=width)
+        for i, record in enumerate(self.records):
+            self.tree.insert("", "end", iid=str(i), values=(
+                record['name'], record['created'],
+                record['n_samples'] if record['n_samples'] is not None else '',
+                f"{record['training_time']:.0f}" if record['training_time'] is not None else '',
+                f"{record['cv_mse']:.2f}" if record['cv_mse'] is not None else '',
+                f"{record['val_mse']:.2f}" if record['val_mse'] is not None else '',
+                f"{record['runtime']['samples_per_s']:.0f}" if 'samples_per_s' in (record['runtime'] or {}) else '',
+                f"{record['file_size'] / 1024:.0f}" if record['file_size'] is not None else ''))
+        self.tree.pack(padx=10, pady=10, fill='both', expand=True)
+        self.tree.selection_set("0")
         tk.Button(self, text="OK", bg=THEME['button_bg'], fg='white', command=self.select_model).pack(pady=5)
 
     def select_model(self):
-        sel = self.combo.get()
+        sel = self.tree.selection()
         if sel:
-            messagebox.showinfo("Historique", f"Modèle sélectionné: {sel}")
+            record = self.records[int(sel[0])]
+            details = f"Modèle sélectionné: {record['name']}\nFichier: {record['path']}"
+            if record['dataset_fingerprint']:
+                details += f"\nDataset: {record['dataset_fingerprint'][:12]}"
+            if record['runtime']:
+                details += f"\nExécution: {format_runtime(record['runtime'])}"
+            if record['params']:
+                details += "\n\nParamètres:\n" + json.dumps(record['params'], indent=1, ensure_ascii=False)
+            messagebox.showinfo("Historique", details)
             self.destroy()
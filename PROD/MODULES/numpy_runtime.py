@@ -0,0 +1,397 @@
+# numpy_runtime.py
+# ===========================================================================================
+# 👉 Exécution des modèles sans TensorFlow (poste atelier) :
+#    - export_numpy_model() : à la sauvegarde d'un modèle (model_utils.save_model), son graphe
+#      (couches, configuration utile, liaisons) et ses poids sont exportés dans un fichier .npz
+#      compact à côté du .h5 (model_<nom>.npz, sans pickle).
+#    - NumpyModel : passe avant en NumPy pur des couches utilisées par build_dense_model /
+#      build_cnn_dense_model : Conv2D, MaxPooling2D, Dense, BatchNormalization (inférence),
+#      Dropout (inférence = identité), Flatten, Concatenate.
+#    - check_parity() : comparaison des sorties NumPy / Keras sur des entrées aléatoires,
+#      exécutée après chaque export ; un export non conforme est supprimé.
+#    - Les variantes quantifiées (float16 / int8, voir model_quantization.py) sont relues ici :
+#      poids déquantifiés au chargement, entrées des couches Conv2D / Dense ramenées sur la
+#      grille int8 calibrée (settings['input_scale']).
+#    Ce module n'importe que NumPy : seul l'export manipule un modèle Keras déjà chargé.
+# ===========================================================================================
+
+import os
+import json
+import time
+import logging
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+NUMPY_MODEL_EXTENSION = ".npz"
+NUMPY_MODEL_FORMAT = "rochias-numpy-model"
+NUMPY_MODEL_VERSION = 1
+
+# Lignes traitées par passe (borne la mémoire des convolutions im2col)
+PREDICT_CHUNK = 32
+PARITY_TOLERANCE = 1e-3
+
+logger = logging.getLogger("numpy_runtime")
+
+
+class UnsupportedModelError(ValueError):
+    """
+    Levée lorsqu'un modèle contient une couche ou un réglage non pris en charge par le runtime NumPy.
+    """
+    pass
+
+
+# ===========================================================================================
+# 👉 Activations
+# ===========================================================================================
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _softmax(x):
+    e = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return e / np.sum(e, axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0.0),
+    "tanh": np.tanh,
+    "sigmoid": _sigmoid,
+    "elu": lambda x: np.where(x > 0, x, np.expm1(np.minimum(x, 0.0))),
+    "selu": lambda x: 1.0507009873554805 * np.where(x > 0, x, 1.6732632423543772 * np.expm1(np.minimum(x, 0.0))),
+    "softplus": lambda x: np.logaddexp(x, 0.0),
+    "softsign": lambda x: x / (1.0 + np.abs(x)),
+    "swish": lambda x: x * _sigmoid(x),
+    "silu": lambda x: x * _sigmoid(x),
+    "softmax": _softmax,
+}
+
+
+def _activation_name(activation):
+    # Keras 2 : chaîne ; Keras 3 : chaîne ou dict sérialisé
+    if activation is None:
+        return "linear"
+    if isinstance(activation, dict):
+        activation = activation.get('config', {}).get('name') or activation.get('class_name', '')
+    name = str(activation).lower()
+    if name not in ACTIVATIONS:
+        raise UnsupportedModelError(f"Activation non prise en charge : {activation}")
+    return name
+
+
+# ===========================================================================================
+# 👉 Couches
+# ===========================================================================================
+
+def _pair(value):
+    if isinstance(value, (list, tuple)):
+        return int(value[0]), int(value[1])
+    return int(value), int(value)
+
+
+def _same_padding(size, window, stride):
+    out = -(-size // stride)
+    total = max((out - 1) * stride + window - size, 0)
+    return total // 2, total - total // 2
+
+
+def _windows(x, window, strides, padding, pad_value=0.0):
+    """
+    Fenêtres glissantes (n, H', W', C, kh, kw) d'un tenseur NHWC, padding 'same' ou 'valid' façon Keras.
+    """
+    (kh, kw), (sh, sw) = window, strides
+    if padding == "same":
+        pads = ((0, 0), _same_padding(x.shape[1], kh, sh), _same_padding(x.shape[2], kw, sw), (0, 0))
+        x = np.pad(x, pads, constant_values=pad_value)
+    elif padding != "valid":
+        raise UnsupportedModelError(f"Padding non pris en charge : {padding}")
+    return sliding_window_view(x, (kh, kw), axis=(1, 2))[:, ::sh, ::sw]
+
+
+def _fake_quantize(x, scale):
+    # Quantification symétrique int8 puis retour en float32 (simulation de l'arithmétique int8)
+    return np.clip(np.round(x / scale), -127, 127) * scale
+
+
+def _conv2d(x, layer):
+    if 'input_scale' in layer:
+        x = _fake_quantize(x, layer['input_scale'])
+    kernel = layer['weights'][0]
+    windows = _windows(x, kernel.shape[:2], layer['strides'], layer['padding'])
+    y = np.tensordot(windows, kernel, axes=((3, 4, 5), (2, 0, 1)))
+    if layer['use_bias']:
+        y += layer['weights'][1]
+    return ACTIVATIONS[layer['activation']](y)
+
+
+def _max_pooling2d(x, layer):
+    windows = _windows(x, layer['pool_size'], layer['strides'], layer['padding'], pad_value=-np.inf)
+    return windows.max(axis=(4, 5))
+
+
+def _dense(x, layer):
+    if 'input_scale' in layer:
+        x = _fake_quantize(x, layer['input_scale'])
+    y = x @ layer['weights'][0]
+    if layer['use_bias']:
+        y += layer['weights'][1]
+    return ACTIVATIONS[layer['activation']](y)
+
+
+def _batch_normalization(x, layer):
+    weights = list(layer['weights'])
+    gamma = weights.pop(0) if layer['scale'] else 1.0
+    beta = weights.pop(0) if layer['center'] else 0.0
+    moving_mean, moving_variance = weights
+    return (x - moving_mean) / np.sqrt(moving_variance + layer['epsilon']) * gamma + beta
+
+
+def _activation(x, layer):
+    return ACTIVATIONS[layer['activation']](x)
+
+
+def _identity(x, layer):
+    return x
+
+
+def _flatten(x, layer):
+    return x.reshape(x.shape[0], -1)
+
+
+LAYER_FUNCTIONS = {
+    "Conv2D": _conv2d,
+    "MaxPooling2D": _max_pooling2d,
+    "Dense": _dense,
+    "BatchNormalization": _batch_normalization,
+    "Activation": _activation,
+    "Dropout": _identity,
+    "Flatten": _flatten,
+}
+
+
+def _layer_settings(class_name, config):
+    """
+    Sous-ensemble de la configuration Keras utile à l'inférence (vérifié à l'export).
+    """
+    if class_name == "Conv2D":
+        if _pair(config.get('dilation_rate', 1)) != (1, 1) or config.get('groups', 1) != 1:
+            raise UnsupportedModelError("Conv2D dilatée / groupée non prise en charge.")
+        if config.get('data_format') not in (None, "channels_last"):
+            raise UnsupportedModelError("Conv2D : seul le format channels_last est pris en charge.")
+        return {'strides': _pair(config.get('strides', 1)), 'padding': config.get('padding', 'valid'),
+                'activation': _activation_name(config.get('activation')), 'use_bias': config.get('use_bias', True)}
+    if class_name == "MaxPooling2D":
+        pool_size = _pair(config.get('pool_size', 2))
+        strides = _pair(config['strides']) if config.get('strides') else pool_size
+        return {'pool_size': pool_size, 'strides': strides, 'padding': config.get('padding', 'valid')}
+    if class_name == "Dense":
+        return {'activation': _activation_name(config.get('activation')), 'use_bias': config.get('use_bias', True)}
+    if class_name == "BatchNormalization":
+        axis = config.get('axis', -1)
+        axis = axis[0] if isinstance(axis, (list, tuple)) and len(axis) == 1 else axis
+        if axis not in (-1, 1, 3):
+            raise UnsupportedModelError(f"BatchNormalization : axe non pris en charge ({axis}).")
+        return {'epsilon': float(config.get('epsilon', 1e-3)), 'center': config.get('center', True),
+                'scale': config.get('scale', True)}
+    if class_name == "Activation":
+        return {'activation': _activation_name(config.get('activation'))}
+    if class_name == "Concatenate":
+        return {'axis': int(config.get('axis', -1))}
+    if class_name in ("InputLayer", "Dropout", "Flatten"):
+        return {}
+    raise UnsupportedModelError(f"Couche non prise en charge : {class_name}")
+
+
+def _inbound_names(node_config, layer_names):
+    """
+    Noms des couches d'entrée d'un nœud, dans l'ordre (formats Keras 2 et Keras 3).
+    """
+    names = []
+
+    def walk(obj):
+        if isinstance(obj, dict):
+            if 'keras_history' in obj:
+                names.append(obj['keras_history'][0])
+                return
+            for value in obj.values():
+                walk(value)
+        elif isinstance(obj, (list, tuple)):
+            if len(obj) >= 3 and isinstance(obj[0], str) and isinstance(obj[1], int) and obj[0] in layer_names:
+                names.append(obj[0])
+                return
+            for value in obj:
+                walk(value)
+
+    walk(node_config)
+    return names
+
+
+def _endpoint_names(endpoints):
+    # input_layers / output_layers : [nom, 0, 0] ou [[nom, 0, 0], ...]
+    if endpoints and isinstance(endpoints[0], str):
+        endpoints = [endpoints]
+    return [e[0] for e in endpoints]
+
+
+# ===========================================================================================
+# 👉 Export
+# ===========================================================================================
+
+def numpy_model_path(model_path):
+    """
+    Chemin de l'export NumPy associé à un modèle .h5.
+    """
+    return os.path.splitext(model_path)[0] + NUMPY_MODEL_EXTENSION
+
+
+def has_numpy_export(model_path):
+    """
+    True si un export NumPy à jour (pas plus ancien que le .h5) existe pour model_path.
+    """
+    path = numpy_model_path(model_path)
+    return (os.path.exists(path) and
+            (not os.path.exists(model_path) or os.path.getmtime(path) >= os.path.getmtime(model_path)))
+
+
+def export_numpy_model(model, path, check=True):
+    """
+    Exporte un modèle Keras (fonctionnel) au format NumPy.
+    Lève UnsupportedModelError si une couche n'est pas prise en charge, ou si la vérification
+    de parité échoue (le fichier est alors supprimé).
+    """
+    config = model.get_config()
+    layer_names = {layer_config['name'] for layer_config in config['layers']}
+    graph = {'format': NUMPY_MODEL_FORMAT, 'version': NUMPY_MODEL_VERSION,
+             'inputs': _endpoint_names(config['input_layers']),
+             'outputs': _endpoint_names(config['output_layers']),
+             'layers': []}
+    arrays = {}
+    for index, layer_config in enumerate(config['layers']):
+        class_name = layer_config['class_name']
+        name = layer_config['name']
+        layer = {'name': name, 'class_name': class_name,
+                 'inbound': _inbound_names(layer_config.get('inbound_nodes', []), layer_names),
+                 'settings': _layer_settings(class_name, layer_config['config']),
+                 'n_weights': 0}
+        if class_name == "InputLayer":
+            shape = layer_config['config'].get('batch_shape') or layer_config['config'].get('batch_input_shape')
+            layer['settings']['shape'] = list(shape[1:])
+        for j, weight in enumerate(model.get_layer(name).get_weights()):
+            arrays[f"w{index}_{j}"] = np.asarray(weight, dtype=np.float32)
+            layer['n_weights'] += 1
+        graph['layers'].append(layer)
+
+    arrays['graph'] = np.frombuffer(json.dumps(graph).encode('utf-8'), dtype=np.uint8)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+    if check:
+        try:
+            max_error = check_parity(model, NumpyModel.load(path))
+        except Exception:
+            os.remove(path)
+            raise
+        logger.info(f"Export NumPy : {path} (écart max avec Keras : {max_error:.2e})")
+    return path
+
+
+# ===========================================================================================
+# 👉 Modèle
+# ===========================================================================================
+
+def _dequantize(weights, index, j):
+    """
+    Poids j de la couche index en float32 : float16 converti, int8 multiplié par son échelle.
+    """
+    weight = weights[f"w{index}_{j}"].astype(np.float32)
+    scale = weights.get(f"s{index}_{j}")
+    return weight * scale if scale is not None else weight
+
+
+class NumpyModel:
+    """
+    Modèle exporté exécuté en NumPy. Même interface que model_cache.CachedModel :
+    predict(X_image, X_numeric), input_shapes, last_latency_ms, warm_up_ms.
+    """
+
+    def __init__(self, path, graph, weights):
+        if graph.get('format') != NUMPY_MODEL_FORMAT or graph.get('version') != NUMPY_MODEL_VERSION:
+            raise UnsupportedModelError(f"Fichier non reconnu comme modèle NumPy : {path}")
+        self.path = path
+        self.graph = json.loads(json.dumps(graph))  # description sans les poids (réexport)
+        self.quantization = graph.get('quantization', 'float32')
+        self.layers = graph['layers']
+        self.input_names = graph['inputs']
+        self.output_name = graph['outputs'][0]
+        by_name = {layer['name']: layer for layer in self.layers}
+        for index, layer in enumerate(self.layers):
+            layer['weights'] = [_dequantize(weights, index, j) for j in range(layer['n_weights'])]
+            if layer['class_name'] not in ("InputLayer", "Concatenate") and layer['class_name'] not in LAYER_FUNCTIONS:
+                raise UnsupportedModelError(f"Couche non prise en charge : {layer['class_name']}")
+        self.input_shapes = [tuple(by_name[name]['settings']['shape']) for name in self.input_names]
+        self.last_latency_ms = None
+        self.warm_up_ms = 0.0
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            graph = json.loads(data['graph'].tobytes().decode('utf-8'))
+            weights = {key: data[key] for key in data.files if key != 'graph'}
+        return cls(path, graph, weights)
+
+    def _forward(self, inputs, observe=None):
+        values = dict(zip(self.input_names, inputs))
+        for layer in self.layers:
+            if layer['class_name'] == "InputLayer":
+                continue
+            args = [values[name] for name in layer['inbound']]
+            if observe is not None:
+                observe(layer, args)
+            if layer['class_name'] == "Concatenate":
+                values[layer['name']] = np.concatenate(args, axis=layer['settings']['axis'])
+            else:
+                values[layer['name']] = LAYER_FUNCTIONS[layer['class_name']](args[0], {**layer['settings'], 'weights': layer['weights']})
+        return values[self.output_name]
+
+    def predict_inputs(self, inputs, chunk=PREDICT_CHUNK, observe=None):
+        """
+        Passe avant sur la liste des entrées du modèle (dans l'ordre de ses entrées), par paquets de chunk lignes.
+        observe(couche, entrées) est appelé avant chaque couche (calibration).
+        """
+        inputs = [np.asarray(x, dtype=np.float32) for x in inputs]
+        n = len(inputs[0])
+        return np.concatenate([self._forward([x[start:start + chunk] for x in inputs], observe)
+                               for start in range(0, n, chunk)]).astype(np.float32, copy=False)
+
+    def predict(self, X_image, X_numeric):
+        """
+        Prédiction (np.ndarray) ; la durée est enregistrée dans last_latency_ms.
+        """
+        start = time.perf_counter()
+        # Un modèle Dense n'a qu'une entrée (features numériques)
+        inputs = [X_numeric] if len(self.input_names) == 1 else [X_image, X_numeric]
+        pred = self.predict_inputs(inputs)
+        self.last_latency_ms = (time.perf_counter() - start) * 1000.0
+        return pred
+
+
+def check_parity(keras_model, numpy_model, n_samples=8, seed=0, tolerance=PARITY_TOLERANCE):
+    """
+    Compare les sorties Keras et NumPy sur des entrées aléatoires (images dans [0, 1],
+    features dans [0, 100]). Renvoie l'écart absolu maximal ; lève UnsupportedModelError
+    s'il dépasse tolerance (relativement à l'amplitude des sorties Keras).
+    """
+    rng = np.random.default_rng(seed)
+    inputs = []
+    for shape in numpy_model.input_shapes:
+        high = 1.0 if len(shape) == 3 else 100.0
+        inputs.append(rng.uniform(0.0, high, size=(n_samples,) + shape).astype(np.float32))
+    expected = np.asarray(keras_model(inputs if len(inputs) > 1 else inputs[0], training=False))
+    actual = numpy_model.predict_inputs(inputs)
+    max_error = float(np.max(np.abs(expected - actual)))
+    if max_error > tolerance * max(1.0, float(np.max(np.abs(expected)))):
+        raise UnsupportedModelError(f"Parité NumPy / Keras non respectée (écart max {max_error:.2e}).")
+    return max_error
@@ -0,0 +1,105 @@
+# production_ledger.py
+# ===========================================================================================
+# 👉 Registre des fiches de production de l'écran Production (jeu.py) :
+#    - Se manipule comme la liste fiches_de_prod (itération, len, index, append, clear).
+#    - Tient à jour à chaque fiche, en O(1) amorti :
+#        * le poids total,
+#        * le poids des dernières ROLLING_WINDOWS_MIN minutes (fenêtres glissantes),
+#        * le poids par heure et par tranche de BUCKET_MIN minutes (graphe des longs postes).
+#    Les libellés kg/h et le graphe lisent ces agrégats au lieu de re-sommer toutes les fiches.
+#
+#    Une fiche est un dict {'Number', 'Time' (datetime), 'TimeStr', 'Weight', 'Color'},
+#    ajoutée dans l'ordre chronologique.
+# ===========================================================================================
+
+from collections import deque
+from collections.abc import Sequence
+from datetime import timedelta
+
+# Fenêtres glissantes du débit (min)
+ROLLING_WINDOWS_MIN = (15, 60)
+# Résolution des tranches de temps (min) : diviseur des tranches du graphe (CHART_BUCKETS_MIN)
+BUCKET_MIN = 5
+
+
+class ProductionLedger(Sequence):
+    """
+    Liste des fiches de production avec agrégats courants.
+    """
+
+    def __init__(self, fiches=(), windows_min=ROLLING_WINDOWS_MIN, bucket_min=BUCKET_MIN):
+        self.windows_min = tuple(windows_min)
+        self.bucket_min = bucket_min
+        self.clear()
+        self.extend(fiches)
+
+    def __getitem__(self, index):
+        return self._fiches[index]
+
+    def __len__(self):
+        return len(self._fiches)
+
+    def clear(self):
+        self._fiches = []
+        self.total_weight = 0.0
+        # minutes -> [deque de (heure, poids), poids dans la fenêtre]
+        self._windows = {m: [deque(), 0.0] for m in self.windows_min}
+        self.hourly = {}    # début de l'heure -> poids
+        self.buckets = {}   # début de la tranche -> [poids, couleur de la première fiche]
+
+    def append(self, item):
+        time, weight = item['Time'], item['Weight']
+        self._fiches.append(item)
+        self.total_weight += weight
+
+        for minutes, window in self._windows.items():
+            window[0].append((time, weight))
+            window[1] += weight
+            self._evict(minutes, time)
+
+        hour = time.replace(minute=0, second=0, microsecond=0)
+        self.hourly[hour] = self.hourly.get(hour, 0.0) + weight
+
+        start = hour + timedelta(minutes=time.minute - time.minute % self.bucket_min)
+        if start in self.buckets:
+            self.buckets[start][0] += weight
+        else:
+            self.buckets[start] = [weight, item.get('Color')]
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def _evict(self, minutes, now):
+        entries, _ = window = self._windows[minutes]
+        limit = now - timedelta(minutes=minutes)
+        while entries and entries[0][0] <= limit:
+            window[1] -= entries.popleft()[1]
+        if not entries:
+            window[1] = 0.0   # Pas de dérive des soustractions flottantes
+
+    def window_weight(self, minutes, now):
+        """
+        Poids produit pendant les minutes précédant now (fenêtre de ROLLING_WINDOWS_MIN).
+        """
+        if minutes not in self._windows:
+            raise ValueError(f"Fenêtre de {minutes} min non suivie (fenêtres : {self.windows_min}).")
+        self._evict(minutes, now)
+        return self._windows[minutes][1]
+
+    def window_rate(self, minutes, now):
+        """
+        Débit sur la fenêtre, en kg/h (poids de la fenêtre ramené à une heure).
+        """
+        return self.window_weight(minutes, now) * 60.0 / minutes
+
+    def shift_rate(self, start, now):
+        """
+        Débit du poste depuis start, en kg/h : le total tant que la première heure n'est pas écoulée.
+        """
+        if not self._fiches or start is None:
+            return 0.0
+        elapsed_hours = (now - start).total_seconds() / 3600.0
+        if elapsed_hours < 1:
+            return self.total_weight
+        return self.total_weight / elapsed_hours
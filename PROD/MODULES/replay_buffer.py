@@ -0,0 +1,163 @@
+# replay_buffer.py
+# ===========================================================================================
+# 👉 Mémoire de rejeu pour l'adaptation continue du modèle aux données de production :
+#    - Un buffer borné par produit (DATA/replay/<produit>.npz) alimenté par échantillonnage
+#      "réservoir" des sets d'entraînement : chaque échantillon déjà vu a la même probabilité
+#      d'être conservé, quelle que soit la taille de l'historique.
+#    - Images stockées en uint8 (sans perte par rapport aux vignettes décodées).
+#    - Empreinte de chaque échantillon vu : un set ré-entraîné ou une donnée de production
+#      ajoutée deux fois n'est pas recompté (probabilités du réservoir inchangées).
+#    - mixed_batches() : lots mélangeant échantillons rejoués et nouvelles données de production,
+#      pour mettre le modèle à jour sans oubli catastrophique ni reconstruction du dataset.
+# ===========================================================================================
+
+import os
+import hashlib
+import logging
+import numpy as np
+
+from data_utils import DATA_DIR
+from dataset_builder import from_unit_range, to_model_input
+
+REPLAY_DIR = os.path.join(DATA_DIR, "replay")
+REPLAY_CAPACITY = 2000
+
+
+def _row_key(image, numeric, target):
+    """
+    Empreinte 64 bits d'un échantillon (image uint8, caractéristiques et cibles float32).
+    """
+    h = hashlib.blake2b(digest_size=8)
+    h.update(np.ascontiguousarray(image).tobytes())
+    h.update(np.ascontiguousarray(numeric, dtype=np.float32).tobytes())
+    h.update(np.ascontiguousarray(target, dtype=np.float32).tobytes())
+    return int.from_bytes(h.digest(), 'little')
+
+logger = logging.getLogger("replay_buffer")
+
+
+class ReplayBuffer:
+    """
+    Buffer de rejeu borné (échantillonnage réservoir, algorithme R).
+
+    Utilisation :
+        buffer = ReplayBuffer.load("Ail")
+        buffer.add(X_image, X_numeric, Y)     # après chaque entraînement réussi
+        buffer.save()
+        X_image, X_numeric, Y = buffer.sample(16, rng)
+    """
+
+    def __init__(self, product_type, capacity=REPLAY_CAPACITY, path=None, seed=None):
+        self.product_type = product_type
+        self.capacity = capacity
+        self.path = path or os.path.join(REPLAY_DIR, f"{product_type}.npz")
+        self.images = None
+        self.numeric = None
+        self.targets = None
+        self.size = 0
+        self.seen = 0
+        self.keys = set()    # Empreintes des échantillons déjà vus (conservés ou non)
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def load(cls, product_type, capacity=REPLAY_CAPACITY, path=None):
+        """
+        Relit le buffer enregistré du produit (buffer vide s'il n'existe pas encore).
+        """
+        buffer = cls(product_type, capacity, path)
+        if not os.path.exists(buffer.path):
+            return buffer
+        try:
+            with np.load(buffer.path, allow_pickle=False) as data:
+                size = min(int(data['size']), capacity)
+                buffer._allocate(data['images'].shape[1:])
+                buffer.images[:size] = data['images'][:size]
+                buffer.numeric[:size] = data['numeric'][:size]
+                buffer.targets[:size] = data['targets'][:size]
+                buffer.size = size
+                buffer.seen = int(data['seen'])
+                if 'keys' in data:
+                    buffer.keys = set(int(k) for k in data['keys'])
+        except Exception as e:
+            logger.warning(f"Buffer de rejeu illisible ({buffer.path}), nouveau buffer : {e}")
+            return cls(product_type, capacity, path)
+        return buffer
+
+    def __len__(self):
+        return self.size
+
+    def _allocate(self, image_shape, numeric_dim=11, target_dim=11):
+        self.images = np.empty((self.capacity,) + tuple(image_shape), dtype=np.uint8)
+        self.numeric = np.empty((self.capacity, numeric_dim), dtype=np.float32)
+        self.targets = np.empty((self.capacity, target_dim), dtype=np.float32)
+
+    def add(self, X_image, X_numeric, Y):
+        """
+        Ajoute des échantillons (images uint8 ou normalisées [0, 1]) par échantillonnage réservoir.
+        Les échantillons déjà vus sont ignorés. Renvoie le nombre d'échantillons nouveaux.
+        """
+        if self.images is None:
+            self._allocate(X_image.shape[1:], X_numeric.shape[1], Y.shape[1])
+        added = 0
+        for i in range(len(Y)):
+            image = X_image[i]
+            if image.dtype != np.uint8:
+                image = from_unit_range(image, np.uint8)
+            key = _row_key(image, X_numeric[i], Y[i])
+            if key in self.keys:
+                continue
+            self.keys.add(key)
+            added += 1
+            if self.size < self.capacity:
+                slot = self.size
+                self.size += 1
+            else:
+                slot = int(self._rng.integers(self.seen + 1))
+                if slot >= self.capacity:
+                    self.seen += 1
+                    continue
+            self.images[slot] = image
+            self.numeric[slot] = X_numeric[i]
+            self.targets[slot] = Y[i]
+            self.seen += 1
+        return added
+
+    def sample(self, n, rng=None):
+        """
+        n échantillons tirés au hasard (avec remise), images float32 [0, 1].
+        """
+        rng = rng or self._rng
+        rows = np.sort(rng.integers(self.size, size=n))
+        return to_model_input(self.images[rows]), self.numeric[rows], self.targets[rows]
+
+    def save(self):
+        if self.images is None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, images=self.images[:self.size], numeric=self.numeric[:self.size],
+                     targets=self.targets[:self.size], size=self.size, seen=self.seen,
+                     keys=np.array(sorted(self.keys), dtype=np.uint64))
+        os.replace(tmp_path, self.path)
+        logger.info(f"Buffer de rejeu {self.product_type} : {self.size}/{self.capacity} échantillons "
+                    f"({self.seen} vus).")
+
+
+def mixed_batches(buffer, X_image, X_numeric, Y, n_steps, batch_size, replay_ratio=0.5, seed=None):
+    """
+    Génère n_steps lots (X_image, X_numeric, Y) : une part replay_ratio tirée du buffer,
+    le reste tiré (avec remise) des nouvelles données. Sans buffer, lots de nouvelles données seules.
+    """
+    rng = np.random.default_rng(seed)
+    n_replay = int(round(batch_size * replay_ratio)) if len(buffer) else 0
+    n_new = max(batch_size - n_replay, 1)
+    for _ in range(n_steps):
+        rows = rng.integers(len(Y), size=n_new)
+        images, numeric, targets = X_image[rows], X_numeric[rows], Y[rows]
+        if n_replay:
+            r_images, r_numeric, r_targets = buffer.sample(n_replay, rng)
+            images = np.concatenate([images, r_images])
+            numeric = np.concatenate([numeric, r_numeric])
+            targets = np.concatenate([targets, r_targets])
+        yield images, numeric, targets
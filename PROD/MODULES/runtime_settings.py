@@ -0,0 +1,156 @@
+# runtime_settings.py
+# ===========================================================================================
+# 👉 Réglages d'exécution TensorFlow pour l'entraînement sur CPU (clés de MODEL_PARAMS) :
+#    - intra_op_threads / inter_op_threads : threads TensorFlow (0 = valeur par défaut de TF).
+#    - onednn : optimisations oneDNN (variable TF_ENABLE_ONEDNN_OPTS, lue à l'import de TF).
+#    - mixed_precision : politique Keras "mixed_bfloat16", seulement si le CPU gère le bfloat16
+#      nativement (AVX512-BF16 / AMX) ; sinon float32 (l'émulation serait plus lente).
+#    - xla_jit : compilation XLA des graphes.
+#    Les variables d'environnement et le nombre de threads n'ont d'effet qu'avant l'initialisation
+#    de TensorFlow : les réglages sont donc appliqués au démarrage du processus d'entraînement.
+#    Ce module n'importe TensorFlow qu'à l'appel de apply_runtime_settings().
+# ===========================================================================================
+
+import os
+import sys
+import time
+import logging
+import platform
+
+RUNTIME_PARAM_KEYS = ("intra_op_threads", "inter_op_threads", "onednn", "mixed_precision", "xla_jit")
+
+logger = logging.getLogger("runtime_settings")
+
+
+def bf16_supported():
+    """
+    True si le CPU exécute le bfloat16 nativement (Linux : drapeaux avx512_bf16 / amx_bf16).
+    """
+    if platform.system() != "Linux":
+        return False
+    try:
+        with open("/proc/cpuinfo", 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith("flags"):
+                    flags = line.split(":", 1)[1].split()
+                    return "avx512_bf16" in flags or "amx_bf16" in flags
+    except OSError:
+        pass
+    return False
+
+
+def apply_runtime_settings(params, manage_threads=True):
+    """
+    Applique les réglages d'exécution de params avant la construction du modèle.
+    manage_threads=False laisse les threads à l'appelant (workers de validation croisée).
+    Renvoie les réglages effectifs (voir describe_runtime).
+    """
+    tf_loaded = "tensorflow" in sys.modules
+    onednn = "1" if params.get('onednn', True) else "0"
+    # Variable absente : oneDNN actif (défaut de TensorFlow sur x86)
+    if os.environ.get("TF_ENABLE_ONEDNN_OPTS", "1") != onednn:
+        if tf_loaded:
+            logger.warning("oneDNN : TensorFlow déjà chargé, le réglage s'appliquera au prochain processus.")
+        os.environ["TF_ENABLE_ONEDNN_OPTS"] = onednn
+
+    intra = int(params.get('intra_op_threads', 0) or 0)
+    inter = int(params.get('inter_op_threads', 0) or 0)
+    if manage_threads and not tf_loaded:
+        if intra > 0:
+            os.environ["OMP_NUM_THREADS"] = str(intra)
+            os.environ["TF_NUM_INTRAOP_THREADS"] = str(intra)
+        if inter > 0:
+            os.environ["TF_NUM_INTEROP_THREADS"] = str(inter)
+
+    import tensorflow as tf
+    from tensorflow import keras
+
+    if manage_threads:
+        for value, getter, setter in ((intra, tf.config.threading.get_intra_op_parallelism_threads,
+                                       tf.config.threading.set_intra_op_parallelism_threads),
+                                      (inter, tf.config.threading.get_inter_op_parallelism_threads,
+                                       tf.config.threading.set_inter_op_parallelism_threads)):
+            if value > 0 and getter() != value:
+                try:
+                    setter(value)
+                except RuntimeError:
+                    logger.warning("Threads TensorFlow : runtime déjà initialisé, réglage ignoré dans ce processus.")
+
+    policy = "float32"
+    if params.get('mixed_precision', False):
+        if bf16_supported():
+            policy = "mixed_bfloat16"
+        else:
+            logger.warning("bfloat16 non géré nativement par ce CPU : entraînement en float32.")
+    if keras.mixed_precision.global_policy().name != policy:
+        keras.mixed_precision.set_global_policy(policy)
+
+    tf.config.optimizer.set_jit(bool(params.get('xla_jit', False)))
+
+    runtime = describe_runtime()
+    logger.info(f"Réglages d'exécution : {format_runtime(runtime)}")
+    return runtime
+
+
+def describe_runtime():
+    """
+    Réglages effectivement en vigueur dans ce processus (TensorFlow doit être chargé).
+    """
+    import tensorflow as tf
+    from tensorflow import keras
+    return {
+        'intra_op_threads': tf.config.threading.get_intra_op_parallelism_threads(),
+        'inter_op_threads': tf.config.threading.get_inter_op_parallelism_threads(),
+        'onednn': os.environ.get("TF_ENABLE_ONEDNN_OPTS", "") != "0",
+        'precision': keras.mixed_precision.global_policy().name,
+        'xla_jit': bool(tf.config.optimizer.get_jit()),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def format_runtime(runtime):
+    intra, inter = (runtime[k] or "auto" for k in ('intra_op_threads', 'inter_op_threads'))
+    text = (f"threads {intra}/{inter}, "
+            f"oneDNN {'oui' if runtime['onednn'] else 'non'}, {runtime['precision']}, "
+            f"XLA {'oui' if runtime['xla_jit'] else 'non'}")
+    if 'samples_per_s' in runtime:
+        text += f" : {runtime['samples_per_s']:.1f} éch./s"
+    return text
+
+
+def make_throughput_callback(n_samples):
+    """
+    Callback Keras mesurant la phase d'entraînement de chaque époque (chronomètre arrêté au
+    début de la validation). report() renvoie la première époque (traçage / compilation du
+    graphe compris) et le débit moyen d'entraînement des suivantes.
+    """
+    from tensorflow import keras
+
+    class ThroughputCallback(keras.callbacks.Callback):
+        def on_train_begin(self, logs=None):
+            self.epoch_times = []
+
+        def on_epoch_begin(self, epoch, logs=None):
+            self.epoch_start = time.perf_counter()
+
+        def _stop_clock(self):
+            if self.epoch_start is not None:
+                self.epoch_times.append(time.perf_counter() - self.epoch_start)
+                self.epoch_start = None
+
+        def on_test_begin(self, logs=None):
+            # Validation en fin d'époque : exclue du débit d'entraînement
+            self._stop_clock()
+
+        def on_epoch_end(self, epoch, logs=None):
+            self._stop_clock()
+
+        def report(self):
+            if not self.epoch_times:
+                return {}
+            steady = self.epoch_times[1:] or self.epoch_times
+            epoch_time = sum(steady) / len(steady)
+            return {'first_epoch_time': self.epoch_times[0], 'epoch_time': epoch_time,
+                    'samples_per_s': n_samples / max(epoch_time, 1e-9)}
+
+    return ThroughputCallback()
@@ -0,0 +1,333 @@
+# sechoir_db.py
+# ===========================================================================================
+# 👉 Index SQLite de l'historique du séchoir (sechoir_data.db, à côté de sechoir_data.json).
+#    - Schéma normalisé : entrées, relevés tapis, températures de consigne, températures réelles.
+#    - Index sur l'horodatage et sur type_produit : "dernière entrée", "entrées Ail de la semaine"
+#      ou "tous les relevés entre deux heures" deviennent des requêtes indexées.
+#    - L'index est dérivé du journal (SechoirStore) : il est alimenté à chaque sauvegarde
+#      et reconstruit automatiquement s'il n'est plus synchronisé.
+#    - Outil de migration depuis un sechoir_data.json existant :
+#          python sechoir_db.py [chemin/vers/sechoir_data.json]
+# ===========================================================================================
+
+import os
+import sys
+import json
+import sqlite3
+import logging
+from collections.abc import Sequence
+from contextlib import closing
+
+NB_CELS = 6
+
+logger = logging.getLogger("sechoir_db")
+
+_TEMP_COLUMNS = ", ".join(f"cel{i} REAL" for i in range(1, NB_CELS + 1))
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT,
+    type_produit TEXT,
+    humide TEXT,
+    observations TEXT,
+    raw_json TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tapis (
+    entry_id INTEGER NOT NULL REFERENCES entries(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    heure TEXT,
+    horodatage TEXT,
+    vit_stockeur REAL,
+    tapis1 REAL,
+    tapis2 REAL,
+    tapis3 REAL
+);
+CREATE TABLE IF NOT EXISTS temperatures_consignes (
+    entry_id INTEGER NOT NULL REFERENCES entries(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    heure TEXT,
+    horodatage TEXT,
+    {_TEMP_COLUMNS},
+    air_neuf REAL
+);
+CREATE TABLE IF NOT EXISTS temperatures_reelles (
+    entry_id INTEGER NOT NULL REFERENCES entries(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    heure TEXT,
+    horodatage TEXT,
+    {_TEMP_COLUMNS},
+    air_neuf REAL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_timestamp ON entries(timestamp);
+CREATE INDEX IF NOT EXISTS idx_entries_produit ON entries(type_produit, timestamp);
+CREATE INDEX IF NOT EXISTS idx_tapis_entry ON tapis(entry_id, position);
+CREATE INDEX IF NOT EXISTS idx_tapis_horodatage ON tapis(horodatage);
+CREATE INDEX IF NOT EXISTS idx_consignes_entry ON temperatures_consignes(entry_id, position);
+CREATE INDEX IF NOT EXISTS idx_consignes_horodatage ON temperatures_consignes(horodatage);
+CREATE INDEX IF NOT EXISTS idx_reelles_entry ON temperatures_reelles(entry_id, position);
+CREATE INDEX IF NOT EXISTS idx_reelles_horodatage ON temperatures_reelles(horodatage);
+"""
+
+READING_TABLES = ('tapis', 'temperatures_consignes', 'temperatures_reelles')
+
+
+def _to_real(value):
+    """
+    Convertit une valeur saisie (souvent une chaîne) en float, ou None si vide / invalide.
+    """
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def _horodatage(timestamp, heure):
+    """
+    Construit 'YYYY-MM-DD HH:MM' à partir de la date de l'entrée et de l'heure du relevé.
+    Si l'heure est absente ou invalide, on garde l'horodatage de l'entrée.
+    """
+    date_part = (timestamp or '')[:10]
+    heure = (heure or '').strip()
+    if len(date_part) == 10 and len(heure) == 5 and heure[2] == ':' and heure.replace(':', '').isdigit():
+        return f"{date_part} {heure}"
+    return (timestamp or '')[:16] or None
+
+
+class SechoirIndex:
+    """
+    Base SQLite normalisée de l'historique du séchoir.
+    Chaque opération ouvre sa propre connexion : utilisable depuis les threads d'entraînement.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = os.path.abspath(db_path)
+
+    def exists(self):
+        return os.path.exists(self.db_path)
+
+    def _connect(self, create=False):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA foreign_keys = ON")
+        if create:
+            conn.executescript(SCHEMA)
+        return conn
+
+    # ---------------------------------------------------------------------------------------
+    # Écriture
+    # ---------------------------------------------------------------------------------------
+    @staticmethod
+    def _insert_entry(cursor, entry):
+        four_data = entry.get('four_data', {}) or {}
+        produit = four_data.get('produit', {}) or {}
+        timestamp = entry.get('timestamp', '')
+        cursor.execute(
+            "INSERT INTO entries (timestamp, type_produit, humide, observations, raw_json) VALUES (?, ?, ?, ?, ?)",
+            (timestamp, produit.get('type_produit'), produit.get('humide'), produit.get('observations'),
+             json.dumps(entry, ensure_ascii=False, separators=(',', ':')))
+        )
+        entry_id = cursor.lastrowid
+
+        cursor.executemany(
+            "INSERT INTO tapis (entry_id, position, heure, horodatage, vit_stockeur, tapis1, tapis2, tapis3) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(entry_id, pos, t.get('heure'), _horodatage(timestamp, t.get('heure')),
+              _to_real(t.get('vit_stockeur')), _to_real(t.get('tapis1')),
+              _to_real(t.get('tapis2')), _to_real(t.get('tapis3')))
+             for pos, t in enumerate(four_data.get('tapis', []))]
+        )
+
+        placeholders = ", ".join("?" * (NB_CELS + 5))
+        cel_names = ", ".join(f"cel{i}" for i in range(1, NB_CELS + 1))
+        for table, key in (('temperatures_consignes', 'temperatures_consignes'),
+                           ('temperatures_reelles', 'temperatures_reelles')):
+            rows = []
+            for pos, temp in enumerate(four_data.get(key, [])):
+                cels = list(temp.get('cels', []))[:NB_CELS]
+                cels += [None] * (NB_CELS - len(cels))
+                rows.append((entry_id, pos, temp.get('heure'), _horodatage(timestamp, temp.get('heure')),
+                             *[_to_real(c) for c in cels], _to_real(temp.get('air_neuf'))))
+            cursor.executemany(
+                f"INSERT INTO {table} (entry_id, position, heure, horodatage, {cel_names}, air_neuf) "
+                f"VALUES ({placeholders})",
+                rows
+            )
+
+    def append(self, entry, signature=None):
+        """
+        Ajoute une entrée à l'index et enregistre la signature du journal correspondante.
+        """
+        with closing(self._connect(create=True)) as conn:
+            with conn:
+                self._insert_entry(conn.cursor(), entry)
+                if signature is not None:
+                    self._set_meta(conn, 'signature', signature)
+
+    def rebuild(self, entries, signature=None):
+        """
+        Reconstruit entièrement l'index à partir de la liste d'entrées.
+        """
+        with closing(self._connect(create=True)) as conn:
+            with conn:
+                for table in READING_TABLES + ('entries',):
+                    conn.execute(f"DELETE FROM {table}")
+                cursor = conn.cursor()
+                for entry in entries:
+                    self._insert_entry(cursor, entry)
+                self._set_meta(conn, 'signature', signature)
+        logger.info(f"Index SQLite du séchoir reconstruit ({len(entries)} entrées) : {self.db_path}")
+
+    @staticmethod
+    def _set_meta(conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def get_signature(self):
+        if not self.exists():
+            return None
+        try:
+            with closing(self._connect()) as conn:
+                row = conn.execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def set_signature(self, signature):
+        with closing(self._connect(create=True)) as conn:
+            with conn:
+                self._set_meta(conn, 'signature', signature)
+
+    # ---------------------------------------------------------------------------------------
+    # Requêtes
+    # ---------------------------------------------------------------------------------------
+    def _query(self, sql, params=()):
+        if not self.exists():
+            return []
+        with closing(self._connect()) as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def count(self):
+        rows = self._query("SELECT COUNT(*) FROM entries")
+        return rows[0][0] if rows else 0
+
+    def entry_at(self, index):
+        """
+        Renvoie l'entrée à la position index (négatif accepté : -1 = dernière entrée) ou None.
+        """
+        if index < 0:
+            rows = self._query("SELECT raw_json FROM entries ORDER BY id DESC LIMIT 1 OFFSET ?", (-index - 1,))
+        else:
+            rows = self._query("SELECT raw_json FROM entries ORDER BY id LIMIT 1 OFFSET ?", (index,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def last_entry(self):
+        return self.entry_at(-1)
+
+    def iter_entries(self):
+        """
+        Parcourt les entrées dans l'ordre d'enregistrement sans tout charger en mémoire.
+        """
+        if not self.exists():
+            return
+        with closing(self._connect()) as conn:
+            for (raw,) in conn.execute("SELECT raw_json FROM entries ORDER BY id"):
+                yield json.loads(raw)
+
+    def entries_for_product(self, type_produit, since=None, until=None):
+        """
+        Entrées d'un type de produit, éventuellement bornées par horodatage
+        (chaînes 'YYYY-MM-DD' ou 'YYYY-MM-DD HH:MM:SS', bornes incluses).
+        """
+        sql = "SELECT raw_json FROM entries WHERE type_produit = ?"
+        params = [type_produit]
+        if since:
+            sql += " AND timestamp >= ?"
+            params.append(since)
+        if until:
+            sql += " AND timestamp <= ?"
+            params.append(until)
+        sql += " ORDER BY timestamp, id"
+        return [json.loads(raw) for (raw,) in self._query(sql, params)]
+
+    def entries_between(self, since=None, until=None):
+        sql = "SELECT raw_json FROM entries WHERE 1 = 1"
+        params = []
+        if since:
+            sql += " AND timestamp >= ?"
+            params.append(since)
+        if until:
+            sql += " AND timestamp <= ?"
+            params.append(until)
+        sql += " ORDER BY timestamp, id"
+        return [json.loads(raw) for (raw,) in self._query(sql, params)]
+
+    def readings_between(self, start, end, table='tapis'):
+        """
+        Tous les relevés d'une table (tapis, temperatures_consignes, temperatures_reelles)
+        dont l'horodatage 'YYYY-MM-DD HH:MM' est compris entre start et end (inclus).
+        Renvoie une liste de dict (colonnes de la table + type_produit de l'entrée).
+        """
+        if table not in READING_TABLES:
+            raise ValueError(f"Table de relevés inconnue : {table}")
+        if not self.exists():
+            return []
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                f"SELECT r.*, e.type_produit FROM {table} r JOIN entries e ON e.id = r.entry_id "
+                f"WHERE r.horodatage BETWEEN ? AND ? ORDER BY r.horodatage, r.entry_id, r.position",
+                (start, end)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+class SechoirHistory(Sequence):
+    """
+    Vue en lecture seule de l'historique, adossée à l'index SQLite.
+    S'utilise comme une liste (len, itération, history[-1]) sans parser tout le JSON.
+    """
+
+    def __init__(self, index):
+        self.index = index
+
+    def __len__(self):
+        return self.index.count()
+
+    def __bool__(self):
+        return self.index.entry_at(0) is not None
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        entry = self.index.entry_at(i)
+        if entry is None:
+            raise IndexError("Index hors de l'historique du séchoir.")
+        return entry
+
+    def __iter__(self):
+        return self.index.iter_entries()
+
+
+def migrate_json_to_sqlite(json_path):
+    """
+    Construit (ou reconstruit) l'index SQLite à partir d'un sechoir_data.json existant
+    et de son éventuel journal. Renvoie le nombre d'entrées migrées.
+    """
+    from sechoir_store import SechoirStore
+    store = SechoirStore(json_path)
+    if not store.exists():
+        raise FileNotFoundError(f"Aucune donnée séchoir trouvée : {json_path}")
+    return store.rebuild_index()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    if len(sys.argv) > 1:
+        source = sys.argv[1]
+    else:
+        source = os.path.join(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')), 'sechoir_data.json')
+    nb = migrate_json_to_sqlite(source)
+    print(f"{nb} entrées migrées vers {os.path.splitext(os.path.abspath(source))[0]}.db")
@@ -0,0 +1,320 @@
+# sechoir_store.py
+# ===========================================================================================
+# 👉 Ce module gère le stockage journalisé des données du séchoir (sechoir_data.json) :
+#    - Chaque sauvegarde ajoute UNE ligne JSON à la fin d'un segment de journal
+#      (sechoir_data.journal-000001.jsonl, ...), suivie d'un flush + fsync.
+#      Le coût d'une sauvegarde ne dépend donc plus de la taille de l'historique.
+#    - sechoir_data.json reste l'instantané compacté (tableau JSON, même format qu'avant).
+#      Il n'est réécrit que lors d'une compaction : fichier temporaire + fsync + renommage atomique.
+#    - La lecture fusionne l'instantané et les segments. Une ligne tronquée par un crash
+#      pendant l'écriture est ignorée au lieu de faire perdre tout le fichier.
+#    - Un index SQLite (sechoir_data.db, voir sechoir_db.py) est tenu à jour à chaque ajout
+#      pour les requêtes indexées (dernière entrée, entrées par produit / période).
+# ===========================================================================================
+
+import os
+import re
+import json
+import logging
+
+from sechoir_db import SechoirIndex, SechoirHistory
+
+SECHOIR_FILENAME = 'sechoir_data.json'
+
+# Taille à partir de laquelle on ouvre un nouveau segment de journal.
+SEGMENT_MAX_BYTES = 256 * 1024
+# Nombre de segments scellés au-delà duquel on compacte dans l'instantané.
+COMPACT_AFTER_SEGMENTS = 8
+
+logger = logging.getLogger("sechoir_store")
+
+
+def _fsync_dir(directory):
+    """
+    Force l'écriture sur disque des entrées du répertoire (création / renommage).
+    Sans effet sur les systèmes qui ne permettent pas d'ouvrir un répertoire (Windows).
+    """
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_json_synced(path, data, indent=None):
+    """
+    Écrit data au format JSON dans path puis force l'écriture sur disque (fsync).
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class SechoirStore:
+    """
+    Accès aux données du séchoir (instantané JSON + journal JSON-lines).
+
+    Utilisation :
+    - append(entry) : ajoute une entrée (O(1), quelle que soit la taille de l'historique)
+    - load()        : renvoie la liste complète des entrées, dans l'ordre d'enregistrement
+    - compact()     : fusionne les segments dans l'instantané sechoir_data.json
+    - files()       : liste des fichiers composant le stockage (pour l'archivage)
+    - history()     : vue indexée (SQLite) de l'historique, utilisable comme une liste
+    - last_entry()  : dernière entrée via l'index, sans parser tout l'historique
+    """
+
+    def __init__(self, data_file):
+        self.data_file = os.path.abspath(data_file)
+        self.directory = os.path.dirname(self.data_file)
+        base_name = os.path.splitext(os.path.basename(self.data_file))[0]
+        self._segment_re = re.compile(r'^' + re.escape(base_name) + r'\.journal-(\d{6})\.jsonl$')
+        self._segment_prefix = base_name + '.journal-'
+        self._marker_file = self.data_file + '.compact'
+        self._tmp_file = self.data_file + '.tmp'
+        self.index = SechoirIndex(os.path.join(self.directory, base_name + '.db'))
+
+    @classmethod
+    def for_directory(cls, directory):
+        """
+        Crée le stockage pour le fichier sechoir_data.json situé dans directory.
+        """
+        return cls(os.path.join(directory, SECHOIR_FILENAME))
+
+    # ---------------------------------------------------------------------------------------
+    # Fichiers
+    # ---------------------------------------------------------------------------------------
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f"{self._segment_prefix}{number:06d}.jsonl")
+
+    def _segments(self):
+        """
+        Renvoie la liste triée des segments de journal sous forme de (numéro, chemin).
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        segments = []
+        for name in os.listdir(self.directory):
+            match = self._segment_re.match(name)
+            if match:
+                segments.append((int(match.group(1)), os.path.join(self.directory, name)))
+        segments.sort()
+        return segments
+
+    def segment_files(self):
+        return [path for _, path in self._segments()]
+
+    def files(self):
+        """
+        Liste des fichiers existants du stockage (instantané puis segments).
+        """
+        files = [self.data_file] if os.path.exists(self.data_file) else []
+        files += self.segment_files()
+        if self.index.exists():
+            files.append(self.index.db_path)
+        return files
+
+    def exists(self):
+        return os.path.exists(self.data_file) or bool(self._segments())
+
+    def signature(self):
+        """
+        Empreinte du contenu du stockage (noms et tailles des fichiers), calculée sans lecture.
+        Le journal n'étant modifié que par ajout ou compaction, elle change à chaque écriture.
+        """
+        parts = [[os.path.basename(path), os.path.getsize(path)]
+                 for path in [self.data_file] + self.segment_files() if os.path.exists(path)]
+        return json.dumps(parts)
+
+    def _read_marker(self):
+        """
+        Lit le marqueur de compaction. Il contient le dernier segment fusionné ('through')
+        et la taille attendue du nouvel instantané ('size').
+        """
+        if not os.path.exists(self._marker_file):
+            return None
+        try:
+            with open(self._marker_file, 'r', encoding='utf-8') as f:
+                marker = json.load(f)
+            return int(marker['through']), int(marker['size'])
+        except Exception as e:
+            logger.warning(f"Marqueur de compaction illisible ({self._marker_file}) : {e}")
+            return None
+
+    def _compacted_through(self):
+        """
+        Numéro du dernier segment déjà présent dans l'instantané (0 si aucun).
+        Une compaction interrompue après le renommage de l'instantané laisse un marqueur
+        dont la taille correspond à l'instantané : les segments couverts sont alors ignorés.
+        """
+        marker = self._read_marker()
+        if marker is None or not os.path.exists(self.data_file):
+            return 0
+        through, size = marker
+        if os.path.getsize(self.data_file) == size:
+            return through
+        return 0
+
+    def _recover(self):
+        """
+        Termine ou annule une compaction interrompue par un crash.
+        """
+        if not os.path.exists(self._marker_file):
+            return
+        through = self._compacted_through()
+        for number, path in self._segments():
+            if number <= through:
+                os.remove(path)
+        if os.path.exists(self._tmp_file):
+            os.remove(self._tmp_file)
+        os.remove(self._marker_file)
+        _fsync_dir(self.directory)
+        logger.info("Compaction interrompue du journal séchoir récupérée.")
+
+    # ---------------------------------------------------------------------------------------
+    # Lecture / écriture
+    # ---------------------------------------------------------------------------------------
+    def _read_snapshot(self):
+        if not os.path.exists(self.data_file):
+            return []
+        with open(self.data_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, list):
+            raise ValueError(f"Format invalide de {self.data_file}. Un tableau JSON est attendu.")
+        return data
+
+    @staticmethod
+    def _read_segment(path):
+        entries = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Ligne {line_no} tronquée ignorée dans {path}.")
+        return entries
+
+    def load(self):
+        """
+        Renvoie toutes les entrées (instantané + journal) dans l'ordre d'enregistrement.
+        Lève ValueError / json.JSONDecodeError si l'instantané est illisible.
+        """
+        entries = self._read_snapshot()
+        through = self._compacted_through()
+        for number, path in self._segments():
+            if number > through:
+                entries.extend(self._read_segment(path))
+        return entries
+
+    def append(self, entry):
+        """
+        Ajoute une entrée à la fin du journal : une seule ligne écrite puis synchronisée.
+        """
+        self._recover()
+        index_in_sync = self._index_in_sync()
+        segments = self._segments()
+        if segments and os.path.getsize(segments[-1][1]) < SEGMENT_MAX_BYTES:
+            path = segments[-1][1]
+            new_segment = False
+        else:
+            next_number = segments[-1][0] + 1 if segments else 1
+            path = self._segment_path(next_number)
+            new_segment = True
+
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n'
+        with open(path, 'a+b') as f:
+            # Si la dernière écriture a été interrompue, on repart sur une ligne propre
+            f.seek(0, os.SEEK_END)
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    line = '\n' + line
+            f.write(line.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+
+        # L'index n'est alimenté que s'il était à jour ; sinon il sera reconstruit à la lecture
+        if index_in_sync:
+            try:
+                self.index.append(entry, signature=self.signature())
+            except Exception as e:
+                logger.error(f"Erreur mise à jour de l'index séchoir : {e}", exc_info=True)
+
+        if new_segment:
+            _fsync_dir(self.directory)
+            if len(segments) >= COMPACT_AFTER_SEGMENTS:
+                self.compact()
+
+    def compact(self):
+        """
+        Fusionne l'instantané et tous les segments dans sechoir_data.json.
+        Étapes : écriture du fichier temporaire + fsync, marqueur de compaction,
+        renommage atomique, suppression des segments fusionnés puis du marqueur.
+        """
+        self._recover()
+        segments = self._segments()
+        if not segments:
+            return
+        index_in_sync = self._index_in_sync()
+        entries = self.load()
+        through = segments[-1][0]
+
+        _write_json_synced(self._tmp_file, entries, indent=4)
+        _write_json_synced(self._marker_file, {'through': through, 'size': os.path.getsize(self._tmp_file)})
+        os.replace(self._tmp_file, self.data_file)
+        _fsync_dir(self.directory)
+
+        for _, path in segments:
+            os.remove(path)
+        os.remove(self._marker_file)
+        _fsync_dir(self.directory)
+        if index_in_sync:
+            # Le contenu est identique : seule la signature de l'index change
+            self.index.set_signature(self.signature())
+        logger.info(f"Journal séchoir compacté : {len(entries)} entrées dans {self.data_file}.")
+
+    # ---------------------------------------------------------------------------------------
+    # Index SQLite
+    # ---------------------------------------------------------------------------------------
+    def _index_in_sync(self):
+        return self.index.exists() and self.index.get_signature() == self.signature()
+
+    def rebuild_index(self):
+        """
+        Reconstruit l'index SQLite depuis l'instantané et le journal (migration).
+        Renvoie le nombre d'entrées indexées.
+        """
+        self._recover()
+        entries = self.load()
+        self.index.rebuild(entries, signature=self.signature())
+        return len(entries)
+
+    def ensure_index(self):
+        """
+        Vérifie que l'index correspond au journal, et le reconstruit sinon.
+        """
+        if not self._index_in_sync():
+            self.rebuild_index()
+        return self.index
+
+    def history(self):
+        """
+        Vue de l'historique adossée à l'index SQLite (len, itération, history[-1]).
+        """
+        return SechoirHistory(self.ensure_index())
+
+    def last_entry(self):
+        """
+        Dernière entrée enregistrée, ou None si l'historique est vide.
+        """
+        if not self.exists():
+            return None
+        return self.ensure_index().last_entry()
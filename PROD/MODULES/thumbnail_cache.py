@@ -0,0 +1,335 @@
+# thumbnail_cache.py
+# ===========================================================================================
+# 👉 Cache disque des miniatures décodées (32x32 RGB) utilisées pour l'entraînement et la prédiction.
+#    - Clé : empreinte SHA-1 du contenu de l'image + taille de redimensionnement.
+#      (une photo déplacée ou renommée reste donc en cache)
+#    - Stockage : un tenseur uint8 (capacité, H, W, 3) au format .npy, ouvert en memmap,
+#      plus un index JSON (emplacements, ordre LRU, empreintes déjà calculées par chemin).
+#    - Éviction LRU : quand le tenseur est plein, l'emplacement le moins récemment utilisé est réutilisé.
+#    - Partage entre processus (interface, processus d'entraînement, workers de validation croisée) :
+#      verrou fichier (.lock) autour de l'attribution des emplacements et de l'écriture de l'index.
+#      Chaque emplacement attribué est ajouté au journal (.log) sous le verrou ; les autres
+#      processus le relisent avant toute lecture / attribution. flush() réécrit l'index complet
+#      et vide le journal.
+#    Les runs suivants évitent entièrement le décodage JPEG et le redimensionnement.
+# ===========================================================================================
+
+import os
+import json
+import atexit
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+from PIL import Image
+
+THUMBNAIL_CACHE_DIR = os.path.join("DATA", "thumbnails")
+THUMBNAIL_CACHE_CAPACITY = 20000  # ~60 Mo pour des miniatures 32x32
+
+logger = logging.getLogger("thumbnail_cache")
+
+
+def decode_thumbnail(path, size):
+    """
+    Ouvre une image, la convertit en RGB et la redimensionne.
+    Retourne un np.ndarray uint8 de forme (size[1], size[0], 3).
+    """
+    with Image.open(path) as img:
+        return np.asarray(img.convert("RGB").resize(size), dtype=np.uint8)
+
+
+if os.name == 'nt':
+    import msvcrt
+
+    def _lock_file(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue  # LK_LOCK abandonne après une dizaine de secondes : on réessaie
+
+    def _unlock_file(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock_file(fd):
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+    def _unlock_file(fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def _file_digest(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ThumbnailCache:
+    """
+    Cache persistant de miniatures pour une taille donnée.
+
+    - get(path)  : renvoie la miniature uint8 (décodée puis mise en cache si absente)
+    - flush()    : écrit le tenseur et l'index sur disque (appelé en fin de dataset et à la sortie)
+    - close()    : libère le verrou fichier (le cache est rouvert au prochain get)
+    - stats      : compteurs hits / misses
+    """
+
+    def __init__(self, size, cache_dir=THUMBNAIL_CACHE_DIR, capacity=THUMBNAIL_CACHE_CAPACITY):
+        self.size = tuple(size)
+        self.capacity = capacity
+        self.cache_dir = os.path.abspath(cache_dir)
+        name = f"thumbs_{self.size[0]}x{self.size[1]}"
+        self.tensor_file = os.path.join(self.cache_dir, name + ".npy")
+        self.index_file = os.path.join(self.cache_dir, name + ".json")
+        self.journal_file = os.path.join(self.cache_dir, name + ".log")
+        self.lock_file = os.path.join(self.cache_dir, name + ".lock")
+        self.shape = (capacity, self.size[1], self.size[0], 3)
+
+        self._lock = threading.Lock()  # Entre threads ; _interprocess_lock() entre processus
+        self._lock_fd = None
+        self._slots = OrderedDict()   # empreinte -> emplacement, du moins au plus récemment utilisé
+        self._owners = {}             # emplacement -> empreinte
+        self._digests = {}            # chemin -> [mtime_ns, taille, empreinte]
+        self._index_id = None         # (inode, mtime_ns, taille) de l'index lu
+        self._journal_pos = 0         # Octets du journal déjà relus
+        self._tensor = None
+        self._dirty = False
+        self.stats = {'hits': 0, 'misses': 0}
+
+    # ---------------------------------------------------------------------------------------
+    # Ouverture / persistance (appelées sous self._lock et _interprocess_lock)
+    # ---------------------------------------------------------------------------------------
+    @contextmanager
+    def _interprocess_lock(self):
+        if self._lock_fd is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._lock_fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        _lock_file(self._lock_fd)
+        try:
+            yield
+        finally:
+            _unlock_file(self._lock_fd)
+
+    def _open(self):
+        if self._tensor is not None:
+            return
+        try:
+            if not (os.path.exists(self.tensor_file) and os.path.exists(self.index_file)):
+                raise FileNotFoundError(self.tensor_file)
+            tensor = np.load(self.tensor_file, mmap_mode='r+')
+            if tensor.shape != self.shape or tensor.dtype != np.uint8:
+                raise ValueError(f"Forme inattendue {tensor.shape}")
+            self._tensor = tensor
+            self._load_index()
+        except Exception as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning(f"Cache de miniatures réinitialisé ({e}).")
+            self._tensor = np.lib.format.open_memmap(self.tensor_file, mode='w+', dtype=np.uint8, shape=self.shape)
+            self._slots = OrderedDict()
+            self._owners = {}
+            self._digests = {}
+            # Index vide écrit tout de suite : les autres processus voient la réinitialisation
+            self._write_index()
+
+    def _load_index(self):
+        """
+        Relit l'index complet puis le journal. Les empreintes par chemin déjà calculées ici sont conservées.
+        """
+        with open(self.index_file, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+            st = os.fstat(f.fileno())
+        self._index_id = (st.st_ino, st.st_mtime_ns, st.st_size)
+        self._slots = OrderedDict((d, int(slot)) for d, slot in index.get('slots', []))
+        self._owners = {slot: d for d, slot in self._slots.items()}
+        digests = index.get('digests', {})
+        digests.update(self._digests)
+        self._digests = digests
+        self._journal_pos = 0
+        self._replay_journal()
+
+    def _replay_journal(self):
+        try:
+            if os.path.getsize(self.journal_file) <= self._journal_pos:
+                return
+        except FileNotFoundError:
+            return
+        with open(self.journal_file, 'rb') as f:
+            f.seek(self._journal_pos)
+            data = f.read()
+            self._journal_pos = f.tell()
+        for line in data.decode('utf-8').splitlines():
+            digest, slot = json.loads(line)
+            self._assign(digest, slot)
+
+    def _sync(self):
+        """
+        Met à jour la vue locale avec les attributions des autres processus.
+        """
+        try:
+            st = os.stat(self.index_file)
+            index_id = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            # Cache supprimé : recréé vide
+            self._tensor = None
+            self._open()
+            return
+        if index_id != self._index_id:
+            # Index réécrit par un autre processus (flush ou réinitialisation)
+            self._load_index()
+        else:
+            self._replay_journal()
+
+    def _assign(self, digest, slot):
+        previous = self._owners.get(slot)
+        if previous is not None and previous != digest:
+            self._slots.pop(previous, None)  # Emplacement réutilisé (éviction LRU)
+        self._slots[digest] = slot
+        self._slots.move_to_end(digest)
+        self._owners[slot] = digest
+
+    def _write_index(self):
+        tmp = self.index_file + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'slots': list(self._slots.items()), 'digests': self._digests}, f)
+        os.replace(tmp, self.index_file)
+        # Attributions du journal désormais dans l'index
+        open(self.journal_file, 'wb').close()
+        st = os.stat(self.index_file)
+        self._index_id = (st.st_ino, st.st_mtime_ns, st.st_size)
+        self._journal_pos = 0
+        self._dirty = False
+
+    def flush(self):
+        """
+        Écrit le tenseur (memmap) et l'index de manière atomique, fusionné avec les
+        attributions des autres processus.
+        """
+        with self._lock:
+            if self._tensor is None or not self._dirty:
+                return
+            with self._interprocess_lock():
+                self._sync()
+                self._tensor.flush()
+                self._write_index()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)
+                self._lock_fd = None
+            self._tensor = None
+            self._index_id = None
+
+    # ---------------------------------------------------------------------------------------
+    # Accès
+    # ---------------------------------------------------------------------------------------
+    def _digest(self, path):
+        """
+        Empreinte du contenu ; recalculée seulement si la date ou la taille du fichier a changé.
+        """
+        st = os.stat(path)
+        known = self._digests.get(path)
+        if known and known[0] == st.st_mtime_ns and known[1] == st.st_size:
+            return known[2]
+        digest = _file_digest(path)
+        with self._lock:
+            self._digests[path] = [st.st_mtime_ns, st.st_size, digest]
+            self._dirty = True
+        return digest
+
+    def get(self, path):
+        """
+        Renvoie la miniature uint8 (H, W, 3) de l'image path.
+        Lève une exception (OSError, PIL.UnidentifiedImageError...) si l'image est illisible.
+        """
+        with self._lock, self._interprocess_lock():
+            self._open()
+        path = os.path.abspath(path)
+        digest = self._digest(path)
+
+        with self._lock, self._interprocess_lock():
+            self._sync()
+            slot = self._slots.get(digest)
+            if slot is not None:
+                self._slots.move_to_end(digest)
+                self.stats['hits'] += 1
+                self._dirty = True
+                return np.array(self._tensor[slot])
+
+        thumb = decode_thumbnail(path, self.size)
+
+        with self._lock, self._interprocess_lock():
+            self._sync()
+            self.stats['misses'] += 1
+            if digest in self._slots:
+                return thumb
+            if len(self._slots) < self.capacity:
+                slot = len(self._slots)
+            else:
+                slot = next(iter(self._slots.values()))
+            self._tensor[slot] = thumb
+            self._assign(digest, slot)
+            with open(self.journal_file, 'ab') as f:
+                f.write((json.dumps([digest, slot]) + "\n").encode('utf-8'))
+            self._dirty = True
+        return thumb
+
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_thumbnail_cache(size):
+    """
+    Cache partagé (un par taille de miniature) pour tout le processus.
+    """
+    size = tuple(size)
+    with _CACHES_LOCK:
+        cache = _CACHES.get(size)
+        if cache is None:
+            cache = ThumbnailCache(size)
+            _CACHES[size] = cache
+        return cache
+
+
+def load_thumbnail(path, size):
+    """
+    Miniature normalisée float32 [0, 1] de forme (size[1], size[0], 3), via le cache disque.
+    """
+    return get_thumbnail_cache(size).get(path).astype(np.float32) / 255.0
+
+
+def flush_thumbnail_caches():
+    for cache in list(_CACHES.values()):
+        try:
+            cache.flush()
+        except Exception as e:
+            logger.error(f"Erreur écriture du cache de miniatures : {e}", exc_info=True)
+
+
+def reset_thumbnail_caches():
+    """
+    Écrit puis oublie les caches partagés : les suivants seront ouverts dans le répertoire
+    courant (ex : répertoire de travail du benchmark).
+    """
+    with _CACHES_LOCK:
+        caches = list(_CACHES.values())
+        _CACHES.clear()
+    for cache in caches:
+        try:
+            cache.close()
+        except Exception as e:
+            logger.error(f"Erreur écriture du cache de miniatures : {e}", exc_info=True)
+
+
+atexit.register(flush_thumbnail_caches)
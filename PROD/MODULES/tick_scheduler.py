@@ -0,0 +1,153 @@
+# tick_scheduler.py
+# ===========================================================================================
+# 👉 Planificateur unique des tâches périodiques de l'interface Tk (horloges, chronos,
+#    graphes, boutons clignotants) :
+#    - Une seule boucle after() par fenêtre principale, réveillée à la prochaine échéance,
+#      au lieu d'une boucle after() par widget.
+#    - Une tâche rattachée à un widget est suspendue tant que le widget n'est pas visible
+#      (frame masqué par switch_module, fenêtre réduite) ; elle s'exécute dès qu'il réapparaît.
+#      Elle est supprimée quand le widget est détruit.
+#    - Temps CPU (thread Tk) et nombre d'appels par tâche : report() / format_report(),
+#      écrits dans le journal toutes les REPORT_INTERVAL_MS.
+#
+#    Utilisation :
+#        ticks = get_scheduler(widget)
+#        ticks.every(1000, self.update_clock, widget=self.clock_label)
+# ===========================================================================================
+
+import time
+import logging
+
+# Délai maximal entre deux vérifications de visibilité des tâches suspendues (ms)
+VISIBILITY_POLL_MS = 250
+# Intervalle du rapport de temps CPU dans le journal (ms, 0 = jamais)
+REPORT_INTERVAL_MS = 10 * 60 * 1000
+
+logger = logging.getLogger("tick_scheduler")
+
+
+class TickTask:
+    """
+    Tâche périodique : callback appelé toutes les interval_ms, tant que widget est visible.
+    """
+
+    def __init__(self, interval_ms, callback, widget=None, name=None):
+        self.interval = interval_ms / 1000.0
+        self.callback = callback
+        self.widget = widget
+        self.name = name or getattr(callback, '__qualname__', repr(callback))
+        self.next_due = time.perf_counter()
+        self.calls = 0
+        self.cpu_time = 0.0
+        self.wall_time = 0.0
+        self.skipped = 0     # Échéances passées pendant que le widget était masqué
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def is_visible(self):
+        return self.widget is None or bool(self.widget.winfo_viewable())
+
+
+class TickScheduler:
+    """
+    Boucle after() unique partagée par toutes les tâches périodiques d'une fenêtre Tk.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.tasks = []
+        self._after_id = None
+        if REPORT_INTERVAL_MS:
+            self.every(REPORT_INTERVAL_MS, self.log_report, name="rapport tick_scheduler", run_now=False)
+
+    def every(self, interval_ms, callback, widget=None, name=None, run_now=True):
+        """
+        Appelle callback() toutes les interval_ms (immédiatement si run_now).
+        widget : la tâche ne tourne que lorsqu'il est visible. Renvoie la TickTask (cancel()).
+        """
+        task = TickTask(interval_ms, callback, widget, name)
+        if not run_now:
+            task.next_due += task.interval
+        self.tasks.append(task)
+        self._reschedule(0)
+        return task
+
+    def _reschedule(self, delay_ms):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self._after_id = self.root.after(max(int(delay_ms), 0), self._tick)
+
+    def _tick(self):
+        self._after_id = None
+        now = time.perf_counter()
+        waiting_hidden = False
+        for task in list(self.tasks):
+            if task.cancelled or (task.widget is not None and not task.widget.winfo_exists()):
+                self.tasks.remove(task)
+                continue
+            if now < task.next_due:
+                continue
+            if not task.is_visible():
+                # Suspendue : relancée dès que le widget redevient visible
+                waiting_hidden = True
+                continue
+            self._run(task)
+            # Pas de rafale de rattrapage : les échéances manquées sont sautées
+            missed = int((now - task.next_due) / task.interval)
+            task.skipped += missed
+            task.next_due += task.interval * (missed + 1)
+
+        if not self.tasks:
+            return
+        now = time.perf_counter()
+        delay = min(task.next_due for task in self.tasks) - now
+        if waiting_hidden:
+            delay = min(delay, VISIBILITY_POLL_MS / 1000.0)
+        self._reschedule(delay * 1000.0)
+
+    def _run(self, task):
+        cpu_start, wall_start = time.thread_time(), time.perf_counter()
+        try:
+            task.callback()
+        except Exception as e:
+            logger.error(f"Erreur dans la tâche périodique {task.name} : {e}", exc_info=True)
+        finally:
+            task.cpu_time += time.thread_time() - cpu_start
+            task.wall_time += time.perf_counter() - wall_start
+            task.calls += 1
+
+    def report(self):
+        """
+        Statistiques par tâche, de la plus coûteuse en CPU à la moins coûteuse.
+        """
+        rows = [{'name': t.name, 'interval_ms': t.interval * 1000.0, 'calls': t.calls,
+                 'cpu_ms': t.cpu_time * 1000.0, 'wall_ms': t.wall_time * 1000.0,
+                 'cpu_ms_per_call': t.cpu_time * 1000.0 / t.calls if t.calls else 0.0,
+                 'skipped': t.skipped, 'visible': t.is_visible()}
+                for t in self.tasks if not t.cancelled and (t.widget is None or t.widget.winfo_exists())]
+        return sorted(rows, key=lambda r: -r['cpu_ms'])
+
+    def format_report(self):
+        lines = [f"{'Tâche':<48}{'Période':>9}{'Appels':>8}{'CPU (ms)':>10}{'ms/appel':>10}{'Sautés':>8}"]
+        for r in self.report():
+            lines.append(f"{r['name']:<48}{r['interval_ms'] / 1000.0:>8.1f}s{r['calls']:>8}"
+                         f"{r['cpu_ms']:>10.1f}{r['cpu_ms_per_call']:>10.2f}{r['skipped']:>8}"
+                         + ("" if r['visible'] else "  (masquée)"))
+        return "\n".join(lines)
+
+    def log_report(self):
+        logger.info(f"Tâches périodiques :\n{self.format_report()}")
+
+
+def get_scheduler(widget):
+    """
+    Planificateur partagé de la fenêtre principale de widget (créé au premier appel).
+    """
+    root = widget._root()
+    scheduler = getattr(root, '_tick_scheduler', None)
+    if scheduler is None:
+        scheduler = TickScheduler(root)
+        root._tick_scheduler = scheduler
+    return scheduler
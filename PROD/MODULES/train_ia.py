@@ -1,6 +1,7 @@
 # train_ia.py
 import os
 import json
+import time
 import logging
 import threading
 import numpy as np
@@ -9,15 +10,23 @@ from tkinter import ttk, messagebox, filedialog
 from PIL import Image
 from datetime import datetime
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
-from sklearn.model_selection import KFold
-from tensorflow.keras.callbacks import ModelCheckpoint
 
-from data_utils import (THEME, DATA_DIR, MODELS_DIR, IMAGE_SIZE, NB_IMAGES_PER_SET,
-                        load_sechoir_data, extract_set_data, get_last_valid_temp_entry,
-                        load_model_from_file, get_latest_model, load_and_concat_images,
+from data_utils import (THEME, DATA_DIR, IMAGE_SIZE, NB_IMAGES_PER_SET,
+                        load_sechoir_data, load_last_sechoir_entry, extract_set_data, get_last_valid_temp_entry,
+                        load_model_from_file, get_latest_model, get_model_registry, load_and_concat_images,
                         safe_float)
+from dataset_builder import DatasetBuilder, assemble_samples, to_model_input
+from input_pipeline import make_training_dataset, split_validation_rows
+from feature_store import FeatureStore, FEATURE_STORE_EXTENSION, is_feature_store, sets_to_feature_store
+from fold_scheduler import CrossValidationJob, JobCancelled, temporary_store_path
+from hyperparam_search import HyperparameterSearch, SEARCH_SPACE
+from training_jobs import TrainingJob
+from model_quantization import calibration_sample, quantize_all, compare_variants, format_report
+from model_registry import dataset_fingerprint
+from replay_buffer import ReplayBuffer, REPLAY_CAPACITY, mixed_batches
+from runtime_settings import apply_runtime_settings, describe_runtime, format_runtime, make_throughput_callback
 from model_utils import (MODEL_PARAMS, build_model_from_params, save_model, create_optimizer,
-                         ParamWindow, HistoryWindow)
+                         create_training_callbacks, format_training_report, ParamWindow, HistoryWindow)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -25,6 +34,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger("train_ia")
 
+# Intervalle de lecture de la progression de l'entraînement (ms)
+TRAINING_POLL_MS = 200
+
 DATA_LOADED = False  # Indicateur global indiquant si les données du séchoir sont chargées.
 
 
@@ -40,7 +52,12 @@ class ModelController:
     def __init__(self, params):
         self.params = params
         self.model = None
+        self.model_path = None   # Fichier du modèle courant (registre des modèles)
         self.validated = False
+        self.cv_results = {}     # Dernière validation croisée par produit : {'params', 'metrics'}
+        self.training_report = None  # Dernier entraînement : époques effectuées, meilleure époque
+        self.cv_job = None
+        self.search_job = None
 
     def validate_model(self, model_name, model_type):
         if self.model is not None:
@@ -49,6 +66,8 @@ class ModelController:
             raise ValueError("Veuillez saisir un nom de modèle.")
         image_shape = (32, 32 * 6, 3)
         numeric_dim = 11
+        # Précision mixte et XLA doivent être en place avant la construction des couches
+        apply_runtime_settings(self.params)
         self.model = build_model_from_params(image_shape, numeric_dim, 11, self.params)
         self.validated = True
 
@@ -57,12 +76,21 @@ class ModelController:
         if m is None:
             raise ValueError("Impossible de charger le modèle.")
         self.model = m
+        self.model_path = path
         self.validated = True
 
     def is_validated(self):
         return self.validated and self.model is not None
 
-    def train_model(self, sets_info, product_type):
+    def train_model(self, sets_info, product_type, feature_store=None, extra_callbacks=None):
+        """
+        Entraîne le modèle sur les sets du produit donné.
+        Si un feature store (.rfs) est fourni, ses tableaux sont utilisés directement
+        (aucun décodage d'image ni lecture de l'historique séchoir).
+        extra_callbacks : callbacks Keras supplémentaires (suivi de progression, annulation).
+        Une part validation_split des sets sert à la validation : arrêt anticipé, réduction du
+        learning rate sur plateau et restauration des meilleurs poids (en mémoire).
+        """
         if not self.is_validated():
             raise ValueError("Modèle non validé pour l'entraînement.")
 
@@ -74,105 +102,138 @@ class ModelController:
 
         use_augmentation = self.params.get('use_augmentation', False)
 
-        X_image_list = []
-        X_num_list = []
-        Y_list = []
-
-        for s in sets_info:
-            set_name, set_product, img_list_conformes, img_list_non_conformes = s
-            if set_product == product_type:
-                X, Y = extract_set_data(img_list_conformes, img_list_non_conformes, use_augmentation=use_augmentation)
-                if X is not None and Y is not None:
-                    X_image, X_numeric = X
-                    X_image_list.append(X_image)
-                    X_num_list.append(X_numeric)
-                    Y_list.append(Y)
-
-        if not Y_list:
+        # L'augmentation est appliquée lot par lot par le pipeline tf.data, pas à la construction
+        builder = DatasetBuilder(use_augmentation=False,
+                                 image_dtype=self.params.get('dataset_dtype', 'uint8'))
+        if feature_store is not None:
+            X_image_all, X_numeric_all, Y_all = feature_store.arrays(product_type)
+        else:
+            X_image_all, X_numeric_all, Y_all = builder.build(sets_info, product_type)
+        if Y_all is None:
             raise ValueError("Aucun set pour ce type de produit.")
-
-        X_image_all = np.vstack(X_image_list)
-        X_numeric_all = np.vstack(X_num_list)
-        Y_all = np.vstack(Y_list)
+        fingerprint = dataset_fingerprint(X_image_all, X_numeric_all, Y_all)
+        n_samples = len(Y_all)
 
         n_epochs = self.params['n_epochs']
         batch_size = self.params['batch_size']
 
-        callbacks = []
-        if self.params.get('use_checkpoints', False):
-            checkpoint_path = os.path.join(MODELS_DIR, "best_model.h5")
-            checkpoint_cb = ModelCheckpoint(checkpoint_path, save_best_only=True, monitor='loss', mode='min')
-            callbacks.append(checkpoint_cb)
+        train_rows, val_rows = split_validation_rows(n_samples, self.params.get('validation_split', 0.1))
+        monitor = 'val_loss' if len(val_rows) else 'loss'
+        convergence_callbacks, best_weights = create_training_callbacks(self.params, monitor)
+        throughput = make_throughput_callback(len(train_rows))
+        callbacks = [throughput] + convergence_callbacks + list(extra_callbacks or [])
 
-        self.model.fit([X_image_all, X_numeric_all], Y_all,
-                       epochs=n_epochs, batch_size=batch_size, verbose=1, callbacks=callbacks)
-
-        if self.params.get('use_checkpoints', False):
-            if os.path.exists(checkpoint_path):
-                self.model.load_weights(checkpoint_path)
-                logger.info("Meilleur modèle rechargé depuis checkpoints.")
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        model_name = f"{product_type}_model_{timestamp}"
-        save_model(self.model, model_name)
+        calibration = None
+        try:
+            if self.params.get('quantize', False):
+                # Échantillon de calibration int8, copié avant la libération du dataset
+                calib_image, calib_numeric = calibration_sample(X_image_all, X_numeric_all)
+                calibration = [to_model_input(calib_image), np.array(calib_numeric, dtype=np.float32)]
+            dataset = make_training_dataset(X_image_all, X_numeric_all, Y_all, batch_size,
+                                            use_augmentation=use_augmentation, rows=train_rows)
+            val_dataset = None
+            if len(val_rows):
+                val_dataset = make_training_dataset(X_image_all, X_numeric_all, Y_all, batch_size,
+                                                    shuffle=False, rows=val_rows)
+            start = time.perf_counter()
+            self.model.fit(dataset, epochs=n_epochs, validation_data=val_dataset,
+                           verbose=0 if extra_callbacks else 1, callbacks=callbacks)
+            training_time = time.perf_counter() - start
+            runtime = dict(describe_runtime(), **throughput.report())
+            logger.info(f"Débit d'entraînement ({format_runtime(runtime)})")
+
+            self.training_report = best_weights.report(n_epochs)
+            logger.info(f"Entraînement : {format_training_report(self.training_report)}")
+
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            model_name = f"{product_type}_model_{timestamp}"
+            model_file = save_model(self.model, model_name)
+            if model_file is None:
+                raise ValueError(f"Échec de la sauvegarde du modèle '{model_name}' (voir le journal).")
+            self.model_path = model_file
+            get_model_registry().register(model_file, product_type, params=self.params, fingerprint=fingerprint,
+                                          n_samples=n_samples, training_time=training_time,
+                                          runtime=dict(runtime, **self.training_report))
+            if calibration is not None:
+                quantize_all(model_file, calibration)
+            # Uniquement après un entraînement réussi et sauvegardé
+            self._fill_replay_buffer(product_type, X_image_all, X_numeric_all, Y_all)
+        finally:
+            dataset = val_dataset = None
+            del X_image_all
+            builder.close()
         return model_name
 
-    def cross_validate(self, sets_info, product_type):
+    def cross_validate(self, sets_info, product_type, feature_store=None, on_fold=None):
+        """
+        Validation croisée (k-fold, éventuellement répétée) : les folds sont entraînés en parallèle
+        dans des processus séparés (fold_scheduler.py). on_fold(résultat, nb_terminés, nb_total)
+        est appelé à chaque fold terminé ; cancel_cross_validation() interrompt le calcul.
+        """
         if not self.is_validated():
             raise ValueError("Modèle non validé pour la validation croisée.")
 
+        store_path, rows, temp_store = self._shared_dataset(sets_info, product_type, feature_store)
+        self.cv_job = CrossValidationJob(store_path, rows, self.params,
+                                         n_splits=self.params.get('cv_splits', 5),
+                                         n_repeats=self.params.get('cv_repeats', 1),
+                                         max_workers=self.params.get('cv_workers', 0))
+        try:
+            metrics = self.cv_job.run(on_fold=on_fold)
+            self.cv_results[product_type] = {'params': dict(self.params), 'metrics': metrics}
+            return metrics
+        finally:
+            self.cv_job = None
+            if temp_store and os.path.exists(temp_store):
+                os.remove(temp_store)
+
+    def cancel_cross_validation(self):
+        job = self.cv_job
+        if job is not None:
+            job.cancel()
+
+    def _shared_dataset(self, sets_info, product_type, feature_store=None):
+        """
+        Dataset partagé avec les processus workers : (chemin du feature store, lignes du produit,
+        chemin du fichier temporaire à supprimer ou None).
+        """
+        if feature_store is not None:
+            rows = [i for i, meta in enumerate(feature_store.sets) if meta.get('product') == product_type]
+            if not rows:
+                raise ValueError("Aucun set pour le produit spécifié.")
+            return feature_store.path, rows, None
+
         filtered_sets = [s for s in sets_info if s[1] == product_type]
         if not filtered_sets:
             raise ValueError("Aucun set pour le produit spécifié.")
+        temp_store = temporary_store_path()
+        try:
+            n_sets = sets_to_feature_store(filtered_sets, temp_store)
+        except ValueError:
+            os.remove(temp_store)
+            raise ValueError("Impossible de constituer un dataset pour ce produit.")
+        return temp_store, range(n_sets), temp_store
+
+    def search_hyperparameters(self, sets_info, product_type, feature_store=None, on_trial=None):
+        """
+        Recherche d'hyperparamètres (hyperparam_search.py) à partir des paramètres courants.
+        L'étude est enregistrée par produit et reprise si elle a été interrompue.
+        Renvoie (meilleurs paramètres, résultat associé).
+        """
+        store_path, rows, temp_store = self._shared_dataset(sets_info, product_type, feature_store)
+        self.search_job = HyperparameterSearch(store_path, rows, self.params, study_name=product_type,
+                                               max_workers=self.params.get('cv_workers', 0))
+        try:
+            return self.search_job.run(on_trial=on_trial)
+        finally:
+            self.search_job = None
+            if temp_store and os.path.exists(temp_store):
+                os.remove(temp_store)
 
-        use_augmentation = self.params.get('use_augmentation', False)
-
-        X_image_list = []
-        X_num_list = []
-        Y_list = []
-        for s in filtered_sets:
-            set_name, set_product, img_list_conformes, img_list_non_conformes = s
-            X, Y = extract_set_data(img_list_conformes, img_list_non_conformes, use_augmentation=use_augmentation)
-            if X is not None and Y is not None:
-                X_image, X_numeric = X
-                X_image_list.append(X_image)
-                X_num_list.append(X_numeric)
-                Y_list.append(Y)
-
-        if not Y_list:
-            raise ValueError("Impossible de constituer un dataset pour la validation croisée.")
-
-        X_image_all = np.vstack(X_image_list)
-        X_numeric_all = np.vstack(X_num_list)
-        Y_all = np.vstack(Y_list)
-
-        n_splits = 5
-        kf = KFold(n_splits=n_splits, shuffle=True, random_state=42)
-        mse_scores = []
-        mae_scores = []
-        r2_scores = []
-
-        image_shape = (32, 32 * 6, 3)
-        numeric_dim = 11
-
-        for train_index, val_index in kf.split(X_image_all):
-            X_image_train, X_image_val = X_image_all[train_index], X_image_all[val_index]
-            X_num_train, X_num_val = X_numeric_all[train_index], X_numeric_all[val_index]
-            Y_train, Y_val = Y_all[train_index], Y_all[val_index]
-
-            model = build_model_from_params(image_shape, numeric_dim, 11, self.params)
-            model.fit([X_image_train, X_num_train], Y_train,
-                      epochs=self.params['n_epochs'], batch_size=self.params['batch_size'], verbose=0)
-            pred = model.predict([X_image_val, X_num_val], verbose=0)
-            mse = mean_squared_error(Y_val, pred)
-            mae = mean_absolute_error(Y_val, pred)
-            r2 = r2_score(Y_val, pred)
-
-            mse_scores.append(mse)
-            mae_scores.append(mae)
-            r2_scores.append(r2)
-
-        return np.mean(mse_scores), np.mean(mae_scores), np.mean(r2_scores)
+    def cancel_search(self):
+        job = self.search_job
+        if job is not None:
+            job.cancel()
 
     def evaluate(self, validation_data, model_type):
         if self.model is None:
@@ -183,32 +244,53 @@ class ModelController:
             if m is None:
                 raise ValueError("Impossible de charger le modèle.")
             self.model = m
+            self.model_path = latest
 
-        X_image_list = []
-        X_num_list = []
-        Y_list = []
+        X_image_val, X_num_val, Y_val = self._validation_arrays(validation_data)
+        pred = self.model.predict([X_image_val, X_num_val])
+        mse = mean_squared_error(Y_val, pred)
+        mae = mean_absolute_error(Y_val, pred)
+        r2 = r2_score(Y_val, pred)
+        if self.model_path:
+            get_model_registry().update_metrics(self.model_path, 'val', mse, mae, r2)
+        return mse, mae, r2
+
+    def record_cv_metrics(self, model_path, product_type, params):
+        """
+        Associe au modèle model_path la dernière validation croisée du produit,
+        si elle a été faite avec les mêmes paramètres.
+        """
+        cv = self.cv_results.get(product_type)
+        if cv is not None and cv['params'] == dict(params):
+            get_model_registry().update_metrics(model_path, 'cv', *cv['metrics'])
+
+    def quantization_report(self, validation_data, model_type):
+        """
+        Compare le dernier modèle du produit et ses variantes quantifiées (float16 / int8)
+        sur les données de validation : taille, latence, MSE / MAE et écarts au float32.
+        """
+        latest = get_latest_model(model_type)
+        if not latest:
+            raise ValueError("Aucun modèle disponible.")
+        X_image_val, X_num_val, Y_val = self._validation_arrays(validation_data)
+        report = compare_variants(latest, X_image_val, X_num_val, Y_val)
+        if len(report) < 2:
+            raise ValueError("Aucune variante quantifiée pour ce modèle (activer la quantification avant l'entraînement).")
+        return latest, report
+
+    def _validation_arrays(self, validation_data):
         # Pas d'augmentation sur validation externe
+        samples = []
         for entry in validation_data:
             img_list_conformes = entry.get('img_list_conformes', [])
             img_list_non_conformes = entry.get('img_list_non_conformes', [])
             X, Y = self.extract_from_validation_entry(entry, img_list_conformes, img_list_non_conformes)
             if X is not None and Y is not None:
-                X_image, X_numeric = X
-                X_image_list.append(X_image)
-                X_num_list.append(X_numeric)
-                Y_list.append(Y)
+                samples.append((X, Y))
 
-        if not Y_list:
+        if not samples:
             raise ValueError("Données validation non exploitables.")
-
-        X_image_val = np.vstack(X_image_list)
-        X_num_val = np.vstack(X_num_list)
-        Y_val = np.vstack(Y_list)
-        pred = self.model.predict([X_image_val, X_num_val])
-        mse = mean_squared_error(Y_val, pred)
-        mae = mean_absolute_error(Y_val, pred)
-        r2 = r2_score(Y_val, pred)
-        return mse, mae, r2
+        return assemble_samples(samples)
 
     def extract_from_validation_entry(self, entry, img_list_conformes, img_list_non_conformes):
         four_data = entry.get('four_data', {})
@@ -255,24 +337,34 @@ class ModelController:
 
         return (X_image, X_numeric), Y
 
-    def update_with_production(self, production_data_sets):
+    def _fill_replay_buffer(self, product_type, X_image, X_numeric, Y):
+        """
+        Alimente le buffer de rejeu du produit (échantillonnage réservoir des sets d'entraînement).
+        Les échantillons déjà présents (sets ré-entraînés) sont ignorés.
+        """
+        try:
+            buffer = ReplayBuffer.load(product_type, self.params.get('replay_capacity', REPLAY_CAPACITY))
+            added = buffer.add(X_image, X_numeric, Y)
+            if added:
+                buffer.save()
+            logger.info(f"Buffer de rejeu {product_type} : {added} nouveaux échantillons sur {len(Y)}.")
+        except Exception as e:
+            logger.warning(f"Buffer de rejeu non mis à jour : {e}")
+
+    def update_with_production(self, production_data_sets, product_type=None, on_step=None):
+        """
+        Adaptation continue : online_steps mises à jour (train_on_batch) sur des lots mélangeant
+        les nouvelles données de production et des échantillons rejoués du buffer du produit
+        (part replay_ratio), sans reconstruire le dataset. Les données de production rejoignent
+        ensuite le buffer. on_step(étape, nb_étapes, loss) est appelé après chaque lot.
+        Retourne la loss du dernier lot.
+        """
         if self.model is None:
             raise ValueError("Aucun modèle chargé pour la mise à jour.")
         if not production_data_sets:
             raise ValueError("Aucune donnée de production ajoutée.")
 
-        X_image_list = []
-        X_num_list = []
-        Y_list = []
-        for (X, Y) in production_data_sets:
-            X_image, X_numeric = X
-            X_image_list.append(X_image)
-            X_num_list.append(X_numeric)
-            Y_list.append(Y)
-
-        X_image_all = np.vstack(X_image_list)
-        X_numeric_all = np.vstack(X_num_list)
-        Y_all = np.vstack(Y_list)
+        X_image_all, X_numeric_all, Y_all = assemble_samples(production_data_sets)
 
         arch = self.params.get('architecture', 'Dense')
         if self.params.get('fine_tuning', False) and arch == 'CNN+Dense':
@@ -288,8 +380,24 @@ class ModelController:
                                    loss='mean_squared_error',
                                    metrics=['mae','mean_squared_error'])
 
-        self.model.fit([X_image_all, X_numeric_all], Y_all, epochs=1, batch_size=self.params['batch_size'], verbose=1)
-
+        capacity = self.params.get('replay_capacity', REPLAY_CAPACITY)
+        buffer = ReplayBuffer.load(product_type, capacity) if product_type else ReplayBuffer("", capacity)
+        n_steps = self.params.get('online_steps', 50)
+        loss = None
+        for step, (X_image, X_numeric, Y) in enumerate(
+                mixed_batches(buffer, X_image_all, X_numeric_all, Y_all, n_steps, self.params['batch_size'],
+                              replay_ratio=self.params.get('replay_ratio', 0.5)), start=1):
+            result = self.model.train_on_batch([X_image, X_numeric], Y)
+            loss = float(result[0] if isinstance(result, (list, tuple)) else result)
+            if on_step is not None:
+                on_step(step, n_steps, loss)
+        logger.info(f"Adaptation continue : {n_steps} lots ({len(Y_all)} nouveaux échantillons, "
+                    f"{len(buffer)} en rejeu), loss finale {loss:.4f}.")
+
+        if product_type:
+            buffer.add(X_image_all, X_numeric_all, Y_all)
+            buffer.save()
+        return loss
 
 def create_thematic_frame(parent, title=None, theme=THEME):
     if title:
@@ -315,6 +423,12 @@ class TrainIAModuleFrame(tk.Frame):
         self.model_algo_var = tk.StringVar(value=MODEL_PARAMS.get('model_label', 'Réseau de Neurones'))
 
         self.sets_info = []
+        self.feature_store = None  # Feature store (.rfs) chargé, tant que la liste des sets n'est pas modifiée
+        self.cv_status_var = tk.StringVar()
+        self.cv_thread = None
+        self.train_status_var = tk.StringVar()
+        self.training_job = None
+        self.search_status_var = tk.StringVar()
         self.img_paths_conformes = [tk.StringVar() for _ in range(NB_IMAGES_PER_SET)]
         self.img_paths_non_conformes = [tk.StringVar() for _ in range(NB_IMAGES_PER_SET)]
 
@@ -336,6 +450,8 @@ class TrainIAModuleFrame(tk.Frame):
         self.manual_re_air_var = tk.StringVar()
 
         self.production_data_sets = []
+        self.production_status_var = tk.StringVar()
+        self.production_thread = None
 
         self.setup_ui()
         self.update_ui_state()
@@ -465,13 +581,30 @@ class TrainIAModuleFrame(tk.Frame):
         product_combo_train = ttk.Combobox(train_frame, textvariable=self.train_product_type_var, values=["Ail", "Oignon", "Échalote"], state="readonly")
         product_combo_train.grid(row=0, column=1, padx=5, pady=5, sticky='w')
 
-        tk.Button(train_frame, text="Entraîner le modèle avec tous les sets (même produit)", bg=THEME['accent2'], fg='white', command=self.start_training_thread).grid(row=1, column=0, columnspan=2, pady=5)
-        tk.Button(train_frame, text="Validation Croisée Interne", bg=THEME['button_bg'], fg='white', command=self.start_cross_validation_thread).grid(row=2, column=0, columnspan=2, pady=5)
+        job_frame = tk.Frame(train_frame, bg=THEME['bg_section'])
+        job_frame.grid(row=1, column=0, columnspan=2, pady=5)
+        tk.Button(job_frame, text="Entraîner le modèle avec tous les sets (même produit)", bg=THEME['accent2'], fg='white', command=self.start_training_job).pack(side='left', padx=5)
+        self.pause_button = tk.Button(job_frame, text="Pause", bg=THEME['button_bg'], fg='white', command=self.toggle_pause_training)
+        self.pause_button.pack(side='left', padx=5)
+        tk.Button(job_frame, text="Annuler", bg=THEME['button_bg'], fg='white', command=self.cancel_training).pack(side='left', padx=5)
+        tk.Label(train_frame, textvariable=self.train_status_var, bg=THEME['bg_section'], fg='white').grid(row=5, column=0, columnspan=2, pady=5)
+        cv_frame = tk.Frame(train_frame, bg=THEME['bg_section'])
+        cv_frame.grid(row=2, column=0, columnspan=2, pady=5)
+        tk.Button(cv_frame, text="Validation Croisée Interne", bg=THEME['button_bg'], fg='white', command=self.start_cross_validation_thread).pack(side='left', padx=5)
+        tk.Button(cv_frame, text="Annuler", bg=THEME['button_bg'], fg='white', command=self.controller.cancel_cross_validation).pack(side='left', padx=5)
+        tk.Label(cv_frame, textvariable=self.cv_status_var, bg=THEME['bg_section'], fg='white').pack(side='left', padx=5)
+
+        search_frame = tk.Frame(train_frame, bg=THEME['bg_section'])
+        search_frame.grid(row=4, column=0, columnspan=2, pady=5)
+        tk.Button(search_frame, text="Recherche d'hyperparamètres", bg=THEME['button_bg'], fg='white', command=self.start_search_thread).pack(side='left', padx=5)
+        tk.Button(search_frame, text="Annuler", bg=THEME['button_bg'], fg='white', command=self.controller.cancel_search).pack(side='left', padx=5)
+        tk.Label(search_frame, textvariable=self.search_status_var, bg=THEME['bg_section'], fg='white').pack(side='left', padx=5)
 
         eval_frame = tk.Frame(train_frame, bg=THEME['bg_section'])
         eval_frame.grid(row=3, column=0, columnspan=2, pady=5)
         tk.Button(eval_frame, text="Charger dataset de validation", bg=THEME['button_bg'], fg='white', command=self.load_validation_data_action).pack(side='left', padx=5)
         tk.Button(eval_frame, text="Évaluer le modèle", bg=THEME['button_bg'], fg='white', command=self.evaluate_model_action).pack(side='left', padx=5)
+        tk.Button(eval_frame, text="Comparer variantes quantifiées", bg=THEME['button_bg'], fg='white', command=self.quantization_report_action).pack(side='left', padx=5)
 
         production_frame = create_thematic_frame(self.inner_frame, "Mode Production (adaptation continue)")
         production_frame.pack(padx=10, pady=10, fill='x')
@@ -479,7 +612,8 @@ class TrainIAModuleFrame(tk.Frame):
         tk.Label(production_frame, text="Ajouter de nouvelles données (conformes / non conformes + valeurs) en cours de production, puis réactualiser le modèle :", bg=THEME['bg_section'], fg='white').pack(padx=5, pady=5)
 
         tk.Button(production_frame, text="Ajouter données de Production", bg=THEME['accent'], fg='white', command=self.add_production_data_action).pack(padx=5, pady=5)
-        tk.Button(production_frame, text="Mettre à jour le modèle avec données de Production", bg=THEME['accent2'], fg='white', command=self.update_model_with_production_data_action).pack(padx=5, pady=5)
+        tk.Button(production_frame, text="Mettre à jour le modèle avec données de Production", bg=THEME['accent2'], fg='white', command=self.start_production_update_thread).pack(padx=5, pady=5)
+        tk.Label(production_frame, textvariable=self.production_status_var, bg=THEME['bg_section'], fg='white').pack(padx=5, pady=5)
 
     def update_ui_state(self):
         if self.controller.is_validated():
@@ -559,13 +693,21 @@ class TrainIAModuleFrame(tk.Frame):
                 messagebox.showerror("Erreur", f"Image invalide: {p}")
                 return
 
+        # On mémorise l'entrée séchoir utilisée pour que l'entraînement retrouve les mêmes valeurs
+        last_entry = load_last_sechoir_entry()
+        if last_entry is None:
+            messagebox.showerror("Erreur", "Aucune donnée séchoir n'est disponible.")
+            return
+
         use_augmentation = MODEL_PARAMS.get('use_augmentation', False)
-        X, Y = extract_set_data(img_conformes, img_non_conformes, use_augmentation=use_augmentation)
+        X, Y = extract_set_data(img_conformes, img_non_conformes, four_data=last_entry.get('four_data', {}),
+                                use_augmentation=use_augmentation)
         if X is None or Y is None:
             messagebox.showerror("Erreur", "Impossible d'extraire les données de ce set.")
             return
 
-        self.sets_info.append([set_name, set_product, img_conformes, img_non_conformes])
+        self.sets_info.append([set_name, set_product, img_conformes, img_non_conformes, last_entry.get('timestamp')])
+        self.feature_store = None
         self.sets_tree.insert("", "end", values=(set_name, set_product, 6))
         messagebox.showinfo("Set ajouté", f"Set '{set_name}' ajouté avec succès !")
 
@@ -606,29 +748,44 @@ class TrainIAModuleFrame(tk.Frame):
             self.validation_data = None
 
     def load_sets_action(self):
-        file_path = filedialog.askopenfilename(title="Charger sets (JSON)", filetypes=[("JSON", "*.json")])
+        file_path = filedialog.askopenfilename(title="Charger sets (JSON ou feature store)",
+                                               filetypes=[("Sets", f"*.json *{FEATURE_STORE_EXTENSION}"),
+                                                          ("JSON", "*.json"),
+                                                          ("Feature store", f"*{FEATURE_STORE_EXTENSION}")])
         if not file_path:
             return
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            if not isinstance(data, list):
-                raise ValueError("JSON invalide (liste attendue).")
+            feature_store = None
+            if is_feature_store(file_path):
+                feature_store = FeatureStore(file_path)
+                data = feature_store.sets_info()
+            else:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if not isinstance(data, list):
+                    raise ValueError("JSON invalide (liste attendue).")
             for i in self.sets_tree.get_children():
                 self.sets_tree.delete(i)
             self.sets_info = data
+            self.feature_store = feature_store
             for s in data:
-                if len(s) == 4:
+                if len(s) >= 4:
                     self.sets_tree.insert("", "end", values=(s[0], s[1], 6))
             messagebox.showinfo("Chargement", f"{len(data)} sets chargés.")
         except Exception as e:
             messagebox.showerror("Erreur", f"Impossible de charger les sets:\n{e}")
 
     def export_sets_action(self):
-        file_path = filedialog.asksaveasfilename(title="Exporter sets (JSON)", defaultextension=".json", filetypes=[("JSON", "*.json")])
+        file_path = filedialog.asksaveasfilename(title="Exporter sets (JSON ou feature store)", defaultextension=".json",
+                                                 filetypes=[("JSON", "*.json"),
+                                                            ("Feature store (images et données incluses)", f"*{FEATURE_STORE_EXTENSION}")])
         if not file_path:
             return
         try:
+            if file_path.lower().endswith(FEATURE_STORE_EXTENSION):
+                n_written = sets_to_feature_store(self.sets_info, file_path)
+                messagebox.showinfo("Exportation", f"{n_written}/{len(self.sets_info)} sets exportés (feature store).")
+                return
             with open(file_path, 'w', encoding='utf-8') as f:
                 json.dump(self.sets_info, f, ensure_ascii=False, indent=4)
             messagebox.showinfo("Exportation", f"{len(self.sets_info)} sets exportés.")
@@ -712,6 +869,7 @@ class TrainIAModuleFrame(tk.Frame):
         for i in self.sets_tree.get_children():
             self.sets_tree.delete(i)
         self.sets_info.clear()
+        self.feature_store = None
         messagebox.showinfo("Nouveau Modèle", "Configuration réinitialisée.")
 
     def add_production_data_action(self):
@@ -757,52 +915,209 @@ class TrainIAModuleFrame(tk.Frame):
         for v in self.img_paths_non_conformes:
             v.set("")
 
-    def update_model_with_production_data_action(self):
+    def start_production_update_thread(self):
+        """
+        Lit l'état de l'interface dans le thread Tk puis lance la mise à jour dans un thread ;
+        la progression et les messages reviennent au thread Tk par after().
+        """
+        if self.production_thread is not None and self.production_thread.is_alive():
+            messagebox.showinfo("Mise à jour", "Une mise à jour est déjà en cours.")
+            return
         if not self.controller.is_validated():
             messagebox.showerror("Erreur", "Aucun modèle chargé/validé pour mise à jour.")
             return
+        product_type = self.train_product_type_var.get()
+        production_data_sets = list(self.production_data_sets)
+        self.production_thread = threading.Thread(target=self.update_model_with_production_data_action,
+                                                  args=(product_type, production_data_sets), daemon=True)
+        self.production_thread.start()
+
+    def update_model_with_production_data_action(self, product_type, production_data_sets):
+        def on_step(step, n_steps, loss):
+            self.after(0, self.production_status_var.set, f"Mise à jour : lot {step}/{n_steps} - loss {loss:.4f}")
+
         try:
-            self.controller.update_with_production(self.production_data_sets)
-            self.production_data_sets.clear()
-            messagebox.showinfo("Mise à jour", "Modèle mis à jour avec les données de production.")
+            self.controller.update_with_production(production_data_sets, product_type, on_step=on_step)
+            self.after(0, self._on_production_update_done, len(production_data_sets))
         except Exception as e:
-            messagebox.showerror("Erreur", str(e))
+            self.after(0, self._on_production_update_error, str(e))
 
-    def start_training_thread(self):
-        t = threading.Thread(target=self.train_model_action)
-        t.start()
+    def _on_production_update_done(self, n_used):
+        del self.production_data_sets[:n_used]
+        self.production_status_var.set("")
+        messagebox.showinfo("Mise à jour", "Modèle mis à jour avec les données de production.")
+
+    def _on_production_update_error(self, message):
+        self.production_status_var.set("")
+        messagebox.showerror("Erreur", message)
 
-    def train_model_action(self):
+    def start_training_job(self):
+        if self.training_job is not None:
+            messagebox.showinfo("Entraînement", "Un entraînement est déjà en cours.")
+            return
         if not self.sets_info:
             messagebox.showerror("Erreur", "Aucun set ajouté pour l'entraînement.")
             return
-        product_type = self.train_product_type_var.get()
         if not self.controller.is_validated():
             messagebox.showerror("Erreur", "Modèle non validé.")
             return
         try:
-            messagebox.showinfo("Entraînement", "Entraînement du modèle en cours, veuillez patienter...")
-            model_name = self.controller.train_model(self.sets_info, product_type)
-            messagebox.showinfo("Succès", f"Modèle '{model_name}' entraîné et sauvegardé.")
+            self.training_job = TrainingJob(self.controller.model, self.controller.params, self.sets_info,
+                                            self.train_product_type_var.get(), feature_store=self.feature_store)
+            self.training_job.start()
         except Exception as e:
+            self.training_job = None
             messagebox.showerror("Erreur", str(e))
+            return
+        self.train_status_var.set("Préparation du dataset...")
+        self.pause_button.config(text="Pause")
+        self.after(TRAINING_POLL_MS, self._poll_training_job)
+
+    def _poll_training_job(self):
+        """
+        Lit la progression de l'entraînement (boucle after() : uniquement dans le thread Tk).
+        """
+        job = self.training_job
+        if job is None:
+            return
+        for event in job.poll():
+            kind = event['type']
+            if kind == 'batch':
+                self.train_status_var.set(
+                    f"Époque {event['epoch']}/{event['n_epochs']} - lot {event['batch']} - "
+                    f"loss {event['loss']:.4f} - {event['samples_per_s']:.0f} éch./s")
+            elif kind == 'epoch':
+                self.train_status_var.set(
+                    f"Époque {event['epoch']}/{event['n_epochs']} terminée en {event['epoch_time']:.1f} s - "
+                    f"loss {event['loss']:.4f} - {event['samples_per_s']:.0f} éch./s")
+            elif kind == 'paused':
+                self.train_status_var.set(f"Entraînement en pause (époque {event['epoch']}).")
+            elif kind == 'done':
+                self.training_job = None
+                model = load_model_from_file(event['model_path'])
+                if model is not None:
+                    self.controller.model = model
+                    self.controller.model_path = event['model_path']
+                self.controller.record_cv_metrics(event['model_path'], job.product_type, job.params)
+                self.controller.training_report = event.get('report')
+                message = f"Modèle '{event['model_name']}' entraîné et sauvegardé."
+                if event.get('report'):
+                    message += f"\n{format_training_report(event['report'])}"
+                self.train_status_var.set(message.replace("\n", " - "))
+                messagebox.showinfo("Succès", message)
+            elif kind == 'cancelled':
+                self.training_job = None
+                self.train_status_var.set("Entraînement annulé.")
+            elif kind == 'error':
+                self.training_job = None
+                self.train_status_var.set("")
+                messagebox.showerror("Erreur", event['message'])
+        if self.training_job is not None:
+            self.after(TRAINING_POLL_MS, self._poll_training_job)
+
+    def toggle_pause_training(self):
+        job = self.training_job
+        if job is None:
+            return
+        if job.is_paused():
+            job.resume()
+            self.pause_button.config(text="Pause")
+            self.train_status_var.set("Reprise de l'entraînement...")
+        else:
+            job.pause()
+            self.pause_button.config(text="Reprendre")
 
-    def start_cross_validation_thread(self):
-        t = threading.Thread(target=self.cross_validate_action)
-        t.start()
+    def cancel_training(self):
+        if self.training_job is not None:
+            self.training_job.cancel()
+            self.train_status_var.set("Annulation en cours...")
 
-    def cross_validate_action(self):
+    def start_cross_validation_thread(self):
+        """
+        Lit l'état de l'interface dans le thread Tk puis lance la validation croisée dans un
+        thread ; la progression et les messages reviennent au thread Tk par after().
+        """
+        if self.cv_thread is not None and self.cv_thread.is_alive():
+            messagebox.showinfo("Validation Croisée", "Une validation croisée est déjà en cours.")
+            return
         if not self.sets_info:
             messagebox.showerror("Erreur", "Aucun set ajouté pour la validation croisée.")
             return
-        product_type = self.train_product_type_var.get()
+        messagebox.showinfo("Validation Croisée", "Validation croisée en cours, veuillez patienter...")
+        self.cv_status_var.set("Validation croisée en cours...")
+        self.cv_thread = threading.Thread(target=self.cross_validate_action,
+                                          args=(self.train_product_type_var.get(),), daemon=True)
+        self.cv_thread.start()
+
+    def cross_validate_action(self, product_type):
+        def on_fold(result, done, total):
+            status = (f"Fold {done}/{total} : MSE {result['mse']:.2f} | "
+                      f"MAE {result['mae']:.2f} | R² {result['r2']:.2f}")
+            self.after(0, self.cv_status_var.set, status)
+
         try:
-            messagebox.showinfo("Validation Croisée", "Validation croisée en cours, veuillez patienter...")
-            mse_mean, mae_mean, r2_mean = self.controller.cross_validate(self.sets_info, product_type)
-            msg = f"Validation Croisée (5-fold):\nMSE moyen: {mse_mean:.2f}\nMAE moyen: {mae_mean:.2f}\nR² moyen: {r2_mean:.2f}"
-            messagebox.showinfo("Validation Croisée", msg)
+            scores = self.controller.cross_validate(self.sets_info, product_type,
+                                                    feature_store=self.feature_store, on_fold=on_fold)
+            self.after(0, self._on_cross_validation_done, *scores)
+        except JobCancelled:
+            self.after(0, self.cv_status_var.set, "Validation croisée annulée.")
         except Exception as e:
-            messagebox.showerror("Erreur", str(e))
+            self.after(0, self._on_cross_validation_error, str(e))
+
+    def _on_cross_validation_done(self, mse_mean, mae_mean, r2_mean):
+        self.cv_status_var.set("")
+        n_splits = MODEL_PARAMS.get('cv_splits', 5)
+        n_repeats = MODEL_PARAMS.get('cv_repeats', 1)
+        label = f"{n_splits}-fold" if n_repeats <= 1 else f"{n_splits}-fold x {n_repeats}"
+        msg = f"Validation Croisée ({label}):\nMSE moyen: {mse_mean:.2f}\nMAE moyen: {mae_mean:.2f}\nR² moyen: {r2_mean:.2f}"
+        messagebox.showinfo("Validation Croisée", msg)
+
+    def _on_cross_validation_error(self, message):
+        self.cv_status_var.set("")
+        messagebox.showerror("Erreur", message)
+
+    def start_search_thread(self):
+        if not self.sets_info:
+            messagebox.showerror("Erreur", "Aucun set ajouté pour la recherche d'hyperparamètres.")
+            return
+        t = threading.Thread(target=self.search_action, args=(self.train_product_type_var.get(),))
+        t.start()
+
+    def search_action(self, product_type):
+        """
+        Recherche dans un thread : le résultat est renvoyé au thread Tk (after) pour la
+        confirmation et l'application des paramètres.
+        """
+        def on_trial(info, done, total):
+            status = (f"Essai {done}/{total} : n°{info['trial']} ({info['epochs']} époques) "
+                      f"MSE {info['mse']:.2f}")
+            self.after(0, self.search_status_var.set, status)
+
+        try:
+            self.after(0, self.search_status_var.set, "Recherche en cours...")
+            best_params, best_result = self.controller.search_hyperparameters(self.sets_info, product_type,
+                                                                              feature_store=self.feature_store,
+                                                                              on_trial=on_trial)
+            self.after(0, self._on_search_done, best_params, best_result)
+        except JobCancelled:
+            self.after(0, self.search_status_var.set, "Recherche annulée (reprise possible).")
+        except Exception as e:
+            self.after(0, self._on_search_error, str(e))
+
+    def _on_search_done(self, best_params, best_result):
+        self.search_status_var.set("")
+        # Seules les clés recherchées sont appliquées : les autres paramètres restent ceux de l'utilisateur
+        best_params = {k: best_params[k] for k in SEARCH_SPACE if k in best_params}
+        summary = "\n".join(f"{k}: {best_params[k]}" for k in sorted(best_params) if best_params[k] != MODEL_PARAMS.get(k))
+        msg = (f"Meilleure configuration (MSE {best_result['mse']:.2f} | MAE {best_result['mae']:.2f} | "
+               f"R² {best_result['r2']:.2f}) :\n{summary or 'identique aux paramètres actuels'}\n\n"
+               f"Appliquer ces paramètres ?")
+        if messagebox.askyesno("Recherche d'hyperparamètres", msg):
+            MODEL_PARAMS.update(best_params)
+
+    def _on_search_error(self, message):
+        self.search_status_var.set("")
+        messagebox.showerror("Erreur", message)
 
     def evaluate_model_action(self):
         if not self.validation_data:
@@ -816,6 +1131,19 @@ class TrainIAModuleFrame(tk.Frame):
         except Exception as e:
             messagebox.showerror("Erreur", str(e))
 
+    def quantization_report_action(self):
+        if not self.validation_data:
+            messagebox.showerror("Erreur", "Pas de données de validation chargées.")
+            return
+        model_type = self.model_type_var.get()
+        try:
+            model_path, report = self.controller.quantization_report(self.validation_data, model_type)
+            msg = f"{os.path.basename(model_path)}\n\n{format_report(report)}"
+            logger.info("Comparaison des variantes quantifiées :\n" + msg)
+            messagebox.showinfo("Quantification", msg)
+        except Exception as e:
+            messagebox.showerror("Erreur", str(e))
+
 
 def get_frame(parent, main_app):
     return TrainIAModuleFrame(parent, main_app)
@@ -0,0 +1,196 @@
+# training_jobs.py
+# ===========================================================================================
+# 👉 Entraînement en arrière-plan dans un processus séparé :
+#    - Le modèle courant est transmis via un fichier .h5 temporaire ; le processus d'entraînement
+#      construit son dataset, entraîne (ModelController.train_model) puis sauvegarde le modèle.
+#    - La progression (par lot et par époque : loss, échantillons/s, durée d'époque) est envoyée
+#      dans une file multiprocessing, lue côté interface par poll() depuis une boucle after().
+#      Aucun widget Tk n'est donc manipulé hors du thread principal.
+#    - pause() / resume() / cancel() : événements partagés, vérifiés après chaque lot.
+# ===========================================================================================
+
+import os
+import time
+import queue
+import logging
+import tempfile
+import multiprocessing
+
+logger = logging.getLogger("training_jobs")
+
+# Intervalle minimal entre deux messages de progression "lot" (secondes)
+BATCH_REPORT_INTERVAL = 0.25
+
+
+class TrainingCancelled(Exception):
+    """
+    Levée dans le processus d'entraînement lorsque l'annulation est demandée.
+    """
+    pass
+
+
+def _make_progress_callback(events, cancel_event, pause_event, n_samples, batch_size):
+    """
+    Callback Keras : envoie la progression et applique pause / annulation après chaque lot.
+    """
+    from tensorflow import keras
+
+    class ProgressCallback(keras.callbacks.Callback):
+        def on_train_begin(self, logs=None):
+            self.n_epochs = self.params.get('epochs')
+            self.steps = self.params.get('steps')
+
+        def on_epoch_begin(self, epoch, logs=None):
+            self.epoch = epoch
+            self.epoch_start = time.perf_counter()
+            self.paused_time = 0.0
+            self.samples = 0
+            self.last_report = 0.0
+
+        def on_train_batch_end(self, batch, logs=None):
+            self.samples += min(batch_size, max(n_samples - batch * batch_size, 0))
+            if pause_event.is_set():
+                pause_start = time.perf_counter()
+                events.put({'type': 'paused', 'epoch': self.epoch + 1})
+                while pause_event.is_set() and not cancel_event.is_set():
+                    time.sleep(0.1)
+                self.paused_time += time.perf_counter() - pause_start
+            if cancel_event.is_set():
+                raise TrainingCancelled("Entraînement annulé.")
+
+            now = time.perf_counter()
+            if now - self.last_report >= BATCH_REPORT_INTERVAL:
+                self.last_report = now
+                elapsed = max(now - self.epoch_start - self.paused_time, 1e-9)
+                events.put({'type': 'batch', 'epoch': self.epoch + 1, 'n_epochs': self.n_epochs,
+                            'batch': batch + 1, 'steps': self.steps,
+                            'loss': float((logs or {}).get('loss', float('nan'))),
+                            'samples_per_s': self.samples / elapsed})
+
+        def on_epoch_end(self, epoch, logs=None):
+            epoch_time = time.perf_counter() - self.epoch_start - self.paused_time
+            events.put({'type': 'epoch', 'epoch': epoch + 1, 'n_epochs': self.n_epochs,
+                        'loss': float((logs or {}).get('loss', float('nan'))),
+                        'epoch_time': epoch_time,
+                        'samples_per_s': self.samples / max(epoch_time, 1e-9)})
+
+    return ProgressCallback()
+
+
+def _run_training_job(params, sets_info, product_type, feature_store_path, model_file,
+                      events, cancel_event, pause_event):
+    """
+    Point d'entrée du processus d'entraînement.
+    """
+    try:
+        # Threads et oneDNN : avant tout chargement de TensorFlow dans ce processus
+        from runtime_settings import apply_runtime_settings
+        apply_runtime_settings(params)
+
+        import numpy as np
+        from feature_store import FeatureStore
+        from input_pipeline import split_validation_rows
+        from train_ia import ModelController
+
+        controller = ModelController(params)
+        controller.load_model(model_file)
+        feature_store = FeatureStore(feature_store_path) if feature_store_path else None
+
+        if feature_store is not None:
+            n_samples = int(np.sum([meta.get('product') == product_type for meta in feature_store.sets]))
+        else:
+            n_samples = sum(1 for s in sets_info if s[1] == product_type)
+        events.put({'type': 'started', 'n_samples': n_samples})
+
+        # Seuls les sets d'entraînement (hors validation) sont parcourus par lots
+        n_train = len(split_validation_rows(n_samples, params.get('validation_split', 0.1))[0])
+        progress = _make_progress_callback(events, cancel_event, pause_event, n_train, params['batch_size'])
+        model_name = controller.train_model(sets_info, product_type, feature_store=feature_store,
+                                            extra_callbacks=[progress])
+        # train_model lève une exception si le modèle n'a pas pu être sauvegardé
+        events.put({'type': 'done', 'model_name': model_name, 'model_path': controller.model_path,
+                    'report': controller.training_report})
+    except TrainingCancelled:
+        events.put({'type': 'cancelled'})
+    except Exception as e:
+        logger.error(f"Erreur d'entraînement : {e}", exc_info=True)
+        events.put({'type': 'error', 'message': str(e)})
+
+
+class TrainingJob:
+    """
+    Un entraînement exécuté dans un processus séparé.
+
+    Utilisation (thread Tk) :
+        job = TrainingJob(controller.model, MODEL_PARAMS, sets_info, product_type, feature_store)
+        job.start()
+        ... toutes les 200 ms : for event in job.poll(): ...
+        job.pause() / job.resume() / job.cancel()
+
+    Événements (dict, clé 'type') : started, batch, epoch, paused, done (model_name, model_path, report),
+    cancelled, error (message).
+    """
+
+    def __init__(self, model, params, sets_info, product_type, feature_store=None):
+        self.params = dict(params)
+        self.sets_info = [list(s) for s in sets_info]
+        self.product_type = product_type
+        self.feature_store_path = feature_store.path if feature_store is not None else None
+        fd, self.model_file = tempfile.mkstemp(prefix="train_", suffix=".h5")
+        os.close(fd)
+        model.save(self.model_file)
+
+        ctx = multiprocessing.get_context("spawn")
+        self._events = ctx.Queue()
+        self._cancel_event = ctx.Event()
+        self._pause_event = ctx.Event()
+        self._process = ctx.Process(target=_run_training_job,
+                                    args=(self.params, self.sets_info, self.product_type,
+                                          self.feature_store_path, self.model_file,
+                                          self._events, self._cancel_event, self._pause_event),
+                                    daemon=True)
+        self.finished = False
+
+    def start(self):
+        self._process.start()
+        logger.info(f"Entraînement lancé (processus {self._process.pid}).")
+
+    def poll(self):
+        """
+        Renvoie les événements reçus depuis le dernier appel (non bloquant).
+        Un événement 'error' est ajouté si le processus s'est arrêté sans rien signaler.
+        """
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                break
+        if any(e['type'] in ('done', 'cancelled', 'error') for e in events):
+            self._finish()
+        elif not self.finished and not self._process.is_alive() and self._events.empty():
+            events.append({'type': 'error',
+                           'message': f"Processus d'entraînement arrêté (code {self._process.exitcode})."})
+            self._finish()
+        return events
+
+    def _finish(self):
+        if self.finished:
+            return
+        self.finished = True
+        self._process.join(timeout=5)
+        if os.path.exists(self.model_file):
+            os.remove(self.model_file)
+
+    def is_paused(self):
+        return self._pause_event.is_set()
+
+    def pause(self):
+        self._pause_event.set()
+
+    def resume(self):
+        self._pause_event.clear()
+
+    def cancel(self):
+        self._cancel_event.set()
+        self._pause_event.clear()
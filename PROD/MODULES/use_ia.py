@@ -1,14 +1,16 @@
 import os
-import json
 import logging
 import numpy as np
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from PIL import Image
 
-import tensorflow as tf
-from tensorflow import keras
-from sklearn.metrics import mean_squared_error
+from sechoir_store import SechoirStore, SECHOIR_FILENAME
+from thumbnail_cache import load_thumbnail
+from model_cache import MODEL_CACHE
+from numpy_runtime import NUMPY_MODEL_EXTENSION, has_numpy_export, numpy_model_path
+from model_quantization import QUANTIZATION_MODES, variant_path
+from batch_inference import (BATCH_SIZE, entry_features, select_entries, run_batch_prediction,
+                             error_statistics, format_statistics, save_results)
 
 THEME = {
     'bg_main': '#2B2B2B',
@@ -27,8 +29,6 @@ THEME = {
 
 DATA_DIR = "DATA"
 MODELS_DIR = "MODELS"
-if not os.path.exists(MODELS_DIR):
-    os.makedirs(MODELS_DIR)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -49,10 +49,10 @@ def create_thematic_frame(parent, title=None, theme=THEME):
 
 def get_sechoir_data_file():
     main_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-    data_file = os.path.join(main_dir, 'sechoir_data.json')
-    if not os.path.exists(data_file):
-        alt_file = os.path.join(os.getcwd(), 'sechoir_data.json')
-        if os.path.exists(alt_file):
+    data_file = os.path.join(main_dir, SECHOIR_FILENAME)
+    if not SechoirStore(data_file).exists():
+        alt_file = os.path.join(os.getcwd(), SECHOIR_FILENAME)
+        if SechoirStore(alt_file).exists():
             data_file = alt_file
         else:
             messagebox.showwarning("Fichier non trouvé", "Le fichier sechoir_data.json est introuvable.\nVeuillez le sélectionner manuellement.")
@@ -65,42 +65,48 @@ def get_sechoir_data_file():
 
 def load_sechoir_data():
     data_file = get_sechoir_data_file()
-    if data_file is None or not os.path.exists(data_file):
+    if data_file is None or not SechoirStore(data_file).exists():
         logger.warning("Fichier sechoir_data.json non trouvé.")
         return []
     try:
-        with open(data_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            if not isinstance(data, list):
-                logger.error("Format invalide de sechoir_data.json.")
-                return []
-            return data
+        return SechoirStore(data_file).load()
     except Exception as e:
         logger.error(f"Erreur chargement sechoir_data.json: {e}")
         return []
 
-def load_model_from_file(path):
-    if not os.path.exists(path):
-        return None
+def load_sechoir_history():
+    """
+    Historique du séchoir adossé à l'index SQLite : history[-1] est une requête indexée.
+    """
+    data_file = get_sechoir_data_file()
+    if data_file is None or not SechoirStore(data_file).exists():
+        logger.warning("Fichier sechoir_data.json non trouvé.")
+        return []
     try:
-        model = keras.models.load_model(path)
-        return model
+        return SechoirStore(data_file).history()
     except Exception as e:
-        logger.error(f"Erreur chargement modèle {path}: {e}")
-        return None
-
-def safe_float(x):
-    try:
-        return float(x)
-    except:
-        return 0.0
+        logger.error(f"Erreur chargement de l'historique du séchoir: {e}")
+        return []
 
-def get_last_valid_temp_entry(temp_list):
-    for t in reversed(temp_list):
-        cels = t.get('cels', [])
-        if len(cels) == 6 and 'air_neuf' in t:
-            return t
-    return None
+def load_model_from_file(path, variant="float32"):
+    """
+    Modèle prêt à prédire, relu depuis le cache si le fichier n'a pas changé.
+    Pour un .h5, la variante demandée (float16 / int8, voir model_quantization.py) ou l'export
+    NumPy à jour est utilisé s'il existe (pas de chargement de TensorFlow) ;
+    sinon le modèle Keras est chargé et préchauffé (model_cache.CachedModel).
+    """
+    if variant in QUANTIZATION_MODES and not path.endswith(NUMPY_MODEL_EXTENSION):
+        quantized_path = variant_path(path, variant)
+        if os.path.exists(quantized_path) and os.path.getmtime(quantized_path) >= os.path.getmtime(path):
+            model = MODEL_CACHE.get(quantized_path)
+            if model is not None:
+                return model
+        logger.warning(f"Variante {variant} indisponible pour {path}, utilisation du modèle float32.")
+    if not path.endswith(NUMPY_MODEL_EXTENSION) and has_numpy_export(path):
+        model = MODEL_CACHE.get(numpy_model_path(path))
+        if model is not None:
+            return model
+    return MODEL_CACHE.get(path)
 
 def load_and_concat_images(img_list_conformes, img_list_non_conformes, size=IMAGE_SIZE):
     all_paths = img_list_conformes + img_list_non_conformes
@@ -109,10 +115,7 @@ def load_and_concat_images(img_list_conformes, img_list_non_conformes, size=IMAG
         if not p or not os.path.exists(p):
             logger.error(f"Image invalide: {p}")
             return None
-        img = Image.open(p).convert("RGB")
-        img = img.resize(size)
-        arr = np.array(img, dtype=np.float32)/255.0
-        imgs.append(arr)
+        imgs.append(load_thumbnail(p, size))
     final_img = np.concatenate(imgs, axis=1)
     return final_img
 
@@ -120,8 +123,12 @@ class UseIAModuleFrame(tk.Frame):
     def __init__(self, parent):
         super().__init__(parent, bg=THEME['bg_main'])
         self.loaded_model = None
-        self.sechoir_data = load_sechoir_data()
+        self.sechoir_data = load_sechoir_history()
         self.predict_result_var = tk.StringVar()
+        self.batch_since_var = tk.StringVar()
+        self.batch_until_var = tk.StringVar()
+        self.batch_product_var = tk.StringVar(value="Tous")
+        self.model_variant_var = tk.StringVar(value="float32")
 
         self.img_paths_conformes = [tk.StringVar() for _ in range(NB_IMAGES_PER_SET)]
         self.img_paths_non_conformes = [tk.StringVar() for _ in range(NB_IMAGES_PER_SET)]
@@ -182,9 +189,20 @@ class UseIAModuleFrame(tk.Frame):
         btn_frame = tk.Frame(frame, bg=THEME['bg_section'])
         btn_frame.pack(pady=5)
 
+        tk.Label(btn_frame, text="Variante :", bg=THEME['bg_section'], fg='white').pack(side='left', padx=2)
+        ttk.Combobox(btn_frame, textvariable=self.model_variant_var, values=("float32",) + QUANTIZATION_MODES, state="readonly", width=8).pack(side='left', padx=2)
         tk.Button(btn_frame, text="Charger un modèle", bg=THEME['button_bg'], fg='white', command=self.load_model).pack(side='left', padx=5)
         tk.Button(btn_frame, text="Prédire sur la dernière entrée", bg=THEME['accent'], fg='white', command=self.predict_on_last_entry).pack(side='left', padx=5)
 
+        batch_frame = tk.Frame(frame, bg=THEME['bg_section'])
+        batch_frame.pack(pady=5)
+        tk.Label(batch_frame, text="Du (AAAA-MM-JJ) :", bg=THEME['bg_section'], fg='white').pack(side='left', padx=2)
+        tk.Entry(batch_frame, textvariable=self.batch_since_var, width=12, bg=THEME['text_bg'], fg='white').pack(side='left', padx=2)
+        tk.Label(batch_frame, text="Au :", bg=THEME['bg_section'], fg='white').pack(side='left', padx=2)
+        tk.Entry(batch_frame, textvariable=self.batch_until_var, width=12, bg=THEME['text_bg'], fg='white').pack(side='left', padx=2)
+        ttk.Combobox(batch_frame, textvariable=self.batch_product_var, values=["Tous", "Ail", "Oignon", "Échalote"], state="readonly", width=10).pack(side='left', padx=5)
+        tk.Button(batch_frame, text="Prédiction par lots (historique)", bg=THEME['accent2'], fg='white', command=self.predict_batch).pack(side='left', padx=5)
+
         tk.Label(frame, text="Résultat de la prédiction :", bg=THEME['bg_section'], fg='white').pack(padx=5, pady=5, fill='x')
         tk.Label(frame, textvariable=self.predict_result_var, bg=THEME['bg_section'], fg='white', wraplength=500, justify='left').pack(pady=5, fill='x')
 
@@ -265,13 +283,14 @@ class UseIAModuleFrame(tk.Frame):
             self.temp_tree.insert("", "end", values=tuple(row_vals))
 
     def load_model(self):
-        path = filedialog.askopenfilename(title="Charger un modèle", filetypes=[("Modèle", "*.h5")])
+        path = filedialog.askopenfilename(title="Charger un modèle", filetypes=[("Modèle", "*.h5 *.npz")])
         if path:
-            mdl = load_model_from_file(path)
+            mdl = load_model_from_file(path, self.model_variant_var.get())
             if mdl:
                 self.loaded_model = mdl
                 messagebox.showinfo("Chargement Modèle", f"Modèle chargé depuis {path}")
-                self.log("Modèle chargé depuis: " + path)
+                runtime = f"NumPy {mdl.quantization}" if mdl.path.endswith(NUMPY_MODEL_EXTENSION) else "TensorFlow"
+                self.log(f"Modèle chargé depuis: {mdl.path} ({runtime}, préchauffage {mdl.warm_up_ms:.0f} ms)")
             else:
                 messagebox.showerror("Erreur", "Impossible de charger le modèle.")
 
@@ -299,8 +318,9 @@ class UseIAModuleFrame(tk.Frame):
             messagebox.showerror("Erreur", "Impossible d'extraire les caractéristiques pour la prédiction.")
             return
 
-        pred = self.loaded_model.predict([X_image, X_numeric])
+        pred = self.loaded_model.predict(X_image, X_numeric)
         pred = pred.flatten()
+        latency_ms = self.loaded_model.last_latency_ms
 
         if pred.shape[0] < OUTPUT_DIM:
             messagebox.showerror("Erreur", f"Le modèle ne prédit pas assez de valeurs (attendu: {OUTPUT_DIM}).")
@@ -331,58 +351,79 @@ class UseIAModuleFrame(tk.Frame):
 
         if Y is not None:
             Y_flat = Y.flatten()
-            mse = mean_squared_error(Y_flat[0:7], pred[0:7])
+            mse = float(np.mean((Y_flat[0:7] - pred[0:7]) ** 2))
             msg += f"\nMSE (vs réel sur T°C et AirNeuf): {mse:.2f}"
+        msg += f"\nLatence de prédiction : {latency_ms:.1f} ms"
 
         self.predict_result_var.set(msg)
         messagebox.showinfo("Prédiction", "Prédiction réalisée avec succès.\n\n" + msg)
         self.log("Prédiction effectuée.\n" + msg)
 
     def extract_data_for_prediction(self, entry, img_list_conformes, img_list_non_conformes):
-        four_data = entry.get('four_data', {})
-
-        consignes = four_data.get('temperatures_consignes', [])
-        reelles = four_data.get('temperatures_reelles', [])
-        tapis = four_data.get('tapis', [])
-
-        last_con = get_last_valid_temp_entry(consignes)
-        last_re = get_last_valid_temp_entry(reelles)
-        if last_con is None or last_re is None or not tapis:
-            return None, None, None
-
-        last_tapis = tapis[-1]
-
-        cels_con = last_con.get('cels', [])
-        cels_re = last_re.get('cels', [])
-        if len(cels_con) != 6 or len(cels_re) != 6:
+        x, y = entry_features(entry.get('four_data', {}))
+        if x is None:
             return None, None, None
 
         img_arr = load_and_concat_images(img_list_conformes, img_list_non_conformes, size=IMAGE_SIZE)
         if img_arr is None:
             return None, None, None
         X_image = img_arr[np.newaxis, ...]
+        return X_image, x.reshape(1, -1), y.reshape(1, -1)
 
-        X_numeric = []
-        for val in cels_con:
-            X_numeric.append(safe_float(val))
-        X_numeric.append(safe_float(last_con.get('air_neuf', 0.0)))
-        X_numeric.append(safe_float(last_tapis.get('vit_stockeur', 0.0)))
-        X_numeric.append(safe_float(last_tapis.get('tapis1', 0.0)))
-        X_numeric.append(safe_float(last_tapis.get('tapis2', 0.0)))
-        X_numeric.append(safe_float(last_tapis.get('tapis3', 0.0)))
-        X_numeric = np.array(X_numeric).reshape(1, -1)
-
-        Y = []
-        for val in cels_re:
-            Y.append(safe_float(val))
-        Y.append(safe_float(last_re.get('air_neuf', 0.0)))
-        Y.append(safe_float(last_tapis.get('vit_stockeur', 0.0)))
-        Y.append(safe_float(last_tapis.get('tapis1', 0.0)))
-        Y.append(safe_float(last_tapis.get('tapis2', 0.0)))
-        Y.append(safe_float(last_tapis.get('tapis3', 0.0)))
-        Y = np.array(Y).reshape(1, -1)
-
-        return X_image, X_numeric, Y
+    def predict_batch(self):
+        """
+        Backtest : prédit toutes les entrées de l'historique (filtrées par période / produit)
+        avec les images sélectionnées, enregistre les résultats et affiche l'erreur par cellule.
+        """
+        if self.loaded_model is None:
+            messagebox.showerror("Erreur", "Aucun modèle chargé pour la prédiction.")
+            return
+
+        img_list_conformes = [v.get().strip() for v in self.img_paths_conformes]
+        img_list_non_conformes = [v.get().strip() for v in self.img_paths_non_conformes]
+        if any(not p or not os.path.exists(p) for p in img_list_conformes + img_list_non_conformes):
+            messagebox.showerror("Erreur", "Veuillez sélectionner correctement les images CONFORMES et NON CONFORMES.")
+            return
+        image = load_and_concat_images(img_list_conformes, img_list_non_conformes, size=IMAGE_SIZE)
+        if image is None:
+            messagebox.showerror("Erreur", "Impossible de charger les images sélectionnées.")
+            return
+
+        since = self.batch_since_var.get().strip() or None
+        until = self.batch_until_var.get().strip() or None
+        if until and len(until) == 10:
+            until += " 23:59:59"  # date seule : journée incluse
+        product = self.batch_product_var.get()
+        product = None if product == "Tous" else product
+
+        entries = select_entries(self.sechoir_data, since, until, product)
+        if not entries:
+            messagebox.showerror("Erreur", "Aucune entrée du séchoir pour ces critères.")
+            return
+
+        latencies = []
+
+        def predict_fn(X_image, X_numeric):
+            pred = self.loaded_model.predict(X_image, X_numeric)
+            latencies.append(self.loaded_model.last_latency_ms)
+            return pred
+
+        result = run_batch_prediction(predict_fn, entries, image, batch_size=BATCH_SIZE)
+        if len(result['predicted']) == 0:
+            messagebox.showerror("Erreur", "Aucune entrée exploitable (données incomplètes).")
+            return
+        stats = format_statistics(error_statistics(result['actual'], result['predicted']))
+        msg = (f"{len(result['predicted'])} entrées prédites ({result['skipped']} ignorées) "
+               f"en {sum(latencies):.0f} ms ({sum(latencies) / len(result['predicted']):.2f} ms / entrée).\n\n"
+               f"Erreur par grandeur (prédit - réel) :\n{stats}")
+        self.log("Prédiction par lots.\n" + msg)
+
+        path = filedialog.asksaveasfilename(title="Enregistrer les résultats", defaultextension=".npz",
+                                            filetypes=[("Résultats NumPy (colonnes)", "*.npz")])
+        if path:
+            save_results(path, result)
+            self.log("Résultats enregistrés : " + path)
+        messagebox.showinfo("Prédiction par lots", msg)
 
     def browse_image(self, var):
         path = filedialog.askopenfilename(title="Sélectionnez une image (jpg, jpeg, png)", filetypes=[("Images", "*.jpg;*.jpeg;*.png")])
@@ -9,6 +9,8 @@ from datetime import datetime
 import shutil
 import sqlite3
 
+from sechoir_store import SechoirStore
+
 try:
     from PIL import Image, ImageTk
 except ImportError:
@@ -45,11 +47,9 @@ def load_all_data(main_dir):
         with open(cassage_file, 'r', encoding='utf-8') as f:
             cassage_data = json.load(f)
 
-    # Chargement sechoir
-    sechoir_data = []
-    if os.path.exists(sechoir_file):
-        with open(sechoir_file, 'r', encoding='utf-8') as f:
-            sechoir_data = json.load(f)
+    # Chargement sechoir : vue indexée (SQLite), parcourue sans charger tout le JSON
+    sechoir_store = SechoirStore(sechoir_file)
+    sechoir_data = sechoir_store.history() if sechoir_store.exists() else []
 
     # Chargement effectif
     effectif_data = []
@@ -270,9 +270,12 @@ def archive_files(txt_path, main_dir):
         os.makedirs(archive_dir)
 
     cassage_file = os.path.join(main_dir, 'cassage_data.json')
-    sechoir_file = os.path.join(main_dir, 'sechoir_data.json')
     effectif_file = os.path.join(main_dir, 'effectif_data.json')
 
+    # On fusionne le journal du séchoir dans sechoir_data.json avant de l'archiver
+    sechoir_store = SechoirStore.for_directory(main_dir)
+    sechoir_store.compact()
+
     current_dir = os.path.dirname(__file__)
     qualite_enregistrements_file = os.path.join(current_dir, 'qualite_enregistrements.pkl')
     non_conformites_file = os.path.join(current_dir, 'non_conformites.pkl')
@@ -281,7 +284,7 @@ def archive_files(txt_path, main_dir):
 
     files_to_move = [
         cassage_file,
-        sechoir_file,
+        *sechoir_store.files(),
         effectif_file,
         qualite_enregistrements_file,
         non_conformites_file,
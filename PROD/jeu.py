@@ -3,11 +3,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime, timedelta
-import matplotlib
-matplotlib.use('TkAgg')  # Utilisation du backend TkAgg pour matplotlib
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-import matplotlib.dates as mdates
 import pickle
 import random
 import os
@@ -15,21 +10,36 @@ import sys
 import importlib
 import shutil
 
-# Import fictif de l'interface OpenAI (clé API factice)
-from openai import OpenAI
+from tick_scheduler import get_scheduler
+from production_ledger import ProductionLedger, ROLLING_WINDOWS_MIN
+
+# matplotlib et openai sont importés à la première utilisation (graphe, premier message du chatbot)
+
+# Graphe de production : au-delà de CHART_MAX_BARS fiches, les barres sont regroupées par
+# tranche de temps (la plus petite de CHART_BUCKETS_MIN donnant au plus CHART_MAX_BARS barres)
+CHART_MAX_BARS = 120
+CHART_BUCKETS_MIN = (5, 10, 15, 30, 60, 120, 240)
+# Avance de l'axe des temps sur l'heure courante (min) et marge haute de l'axe des poids
+CHART_HORIZON_MIN = 30
+CHART_Y_MARGIN = 1.15
+
+def create_openai_client():
+    """
+    Client OpenAI fictif, créé au premier message du chatbot.
+    """
+    from openai import OpenAI
+    # Clé API fictive, à remplacer par une vraie si nécessaire
+    return OpenAI(api_key='sk-FAKE-KEY')
 
 def get_frame(parent_frame, controller):
     """
     Point d'entrée pour obtenir le frame principal du module 'jeu'.
-    Instancie RochiasPodCalculator avec un client OpenAI fictif.
+    Instancie RochiasPodCalculator (client OpenAI fictif créé au premier message).
     Cette fonction est requise par l'architecture du projet
     afin de charger dynamiquement ce module.
     """
-    # Clé API fictive, à remplacer par une vraie si nécessaire
-    client = OpenAI(api_key='sk-FAKE-KEY')
-
     frame = tk.Frame(parent_frame, bg='#2B2B2B')
-    app = RochiasPodCalculator(frame, client)
+    app = RochiasPodCalculator(frame, None)
     return frame
 
 class RochiasPodCalculator:
@@ -254,7 +264,8 @@ class RochiasPodCalculator:
         # Variables fiches de prod
         self.total_var = tk.DoubleVar()
         self.freq_var = tk.StringVar()
-        self.fiches_de_prod = []
+        self.rolling_var = tk.StringVar(value="0 / 0 kg/h")
+        self.fiches_de_prod = ProductionLedger()  # Totaux et débits tenus à jour à chaque fiche
         self.heure_debut_poste = None
 
         # Cadre supérieur (chrono, sauvegarde, etc.)
@@ -276,7 +287,6 @@ class RochiasPodCalculator:
         self.save_button = tk.Button(top_frame, text="Sauvegarder", command=self.save_data,
                                      bg=self.colors['button_bg'], fg=self.colors['button_fg'], font=(self.font_family, 9, 'bold'), padx=4, pady=2)
         self.save_button.pack(side='left', padx=2)
-        self.blink_save_button()
 
         load_button = ttk.Button(top_frame, text="Recharger", command=self.load_state)
         load_button.pack(side='left', padx=2)
@@ -309,12 +319,15 @@ class RochiasPodCalculator:
         self.setup_prod_frame(prod_graph_frame, self.colors)
         self.setup_graph_frame(prod_graph_frame, self.colors)
 
-        # Mises à jour régulières
-        self.update_clock()
-        self.update_timer()
-        self.update_elapsed_time()
-        self.update_chart()
-        self.update_frequency()
+        # Mises à jour régulières : boucle commune (tick_scheduler.py), suspendues quand
+        # l'écran Production est masqué
+        ticks = get_scheduler(parent_frame)
+        ticks.every(500, self.blink_save_button, widget=self.save_button)
+        ticks.every(1000, self.update_clock, widget=self.clock_label)
+        ticks.every(1000, self.update_timer, widget=self.timer_label)
+        ticks.every(1000, self.update_elapsed_time, widget=parent_frame)
+        ticks.every(5000, self.update_chart, widget=self.canvas.get_tk_widget())
+        ticks.every(60000, self.update_frequency, widget=parent_frame)
 
     def setup_input_frame(self, parent_frame, colors):
         input_frame = ttk.Labelframe(parent_frame, text="Données de production")
@@ -442,10 +455,19 @@ class RochiasPodCalculator:
         ttk.Label(total_frame, text="Quantité passée par heure (kg/h):").grid(row=1, column=0, sticky='e', pady=2)
         tk.Label(total_frame, textvariable=self.freq_var, fg='green', bg=colors['bg'], font=(self.font_family, 9, 'bold')).grid(row=1, column=1, pady=2)
 
-        ttk.Label(total_frame, text="Temps écoulé:").grid(row=2, column=0, sticky='e', pady=2)
-        tk.Label(total_frame, textvariable=self.elapsed_time_var, fg='green', bg=colors['bg'], font=(self.font_family, 9, 'bold')).grid(row=2, column=1, pady=2)
+        rolling_text = " / ".join(f"{m} min" for m in ROLLING_WINDOWS_MIN)
+        ttk.Label(total_frame, text=f"Débit sur {rolling_text} (kg/h):").grid(row=2, column=0, sticky='e', pady=2)
+        tk.Label(total_frame, textvariable=self.rolling_var, fg='green', bg=colors['bg'], font=(self.font_family, 9, 'bold')).grid(row=2, column=1, pady=2)
+
+        ttk.Label(total_frame, text="Temps écoulé:").grid(row=3, column=0, sticky='e', pady=2)
+        tk.Label(total_frame, textvariable=self.elapsed_time_var, fg='green', bg=colors['bg'], font=(self.font_family, 9, 'bold')).grid(row=3, column=1, pady=2)
 
     def setup_graph_frame(self, parent_frame, colors):
+        import matplotlib
+        matplotlib.use('TkAgg')  # Utilisation du backend TkAgg pour matplotlib
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
         graph_frame = ttk.Labelframe(parent_frame, text="Graphique de la Production")
         graph_frame.pack(side='right', padx=5, pady=5, fill='both', expand=True)
 
@@ -459,13 +481,25 @@ class RochiasPodCalculator:
 
         self.canvas = FigureCanvasTkAgg(self.figure, master=graph_frame)
         self.canvas.get_tk_widget().pack(fill='both', expand=True)
+
+        # État du rendu incrémental (voir update_chart)
+        self.chart_dirty = True
+        self.chart_needs_rebuild = True
+        self.chart_rendered = 0          # Fiches déjà dessinées
+        self.chart_aggregated = False    # Barres regroupées par tranche de temps
+        self.chart_bar_seconds = 60.0
+        self.chart_ymax = 0.0
+        self.chart_xmin = None
+        self.chart_xmax = None
+        self.chart_now_line = None       # Repère "maintenant", redessiné seul (blitting)
+        self.chart_background = None
+        self.canvas.mpl_connect('draw_event', self.on_chart_draw)
         self.canvas.draw()
 
     def blink_save_button(self):
         self.current_save_color_index = (self.current_save_color_index + 1) % len(self.save_button_colors)
         new_color = self.save_button_colors[self.current_save_color_index]
         self.save_button.config(bg=new_color)
-        self.parent.after(500, self.blink_save_button)
 
     def open_chatbot_window(self):
         colors = self.colors
@@ -508,6 +542,8 @@ class RochiasPodCalculator:
 
     def get_chatbot_response(self):
         try:
+            if self.client is None:
+                self.client = create_openai_client()
             completion = self.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=self.chatbot_conversation
@@ -549,7 +585,6 @@ class RochiasPodCalculator:
         minutes, seconds = divmod(remainder, 60)
         time_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
         self.timer_label.config(text=time_str)
-        self.parent.after(1000, self.update_timer)
 
     def update_elapsed_time(self):
         if self.production_start_time is not None:
@@ -560,12 +595,10 @@ class RochiasPodCalculator:
             self.elapsed_time_var.set(time_str)
         else:
             self.elapsed_time_var.set("00:00:00")
-        self.parent.after(1000, self.update_elapsed_time)
 
     def update_clock(self):
         now = datetime.now().strftime('%H:%M:%S')
         self.clock_label.config(text=now)
-        self.parent.after(1000, self.update_clock)
 
     def calculate_production_data(self):
         self.calculate_eau_consomme()
@@ -626,6 +659,7 @@ class RochiasPodCalculator:
             color = (random.random(), random.random(), random.random())
 
             self.fiches_de_prod.append({'Number': index, 'Time': time_now, 'TimeStr': time_str, 'Weight': poids, 'Color': color})
+            self.mark_chart_dirty()
             self.tree.insert('', 'end', values=(index, time_str, poids))
             self.prod_entry.delete(0, 'end')
             self.update_total_and_frequency()
@@ -634,59 +668,163 @@ class RochiasPodCalculator:
             messagebox.showerror("Erreur", "Veuillez entrer un poids valide.")
 
     def update_total_and_frequency(self):
-        total_weight = sum(item['Weight'] for item in self.fiches_de_prod)
-        self.total_var.set(round(total_weight, 2))
+        self.total_var.set(round(self.fiches_de_prod.total_weight, 2))
+        self.update_frequency()
 
     def update_frequency(self):
-        if not self.fiches_de_prod or self.production_start_time is None:
-            self.freq_var.set("0 kg/h")
-        else:
-            elapsed_time_seconds = (datetime.now() - self.production_start_time).total_seconds()
-            elapsed_time_hours = elapsed_time_seconds / 3600.0
+        now = datetime.now()
+        frequency = self.fiches_de_prod.shift_rate(self.production_start_time, now)
+        self.freq_var.set(f"{round(frequency, 2)} kg/h")
+        rates = [self.fiches_de_prod.window_rate(m, now) for m in ROLLING_WINDOWS_MIN]
+        self.rolling_var.set(" / ".join(f"{round(rate, 1)}" for rate in rates) + " kg/h")
 
-            total_weight = sum(item['Weight'] for item in self.fiches_de_prod)
-
-            if elapsed_time_hours < 1:
-                self.freq_var.set(f"{round(total_weight, 2)} kg/h")
-            else:
-                frequency = total_weight / elapsed_time_hours
-                self.freq_var.set(f"{round(frequency, 2)} kg/h")
-        self.parent.after(60000, self.update_frequency)
+    def mark_chart_dirty(self, rebuild=False):
+        """
+        À appeler après toute modification de fiches_de_prod. rebuild=True si des fiches déjà
+        affichées ont changé (chargement, remise à zéro) ; sinon seules les nouvelles sont ajoutées.
+        """
+        self.chart_dirty = True
+        self.chart_needs_rebuild = self.chart_needs_rebuild or rebuild
 
     def update_chart(self):
+        """
+        Appelé toutes les 5 s. Sans nouvelle fiche, seul le repère "maintenant" est redessiné
+        (blitting). Une fiche ajoutée n'ajoute que sa barre et son numéro ; le graphe n'est
+        reconstruit qu'après un chargement / une remise à zéro, un changement de largeur des
+        barres, ou au-delà de CHART_MAX_BARS fiches (barres regroupées par tranche de temps).
+        """
         try:
-            self.ax.clear()
-            self.ax.set_xlabel('Temps')
-            self.ax.set_ylabel('Production (kg)')
-            self.ax.grid(True, which='both', linestyle='--', linewidth=0.5)
-            self.ax.set_facecolor(self.colors['graph_bg'])
-            self.figure.patch.set_facecolor(self.colors['graph_facecolor'])
-
-            if self.fiches_de_prod:
-                times = [item['Time'] for item in self.fiches_de_prod]
-                weights = [item['Weight'] for item in self.fiches_de_prod]
-                colors_list = [item['Color'] for item in self.fiches_de_prod]
-
-                if len(times) > 1:
-                    time_diffs = [(t2 - t1).total_seconds() for t1, t2 in zip(times[:-1], times[1:])]
-                    min_time_diff = min(time_diffs) if min(time_diffs) > 0 else 60
-                    bar_width_seconds = min(min_time_diff / 2, 60)
-                    bar_width = timedelta(seconds=bar_width_seconds)
+            now = datetime.now()
+            if self.chart_dirty:
+                if self.chart_needs_rebuild or not self.append_chart_bars():
+                    self.rebuild_chart(now)
+                self.chart_dirty = False
+                self.chart_needs_rebuild = False
+                self.canvas.draw_idle()
+            elif self.chart_now_line is not None:
+                if now >= self.chart_xmax:
+                    # L'heure courante sort de l'axe : décalage de la fenêtre de temps
+                    self.set_chart_xlim(now)
+                    self.canvas.draw_idle()
                 else:
-                    bar_width = timedelta(minutes=1)
-
-                self.ax.bar(times, weights, width=bar_width.total_seconds() / 86400, color=colors_list, align='center', edgecolor='black')
-                self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-                self.figure.autofmt_xdate()
-
-                for i, (x, y) in enumerate(zip(times, weights)):
-                    self.ax.text(x, y, str(self.fiches_de_prod[i]['Number']), ha='center', va='bottom', color='white', fontweight='bold')
-            self.figure.tight_layout()
-            self.canvas.draw()
+                    self.blit_now_line(now)
         except Exception as e:
             print(f"Erreur dans update_chart: {e}")
-        finally:
-            self.parent.after(5000, self.update_chart)
+
+    def chart_bar_width(self, times):
+        """
+        Largeur des barres (s) : la moitié du plus petit écart entre deux fiches, 60 s au plus.
+        """
+        if len(times) < 2:
+            return 60.0
+        min_time_diff = min((t2 - t1).total_seconds() for t1, t2 in zip(times[:-1], times[1:]))
+        if min_time_diff <= 0:
+            min_time_diff = 60
+        return min(min_time_diff / 2, 60)
+
+    def aggregate_fiches(self):
+        """
+        Regroupe les fiches par tranche de temps pour les longs postes, à partir des tranches
+        de BUCKET_MIN minutes du registre (sans reparcourir les fiches).
+        Renvoie (centres des tranches, poids cumulés, couleurs, durée d'une tranche en min).
+        """
+        ledger_buckets = self.fiches_de_prod.buckets
+        starts = list(ledger_buckets)
+        span = (starts[-1] - starts[0]).total_seconds()
+        bucket_min = next((m for m in CHART_BUCKETS_MIN if span / (m * 60) < CHART_MAX_BARS), CHART_BUCKETS_MIN[-1])
+        bucket = timedelta(minutes=bucket_min)
+        base = starts[0].replace(minute=0)
+
+        buckets = {}
+        for start, (weight, color) in ledger_buckets.items():
+            key = int((start - base) / bucket)
+            if key in buckets:
+                buckets[key][1] += weight
+            else:
+                buckets[key] = [base + bucket * (key + 0.5), weight, color]
+        times, weights, colors_list = zip(*buckets.values())
+        return list(times), list(weights), list(colors_list), bucket_min
+
+    def rebuild_chart(self, now):
+        import matplotlib.dates as mdates
+        self.ax.clear()
+        self.ax.set_xlabel('Temps')
+        self.ax.set_ylabel('Production (kg)')
+        self.ax.grid(True, which='both', linestyle='--', linewidth=0.5)
+        self.ax.set_facecolor(self.colors['graph_bg'])
+        self.figure.patch.set_facecolor(self.colors['graph_facecolor'])
+        self.chart_now_line = None
+        self.chart_rendered = 0
+        self.chart_aggregated = False
+
+        if self.fiches_de_prod:
+            times = [item['Time'] for item in self.fiches_de_prod]
+            if len(times) > CHART_MAX_BARS:
+                times, weights, colors_list, bucket_min = self.aggregate_fiches()
+                self.ax.set_ylabel(f'Production (kg / {bucket_min} min)')
+                self.ax.bar(times, weights, width=bucket_min * 0.8 / 1440, color=colors_list, align='center', edgecolor='black')
+                self.chart_aggregated = True
+            else:
+                weights = [item['Weight'] for item in self.fiches_de_prod]
+                colors_list = [item['Color'] for item in self.fiches_de_prod]
+                self.chart_bar_seconds = self.chart_bar_width(times)
+                self.ax.bar(times, weights, width=self.chart_bar_seconds / 86400, color=colors_list, align='center', edgecolor='black')
+                for item in self.fiches_de_prod:
+                    self.ax.text(item['Time'], item['Weight'], str(item['Number']), ha='center', va='bottom', color='white', fontweight='bold')
+            self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+            self.figure.autofmt_xdate()
+
+            self.chart_rendered = len(self.fiches_de_prod)
+            self.chart_ymax = max(weights)
+            self.ax.set_ylim(0, max(self.chart_ymax, 1) * CHART_Y_MARGIN)
+            self.chart_xmin = times[0] - timedelta(minutes=5)
+            self.chart_now_line = self.ax.axvline(now, color='white', linestyle=':', linewidth=1, animated=True)
+            self.set_chart_xlim(now)
+        self.figure.tight_layout()
+
+    def append_chart_bars(self):
+        """
+        Ajoute au graphe les fiches pas encore dessinées. Renvoie False si une reconstruction
+        complète est nécessaire (barres regroupées, largeur des barres modifiée).
+        """
+        fiches = self.fiches_de_prod
+        if (self.chart_aggregated or self.chart_now_line is None
+                or not self.chart_rendered < len(fiches) <= CHART_MAX_BARS):
+            return False
+        times = [item['Time'] for item in fiches]
+        if self.chart_bar_width(times) != self.chart_bar_seconds:
+            return False
+
+        new = fiches[self.chart_rendered:]
+        self.ax.bar([item['Time'] for item in new], [item['Weight'] for item in new], width=self.chart_bar_seconds / 86400,
+                    color=[item['Color'] for item in new], align='center', edgecolor='black')
+        for item in new:
+            self.ax.text(item['Time'], item['Weight'], str(item['Number']), ha='center', va='bottom', color='white', fontweight='bold')
+        self.chart_rendered = len(fiches)
+
+        new_max = max(item['Weight'] for item in new)
+        if new_max > self.chart_ymax:
+            self.chart_ymax = new_max
+            self.ax.set_ylim(0, new_max * CHART_Y_MARGIN)
+        return True
+
+    def set_chart_xlim(self, now):
+        self.chart_xmax = now + timedelta(minutes=CHART_HORIZON_MIN)
+        self.ax.set_xlim(self.chart_xmin, self.chart_xmax)
+
+    def on_chart_draw(self, event):
+        # Après chaque rendu complet (ajout, redimensionnement) : fond sans le repère animé
+        self.chart_background = self.canvas.copy_from_bbox(self.ax.bbox)
+        if self.chart_now_line is not None:
+            self.ax.draw_artist(self.chart_now_line)
+
+    def blit_now_line(self, now):
+        if self.chart_background is None:
+            return
+        self.canvas.restore_region(self.chart_background)
+        self.chart_now_line.set_xdata([now, now])
+        self.ax.draw_artist(self.chart_now_line)
+        self.canvas.blit(self.ax.bbox)
 
     def calculate_finition_totals(self, *args):
         def calc_total(nb_sacs, poids_sac, poids_dernier):
@@ -733,6 +871,7 @@ class RochiasPodCalculator:
         self.produit.set('')
         self.observations_text.delete("1.0", tk.END)
         self.fiches_de_prod.clear()
+        self.mark_chart_dirty(rebuild=True)
         self.production_start_time = None
         self.elapsed_time_var.set("00:00:00")
         self.heure_debut_entry.delete(0, 'end')
@@ -758,6 +897,7 @@ class RochiasPodCalculator:
 
         self.total_var.set(0)
         self.freq_var.set("0 kg/h")
+        self.rolling_var.set("0 / 0 kg/h")
         self.elapsed_time_var.set("00:00:00")
 
         for widget in self.resultat_frame_production.winfo_children():
@@ -797,6 +937,9 @@ class RochiasPodCalculator:
             data_to_save.append(f"  #{item['Number']} - Heure: {item['TimeStr']}, Poids: {item['Weight']} kg")
         data_to_save.append(f"Total Production: {self.total_var.get()} kg")
         data_to_save.append(f"Quantité passée par heure: {self.freq_var.get()}")
+        data_to_save.append("Production par heure:")
+        for hour, weight in self.fiches_de_prod.hourly.items():
+            data_to_save.append(f"  {hour.strftime('%H:%M')} : {round(weight, 2)} kg")
 
         filename = f"rochias_pod_calculator_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
         with open(filename, 'w', encoding='utf-8') as f:
@@ -840,7 +983,9 @@ class RochiasPodCalculator:
             'fiches_de_prod': serializable_fiches_de_prod,
             'chrono_running': self.chrono_running,
             'start_time': self.start_time.isoformat() if self.start_time else None,
-            'elapsed_time_seconds': self.elapsed_time.total_seconds(),
+            # Chrono en cours : durée recalculée (l'affichage est suspendu quand l'écran est masqué)
+            'elapsed_time_seconds': (datetime.now() - self.start_time if self.chrono_running and self.start_time
+                                     else self.elapsed_time).total_seconds(),
             'production_start_time': self.production_start_time.isoformat() if self.production_start_time else None,
             'heure_debut_poste': self.heure_debut_entry.get(),
             'total_var': self.total_var.get(),
@@ -889,12 +1034,13 @@ class RochiasPodCalculator:
             self.total_var.set(state['total_var'])
             self.freq_var.set(state['freq_var'])
 
-            self.fiches_de_prod = []
+            self.fiches_de_prod.clear()
             self.tree.delete(*self.tree.get_children())
             for item in state['fiches_de_prod']:
                 item['Time'] = datetime.fromisoformat(item['Time'])
                 self.fiches_de_prod.append(item)
                 self.tree.insert('', 'end', values=(item['Number'], item['TimeStr'], item['Weight']))
+            self.mark_chart_dirty(rebuild=True)
 
             self.calculate_production_data()
             self.calculate_finition_totals()
@@ -1,10 +1,26 @@
+import time
+STARTUP_T0 = time.perf_counter()  # Début du démarrage (mesure du temps d'affichage)
+
 import tkinter as tk
 from tkinter import messagebox
 import importlib
+import logging
 import sys
 import os
 from PIL import Image, ImageTk
 
+logger = logging.getLogger("main")
+
+# Préchargement des écrans pendant les temps morts de Tk, par ordre de probabilité d'ouverture.
+# Uniquement des écrans dont la construction n'a aucun effet de bord : pas jeu (tâches
+# périodiques, graphe), use_ia (sélection de sechoir_data.json par boîte de dialogue si absent)
+# ni visa (base visa.db, données lues à la construction, boîte de dialogue à l'import sans PIL).
+PRELOAD_MODULES = ("ia", "train_ia")
+PRELOAD_START_MS = 500    # Délai après l'affichage de la fenêtre principale
+PRELOAD_INTERVAL_MS = 200  # Pause entre deux écrans préchargés (la boucle Tk traite les événements)
+PRELOAD_IDLE_MS = 1000     # Temps sans saisie (clavier / souris) requis avant de construire un écran
+PRELOAD_POLL_MS = 50       # Vérification de la fin de l'import en arrière-plan
+
 class MainApplication(tk.Tk):
     """
     Application principale du logiciel ROCHIAS Pod Calculator.
@@ -48,10 +64,19 @@ class MainApplication(tk.Tk):
 
         # Dictionnaire pour stocker les frames des modules
         self.modules_frames = {}
+        # Temps de chargement par module : {'import_ms', 'build_ms', 'preloaded'}
+        self.module_build_times = {}
+        self.preload_queue = list(PRELOAD_MODULES)
+        self.last_input_time = time.perf_counter()
+        for sequence in ("<Any-KeyPress>", "<Any-ButtonPress>", "<Motion>"):
+            self.bind_all(sequence, self.on_user_input, add='+')
 
         # Binding pour le plein écran (Alt+Entrée)
         self.bind("<Alt-Return>", self.toggle_fullscreen)
 
+        # Mesure du démarrage puis préchargement des bibliothèques lourdes, fenêtre affichée
+        self.after_idle(self.on_window_shown)
+
     def setup_modules_path(self):
         """
         Configure le chemin du répertoire MODULES et s'assure qu'il est reconnu comme un package Python.
@@ -147,17 +172,13 @@ class MainApplication(tk.Tk):
             frame.pack_forget()
 
         if module_name in self.modules_frames:
-            # Afficher le module déjà chargé
+            # Afficher le module déjà chargé (éventuellement préchargé)
             frame = self.modules_frames[module_name]
             frame.pack(fill='both', expand=True)
         else:
             # Tenter de charger le module
             try:
-                module = importlib.import_module(module_name)
-                frame = module.get_frame(self.content_frame, self)
-
-                # Stocker le frame pour ne pas recharger le module plus tard
-                self.modules_frames[module_name] = frame
+                frame = self.build_module_frame(module_name)
                 frame.pack(fill='both', expand=True)
             except ImportError as e:
                 messagebox.showerror("Erreur", f"Impossible de charger le module '{module_name}'.\n\n{e}")
@@ -166,6 +187,87 @@ class MainApplication(tk.Tk):
             except Exception as e:
                 messagebox.showerror("Erreur", f"Une erreur est survenue lors du chargement du module '{module_name}'.\n\n{e}")
 
+    def build_module_frame(self, module_name, preloaded=False):
+        """
+        Importe le module et construit son frame (sans l'afficher), en mesurant les deux étapes.
+        Le frame est conservé pour ne pas recharger le module plus tard.
+        """
+        start = time.perf_counter()
+        already_imported = module_name in sys.modules
+        module = importlib.import_module(module_name)
+        imported = time.perf_counter()
+        frame = module.get_frame(self.content_frame, self)
+        built = time.perf_counter()
+
+        timing = {'import_ms': 0.0 if already_imported else (imported - start) * 1000.0,
+                  'build_ms': (built - imported) * 1000.0, 'preloaded': preloaded}
+        if preloaded:
+            # Import fait en arrière-plan par le préchargement : temps mesuré dans ce thread
+            from lazy_imports import IMPORT_TIMES
+            timing['import_ms'] = IMPORT_TIMES.get(module_name, {}).get('ms', timing['import_ms'])
+        self.module_build_times[module_name] = timing
+        logger.info(f"Module {module_name} : import {timing['import_ms']:.0f} ms, "
+                    f"construction {timing['build_ms']:.0f} ms" + (" (préchargé)" if preloaded else ""))
+        self.modules_frames[module_name] = frame
+        return frame
+
+    def on_user_input(self, event=None):
+        self.last_input_time = time.perf_counter()
+
+    def preload_next_module(self):
+        """
+        Précharge le prochain écran de PRELOAD_MODULES : import du module dans un thread,
+        puis construction du frame dans la boucle Tk quand l'utilisateur n'interagit pas.
+        Un écran par passage, pour que la fenêtre reste réactive entre deux constructions.
+        """
+        while self.preload_queue and self.preload_queue[0] in self.modules_frames:
+            self.preload_queue.pop(0)
+        if not self.preload_queue:
+            logger.info(f"Préchargement des écrans terminé :\n{self.format_build_times()}")
+            return
+        from lazy_imports import prewarm
+        module_name = self.preload_queue[0]
+        thread = prewarm([module_name]) if module_name not in sys.modules else None
+        self.after(PRELOAD_POLL_MS, lambda: self._build_preloaded_module(module_name, thread))
+
+    def _build_preloaded_module(self, module_name, thread):
+        idle_ms = (time.perf_counter() - self.last_input_time) * 1000.0
+        if (thread is not None and thread.is_alive()) or idle_ms < PRELOAD_IDLE_MS:
+            self.after(PRELOAD_POLL_MS, lambda: self._build_preloaded_module(module_name, thread))
+            return
+        if self.preload_queue and self.preload_queue[0] == module_name:
+            self.preload_queue.pop(0)
+        if module_name not in self.modules_frames:
+            try:
+                self.build_module_frame(module_name, preloaded=True)
+            except Exception as e:
+                # Pas de boîte de dialogue : l'erreur sera affichée si l'utilisateur ouvre l'écran
+                logger.warning(f"Préchargement du module {module_name} impossible : {e}")
+        self.after(PRELOAD_INTERVAL_MS, self.preload_next_module)
+
+    def format_build_times(self):
+        lines = [f"{'Module':<12}{'Import (ms)':>12}{'Construction (ms)':>19}"]
+        for name, t in sorted(self.module_build_times.items(), key=lambda item: -item[1]['build_ms']):
+            lines.append(f"{name:<12}{t['import_ms']:>12.0f}{t['build_ms']:>19.0f}" + ("  préchargé" if t['preloaded'] else ""))
+        return "\n".join(lines)
+
+    def on_window_shown(self):
+        """
+        Appelée une fois la fenêtre principale affichée : enregistre le temps de démarrage puis
+        lance le préchargement en arrière-plan de matplotlib, reportlab et openai (pas de
+        TensorFlow, voir MODULES/lazy_imports.py) et des écrans de PRELOAD_MODULES. Les rapports des temps
+        d'import et de construction sont écrits dans le journal.
+        """
+        self.startup_ms = (time.perf_counter() - STARTUP_T0) * 1000.0
+        logger.info(f"Fenêtre principale affichée en {self.startup_ms:.0f} ms")
+        from lazy_imports import PREWARM_DELAY_MS, prewarm, format_import_report
+
+        def report(times):
+            logger.info(f"Préchargement terminé, temps d'import :\n{format_import_report(times)}")
+
+        self.after(PREWARM_DELAY_MS, lambda: prewarm(on_done=report))
+        self.after(PRELOAD_START_MS, self.preload_next_module)
+
     def toggle_fullscreen(self, event=None):
         """
         Bascule l'état du plein écran lorsque Alt+Entrée est pressé.